@@ -0,0 +1,247 @@
+# ast_nodes.py
+
+import sys
+
+
+def tag(name):
+    """Interned type/operator tag, so tag comparisons hit the identity fast path."""
+    return sys.intern(name)
+
+
+class Node:
+    """
+    Base class for AST nodes. Nodes use __slots__ to keep per-node memory low
+    and expose their kind as a class-level interned `type` tag.
+
+    Read-only mapping access (node["table"], node.get("where"), "op" in node)
+    is kept so code written against the old dict AST keeps working; use
+    to_dict() when a real dict is needed.
+
+    `_fields` lists the slots of a node class including inherited ones
+    (__slots__ only names those the class itself adds); walk it, not
+    __slots__, to visit every field.
+    """
+
+    __slots__ = ()
+    _fields = ()
+    type = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            for field in klass.__dict__.get("__slots__", ()):
+                if field not in fields:
+                    fields.append(field)
+        cls._fields = tuple(fields)
+
+    def __getitem__(self, key):
+        if key == "type":
+            return self.type
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key == "type" or key in self._fields
+
+    def to_dict(self):
+        result = {"type": self.type}
+        for field in self._fields:
+            result[field] = _export(getattr(self, field))
+        return result
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+def _export(value):
+    if isinstance(value, Node):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_export(item) for item in value]
+    return value
+
+
+class Select(Node):
+    """
+    `limit` is the LIMIT count as a NUMBER literal (so cached plans can
+    rebind it). `join_plan` is the JoinPlan chosen by the optimizer for
+    `joins` and `scan_columns` the columns the scan of `table` has to
+    read, if known.
+    """
+
+    __slots__ = ("columns", "table", "where", "joins", "optimization_log", "join_plan",
+                 "scan_columns", "limit")
+    type = tag("SELECT")
+
+    def __init__(self, columns, table, where=None, joins=None, optimization_log=None,
+                 join_plan=None, scan_columns=None, limit=None):
+        self.columns = columns
+        self.table = table
+        self.where = where
+        self.joins = joins
+        self.optimization_log = optimization_log
+        self.join_plan = join_plan
+        self.scan_columns = scan_columns
+        self.limit = limit
+
+    def to_dict(self):
+        result = {
+            "type": self.type,
+            "columns": list(self.columns),
+            "table": self.table,
+            "where": _export(self.where),
+        }
+        if self.joins is not None:
+            result["joins"] = _export(self.joins)
+        if self.limit is not None:
+            result["limit"] = int(self.limit.value)
+        if self.optimization_log is not None:
+            result["optimization_log"] = list(self.optimization_log)
+        return result
+
+
+class Subquery(Node):
+    __slots__ = ("columns", "table", "where")
+    type = tag("SUBQUERY")
+
+    def __init__(self, columns, table, where=None):
+        self.columns = columns
+        self.table = table
+        self.where = where
+
+
+class Join(Node):
+    """`columns` are the columns the scan of the joined table has to read, if known."""
+
+    __slots__ = ("table", "on", "where", "columns")
+    type = tag("JOIN")
+
+    def __init__(self, table, on, where=None, columns=None):
+        self.table = table
+        self.on = on
+        self.where = where
+        self.columns = columns
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "table": self.table,
+            "on": {"left": self.on.left.value, "op": self.on.op, "right": self.on.right.value},
+            "where": _export(self.where),
+        }
+
+
+class SemiJoin(Join):
+    """
+    `on.left IN (SELECT on.right FROM table WHERE where)`: keeps each outer
+    row at most once, however many inner rows share its key.
+    """
+
+    __slots__ = ()
+    type = tag("SEMI_JOIN")
+
+
+class Logic(Node):
+    __slots__ = ("op", "conditions")
+    type = tag("LOGIC")
+
+    def __init__(self, op, conditions):
+        self.op = tag(op)
+        self.conditions = conditions
+
+
+class Condition(Node):
+    __slots__ = ("left", "op", "right")
+    type = tag("CONDITION")
+
+    def __init__(self, left, op, right):
+        self.left = left
+        self.op = tag(op)
+        self.right = right
+
+
+class Expression(Node):
+    __slots__ = ("op", "left", "right")
+    type = tag("EXPRESSION")
+
+    def __init__(self, op, left, right):
+        self.op = tag(op)
+        self.left = left
+        self.right = right
+
+
+class Literal(Node):
+    """A NUMBER or STRING constant; `value` keeps the source text."""
+
+    __slots__ = ("type", "value")
+
+    def __init__(self, kind, value):
+        self.type = tag(kind)
+        self.value = value
+
+
+class Identifier(Node):
+    __slots__ = ("value",)
+    type = tag("IDENTIFIER")
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Boolean(Node):
+    __slots__ = ("value",)
+    type = tag("BOOLEAN")
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Param(Node):
+    """Placeholder for the literal at position `slot` in a cached plan template."""
+
+    __slots__ = ("slot", "kind")
+    type = tag("PARAM")
+
+    def __init__(self, slot, kind):
+        self.slot = slot
+        self.kind = kind
+
+
+def copy_tree(value, substitute=None):
+    """
+    Deep-copies nodes and lists. substitute(node) may return a replacement
+    for a node (which is used as-is) or None to copy it normally.
+    """
+    if isinstance(value, list):
+        return [copy_tree(item, substitute) for item in value]
+    if not isinstance(value, Node):
+        return value
+    if substitute is not None:
+        replacement = substitute(value)
+        if replacement is not None:
+            return replacement
+    clone = object.__new__(type(value))
+    for field in value._fields:
+        setattr(clone, field, copy_tree(getattr(value, field), substitute))
+    return clone
+
+
+def iter_literals(stmt):
+    """Yields Literal nodes of a statement in source order."""
+    stack = [stmt]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, Literal):
+            yield node
+        elif isinstance(node, Node):
+            stack.extend(reversed([getattr(node, field) for field in node._fields]))
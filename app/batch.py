@@ -0,0 +1,123 @@
+# batch.py
+
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from app.plan_cache import PlanCache
+
+# Target size of the byte range handed to one worker task
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Per-process plan cache; dumps tend to repeat the same query shapes
+_plan_cache = PlanCache()
+
+
+def iter_statement_ends(buf, start=0, end=None):
+    """
+    Yields the offset just past every ';' in buf[start:end] that is not
+    inside a string literal. Works on bytes, bytearray and mmap objects and
+    relies on find() so the scan runs at C speed.
+    """
+    end = len(buf) if end is None else end
+    pos = start
+    while pos < end:
+        semicolon = buf.find(b";", pos, end)
+        quote = buf.find(b"'", pos, end)
+        if semicolon == -1:
+            return
+        if quote == -1 or semicolon < quote:
+            yield semicolon + 1
+            pos = semicolon + 1
+            continue
+        # Skip the string literal; '' escapes simply close and reopen it.
+        closing = buf.find(b"'", quote + 1, end)
+        if closing == -1:
+            return
+        pos = closing + 1
+
+
+def iter_statement_ranges(buf, start=0, end=None):
+    """Yields (start, end) byte ranges of the statements in buf[start:end]."""
+    end = len(buf) if end is None else end
+    for stmt_end in iter_statement_ends(buf, start, end):
+        yield start, stmt_end
+        start = stmt_end
+    if buf[start:end].strip():
+        yield start, end
+
+
+def plan_chunks(buf, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Groups whole statements into (start, end) ranges of about chunk_bytes."""
+    chunk_start = 0
+    for stmt_start, stmt_end in iter_statement_ranges(buf):
+        if stmt_end - chunk_start >= chunk_bytes:
+            yield chunk_start, stmt_end
+            chunk_start = stmt_end
+    if chunk_start < len(buf):
+        yield chunk_start, len(buf)
+
+
+def init_worker(plan_store=None):
+    """Worker initializer: warm-starts the per-process cache from a plan store."""
+    global _plan_cache
+    if plan_store is not None:
+        _plan_cache = PlanCache(store_path=plan_store)
+
+
+def compile_statement(sql):
+    """Runs tokenize, parse, validate and optimize on a single statement."""
+    return _plan_cache.compile(sql)
+
+
+def compile_chunk(path, start, end):
+    """
+    Worker entry point. Each worker maps the file itself and only decodes
+    its own byte range, so memory per worker is bounded by the chunk size
+    rather than the size of the file.
+    """
+    results = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for stmt_start, stmt_end in iter_statement_ranges(mm, start, end):
+            sql = mm[stmt_start:stmt_end].decode("utf-8")
+            if not sql.strip(" \t\r\n;"):
+                continue
+            try:
+                statements, errors = compile_statement(sql)
+            except SyntaxError as e:
+                statements, errors = [], [str(e)]
+            except Exception as e:   # one bad statement must not lose the rest of the file
+                statements, errors = [], [f"{type(e).__name__}: {e}"]
+            results.append({
+                "offset": stmt_start,
+                "statements": statements,
+                "errors": errors
+            })
+    return results
+
+
+def compile_file(path, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES, plan_store=None):
+    """
+    Compiles every statement of a (possibly huge) .sql file on a process pool.
+    Results are yielded in file order, one dict per statement with its byte
+    offset, optimized statements and any errors. At most two chunks per
+    worker are in flight, so finished results never pile up in memory.
+    Workers look up plans in plan_store (see PlanCache.save) if given.
+    """
+    if os.path.getsize(path) == 0:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        chunks = plan_chunks(mm, chunk_bytes)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(plan_store,)) as pool:
+            in_flight = deque()
+            for start, end in chunks:
+                in_flight.append(pool.submit(compile_chunk, path, start, end))
+                if len(in_flight) >= workers * 2:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
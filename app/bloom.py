@@ -0,0 +1,71 @@
+# bloom.py
+
+import math
+
+from app.utils import mix64
+
+DEFAULT_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over hashable values. Membership tests never
+    give false negatives; false positives occur at about `error_rate` once
+    `capacity` values have been added. Positions come from double hashing
+    of one 64-bit mix, so a lookup costs a single hash() call.
+    """
+
+    __slots__ = ("size", "hashes", "bits", "count")
+
+    def __init__(self, capacity, error_rate=DEFAULT_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def from_keys(cls, keys, error_rate=DEFAULT_ERROR_RATE):
+        keys = keys if isinstance(keys, (set, frozenset)) else set(keys)
+        bloom = cls(len(keys), error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, value):
+        h = mix64(value)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def error_rate(self):
+        """Expected false-positive rate for the values added so far."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+def semi_join(outer_rows, key, inner_keys, bloom=None):
+    """
+    Yields the outer rows whose key(row) occurs in inner_keys, each at most
+    once however often the key repeats on the inner side. When a Bloom
+    filter over inner_keys is given, rows it rejects skip the exact probe.
+    """
+    keys = inner_keys if isinstance(inner_keys, (set, frozenset)) else set(inner_keys)
+    for row in outer_rows:
+        value = key(row)
+        if bloom is not None and value not in bloom:
+            continue
+        if value in keys:
+            yield row
@@ -0,0 +1,348 @@
+# catalog.py
+
+import json
+import os
+import sqlite3
+import weakref
+import zlib
+
+from app.statistics import load_statistics, stats_path_for
+
+DEFAULT_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '../schema/mock_schema.json')
+
+# Name of the file describing a sharded JSON catalog directory
+SHARD_MANIFEST = "manifest.json"
+
+# Secondary index kinds a column can declare: a sorted key array with
+# row-id payloads (equality and ranges) or a hash index (equality only)
+INDEX_KINDS = ("sorted", "hash")
+
+
+class TableInfo:
+    """
+    Schema of one table with a precomputed column set for O(1) membership
+    tests, plus its TableStats once the table has been analyzed.
+    `indexes` maps indexed columns to their index kind (see INDEX_KINDS);
+    declarations of unknown columns or kinds are dropped.
+    """
+
+    __slots__ = ("name", "columns", "column_set", "stats", "indexes")
+
+    def __init__(self, name, columns, stats=None, indexes=None):
+        self.name = name
+        self.columns = dict(columns)
+        self.column_set = frozenset(self.columns)
+        self.stats = stats
+        self.indexes = {column: kind for column, kind in dict(indexes or {}).items()
+                        if column in self.column_set and kind in INDEX_KINDS}
+
+    def has_column(self, column):
+        return column in self.column_set
+
+    def column_type(self, column):
+        return self.columns.get(column)
+
+    def column_stats(self, column):
+        return self.stats.column(column) if self.stats is not None else None
+
+    def index_kind(self, column):
+        return self.indexes.get(column)
+
+
+def shard_of(table, shards):
+    """Stable shard number of a table name (independent of PYTHONHASHSEED)."""
+    return zlib.crc32(table.encode("utf-8")) % shards
+
+
+class JsonSource:
+    """
+    The whole catalog in one JSON file:
+    {table: {"columns": {name: type}, "indexes": {name: kind}}}, where
+    "indexes" is optional.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load_all(self):
+        with open(self.path, "r") as f:
+            schema = json.load(f)
+        return {name: TableInfo(name, spec.get("columns", {}), indexes=spec.get("indexes"))
+                for name, spec in schema.items()}
+
+
+class ShardedJsonSource:
+    """
+    A directory holding manifest.json ({"shards": n}) and shard_<i>.json
+    files, each in the single-file format. A table lives in shard
+    shard_of(name, n), so a lookup only ever parses one shard. The
+    manifest is written last and its mtime stands for the whole directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, SHARD_MANIFEST), "r") as f:
+            self.shards = json.load(f)["shards"]
+
+    def load_shard(self, shard):
+        try:
+            return JsonSource(os.path.join(self.path, f"shard_{shard}.json")).load_all()
+        except FileNotFoundError:
+            return {}
+
+    def table_names(self):
+        names = []
+        for shard in range(self.shards):
+            names.extend(self.load_shard(shard))
+        return names
+
+
+class SqliteSource:
+    """Catalog stored in an SQLite file; tables are fetched one at a time by index."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+    def load_table(self, name):
+        rows = self.conn.execute(
+            "SELECT column_name, column_type FROM catalog_columns "
+            "WHERE table_name = ? ORDER BY position", (name,)
+        ).fetchall()
+        if not rows:
+            exists = self.conn.execute(
+                "SELECT 1 FROM catalog_tables WHERE table_name = ?", (name,)
+            ).fetchone()
+            return TableInfo(name, {}) if exists else None
+        return TableInfo(name, rows, indexes=self.load_indexes(name))
+
+    def load_indexes(self, name):
+        try:
+            return self.conn.execute(
+                "SELECT column_name, kind FROM catalog_indexes WHERE table_name = ?", (name,)
+            ).fetchall()
+        except sqlite3.OperationalError:   # written before indexes existed
+            return []
+
+    def table_names(self):
+        return [row[0] for row in self.conn.execute("SELECT table_name FROM catalog_tables")]
+
+
+def catalog_mtime(path):
+    """mtime of a catalog file, or of the manifest of a sharded directory."""
+    if os.path.isdir(path):
+        path = os.path.join(path, SHARD_MANIFEST)
+    return os.stat(path).st_mtime_ns
+
+
+def open_source(path):
+    if os.path.isdir(path):
+        return ShardedJsonSource(path)
+    if path.endswith((".sqlite", ".sqlite3", ".db")):
+        return SqliteSource(path)
+    return JsonSource(path)
+
+
+class Catalog:
+    """
+    Table/column lookups over a schema file that is loaded lazily on first
+    use and reloaded automatically when its mtime (or that of the statistics
+    file written by app.statistics.analyze) changes. The backing file
+    can be a single JSON file, a sharded JSON directory or an SQLite file
+    (see build_sharded_catalog and build_sqlite_catalog); the latter two
+    load tables on demand, so catalogs with tens of thousands of tables
+    never have to be parsed in full.
+    """
+
+    def __init__(self, path=DEFAULT_SCHEMA_PATH):
+        self.path = path
+        self.stats_path = stats_path_for(path)
+        self.statistics = {}
+        self.source = None
+        self.mtime = None
+        self.loaded = False
+        self.complete = False
+        self.tables = {}
+        self.missing = set()
+        self.loaded_shards = set()
+        self.listeners = []
+
+    def refresh(self):
+        """Loads the catalog if needed and reloads it if the file changed."""
+        try:
+            mtime = catalog_mtime(self.path)
+        except OSError:
+            mtime = None
+        try:
+            stats_mtime = os.stat(self.stats_path).st_mtime_ns
+        except OSError:
+            stats_mtime = None
+
+        if self.loaded and (mtime, stats_mtime) == self.mtime:
+            return
+
+        reloaded = self.loaded
+        self.mtime = (mtime, stats_mtime)
+        self.statistics = load_statistics(self.stats_path) if stats_mtime is not None else {}
+        self.loaded = True
+        self.complete = False
+        self.tables = {}
+        self.missing = set()
+        self.loaded_shards = set()
+        self.source = None
+        if mtime is None:
+            print(f"Error: Schema file not found at {self.path}")
+        else:
+            try:
+                self.source = open_source(self.path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error: Could not open schema catalog {self.path}: {e}")
+        if reloaded:
+            self._notify()
+
+    def add_listener(self, callback):
+        """Registers callback() to run after every reload; bound methods are held weakly."""
+        if hasattr(callback, "__self__"):
+            self.listeners.append(weakref.WeakMethod(callback))
+        else:
+            self.listeners.append(lambda: callback)
+
+    def table(self, name):
+        """Returns the TableInfo for name, or None if the table does not exist."""
+        self.refresh()
+        info = self.tables.get(name)
+        if info is not None or name in self.missing:
+            return info
+        info = self._load(name)
+        if info is None:
+            self.missing.add(name)
+        else:
+            self.tables[name] = info
+        return info
+
+    def has_table(self, name):
+        return self.table(name) is not None
+
+    def columns(self, table):
+        info = self.table(table)
+        return info.columns if info is not None else {}
+
+    def column_set(self, table):
+        info = self.table(table)
+        return info.column_set if info is not None else frozenset()
+
+    def has_column(self, table, column):
+        info = self.table(table)
+        return info is not None and column in info.column_set
+
+    def table_stats(self, table):
+        info = self.table(table)
+        return info.stats if info is not None else None
+
+    def column_stats(self, table, column):
+        info = self.table(table)
+        return info.column_stats(column) if info is not None else None
+
+    def table_names(self):
+        self.refresh()
+        if self.source is None:
+            return []
+        if isinstance(self.source, JsonSource):
+            self._load_all()
+            return list(self.tables)
+        return self.source.table_names()
+
+    def as_dict(self):
+        """The catalog in the mock_schema.json layout."""
+        schema = {}
+        for name in self.table_names():
+            info = self.table(name)
+            schema[name] = {"columns": dict(info.columns)}
+            if info.indexes:
+                schema[name]["indexes"] = dict(info.indexes)
+        return schema
+
+    def _load(self, name):
+        source = self.source
+        if source is None:
+            return None
+        if isinstance(source, JsonSource):
+            self._load_all()
+            return self.tables.get(name)
+        if isinstance(source, ShardedJsonSource):
+            shard = shard_of(name, source.shards)
+            if shard not in self.loaded_shards:
+                self.loaded_shards.add(shard)
+                self.tables.update(self._with_stats(source.load_shard(shard)))
+            return self.tables.get(name)
+        info = source.load_table(name)
+        if info is not None:
+            info.stats = self.statistics.get(name)
+        return info
+
+    def _load_all(self):
+        if not self.complete:
+            try:
+                self.tables = self._with_stats(self.source.load_all())
+            except (OSError, ValueError) as e:
+                print(f"Error: Invalid JSON in schema file: {e}")
+                self.tables = {}
+            self.complete = True
+
+    def _with_stats(self, tables):
+        """Attaches the analyzed statistics to freshly loaded TableInfos."""
+        for name, info in tables.items():
+            info.stats = self.statistics.get(name)
+        return tables
+
+    def _notify(self):
+        alive = []
+        for ref in self.listeners:
+            callback = ref()
+            if callback is not None:
+                callback()
+                alive.append(ref)
+        self.listeners = alive
+
+
+def build_sharded_catalog(schema, directory, shards=64):
+    """Writes a schema dict as a sharded JSON catalog directory."""
+    os.makedirs(directory, exist_ok=True)
+    buckets = [{} for _ in range(shards)]
+    for name, spec in schema.items():
+        buckets[shard_of(name, shards)][name] = spec
+    for shard, bucket in enumerate(buckets):
+        with open(os.path.join(directory, f"shard_{shard}.json"), "w") as f:
+            json.dump(bucket, f)
+    with open(os.path.join(directory, SHARD_MANIFEST), "w") as f:
+        json.dump({"shards": shards}, f)
+
+
+def build_sqlite_catalog(schema, path):
+    """Writes a schema dict as an SQLite catalog file."""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS catalog_tables")
+        conn.execute("DROP TABLE IF EXISTS catalog_columns")
+        conn.execute("DROP TABLE IF EXISTS catalog_indexes")
+        conn.execute("CREATE TABLE catalog_tables (table_name TEXT PRIMARY KEY)")
+        conn.execute(
+            "CREATE TABLE catalog_columns (table_name TEXT, column_name TEXT, "
+            "column_type TEXT, position INTEGER, PRIMARY KEY (table_name, column_name))"
+        )
+        conn.execute(
+            "CREATE TABLE catalog_indexes (table_name TEXT, column_name TEXT, kind TEXT, "
+            "PRIMARY KEY (table_name, column_name))"
+        )
+        for name, spec in schema.items():
+            conn.execute("INSERT INTO catalog_tables VALUES (?)", (name,))
+            conn.executemany(
+                "INSERT INTO catalog_columns VALUES (?, ?, ?, ?)",
+                [(name, column, column_type, position)
+                 for position, (column, column_type) in enumerate(spec.get("columns", {}).items())]
+            )
+            conn.executemany(
+                "INSERT INTO catalog_indexes VALUES (?, ?, ?)",
+                [(name, column, kind) for column, kind in spec.get("indexes", {}).items()]
+            )
+    conn.close()
@@ -0,0 +1,170 @@
+# cost.py
+
+from bisect import bisect_left, bisect_right
+
+from app.evaluator import literal_value
+from app.utils import fold_tree, logic_children
+
+# Textbook fallbacks (System R / PostgreSQL defaults) when a column has no statistics
+DEFAULT_EQ_SELECTIVITY = 0.005
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+DEFAULT_IN_SUBQUERY_SELECTIVITY = 0.5
+DEFAULT_SELECTIVITY = 1 / 3
+DEFAULT_ROW_COUNT = 1000
+
+# Per-row evaluation cost of a predicate, in units of one numeric comparison
+COMPARISON_COST = 1.0
+STRING_COMPARISON_COST = 2.0
+ARITHMETIC_COST = 0.5
+IN_SUBQUERY_COST = 50.0
+
+FLIPPED_OPS = {"<": ">", ">": "<", "<=": ">=", ">=": "<=", "=": "=", "!=": "!="}
+
+
+def column_predicate(cond):
+    """Returns (column, op, value) for `column op literal` in either order, else None."""
+    left, right = cond.left, cond.right
+    if left.type == "IDENTIFIER" and right.type in ("NUMBER", "STRING"):
+        return left.value, cond.op, literal_value(right)
+    if right.type == "IDENTIFIER" and left.type in ("NUMBER", "STRING"):
+        return right.value, FLIPPED_OPS.get(cond.op, cond.op), literal_value(left)
+    return None
+
+
+def _fraction_below(stats, value, inclusive):
+    """Estimated fraction of non-null values < value (<= if inclusive)."""
+    bounds = stats.histogram
+    try:
+        if bounds and len(bounds) > 1:
+            buckets = len(bounds) - 1
+            index = (bisect_right if inclusive else bisect_left)(bounds, value)
+            if index == 0:
+                return 0.0
+            if index > buckets:
+                return 1.0
+            low, high = bounds[index - 1], bounds[index]
+            within = 0.5
+            if isinstance(value, (int, float)) and high != low:
+                within = min(1.0, max(0.0, (value - low) / (high - low)))
+            return (index - 1 + within) / buckets
+        if isinstance(value, (int, float)) and stats.min is not None and stats.max != stats.min:
+            return min(1.0, max(0.0, (value - stats.min) / (stats.max - stats.min)))
+    except TypeError:
+        pass
+    return None
+
+
+def comparison_selectivity(stats, op, value):
+    """Selectivity of `column op value` from ColumnStats, or the defaults without them."""
+    if stats is None or value is None:
+        if op == "=":
+            return DEFAULT_EQ_SELECTIVITY
+        if op == "!=":
+            return 1 - DEFAULT_EQ_SELECTIVITY
+        return DEFAULT_RANGE_SELECTIVITY
+
+    non_null = 1 - stats.null_frac
+    if op in ("=", "!="):
+        equal = None
+        for mcv_value, frequency in stats.mcv:
+            if mcv_value == value:
+                equal = frequency
+                break
+        if equal is None:
+            try:
+                out_of_range = stats.min is not None and (value < stats.min or value > stats.max)
+            except TypeError:
+                out_of_range = False
+            if out_of_range:
+                equal = 0.0
+            else:
+                rest = max(0.0, non_null - sum(frequency for _, frequency in stats.mcv))
+                others = max(1, stats.distinct - len(stats.mcv))
+                equal = rest / others
+        return equal if op == "=" else max(0.0, non_null - equal)
+
+    below = _fraction_below(stats, value, inclusive=op in ("<=", ">"))
+    if below is None:
+        return DEFAULT_RANGE_SELECTIVITY
+    if op in ("<", "<="):
+        return below * non_null
+    return (1 - below) * non_null
+
+
+def expression_cost(node):
+    cost = 0.0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.type == "EXPRESSION":
+            cost += ARITHMETIC_COST
+            stack.extend((node.left, node.right))
+    return cost
+
+
+def estimate_predicate(cond, table_info=None):
+    """(selectivity, per-row cost) of a single non-LOGIC condition."""
+    if cond.type == "BOOLEAN":
+        return (1.0 if cond.value else 0.0), 0.0
+    if cond.type != "CONDITION":
+        return DEFAULT_SELECTIVITY, COMPARISON_COST
+
+    if cond.op == "IN":
+        return DEFAULT_IN_SUBQUERY_SELECTIVITY, IN_SUBQUERY_COST
+
+    cost = COMPARISON_COST + expression_cost(cond.left) + expression_cost(cond.right)
+    if "STRING" in (cond.left.type, cond.right.type):
+        cost = STRING_COMPARISON_COST + cost - COMPARISON_COST
+
+    predicate = column_predicate(cond)
+    if predicate is None:
+        return DEFAULT_SELECTIVITY, cost
+    column, op, value = predicate
+    stats = table_info.column_stats(column) if table_info is not None else None
+    return comparison_selectivity(stats, op, value), cost
+
+
+def order_operands(op, estimates):
+    """
+    Orders (node, selectivity, cost) triples to minimize the expected cost of
+    short-circuit evaluation: AND by cost / (1 - selectivity) ascending (fail
+    fast), OR by cost / selectivity ascending (succeed fast). Ties keep order.
+    """
+    if op == "AND":
+        def rank(item):
+            _, sel, cost = item
+            return cost / (1 - sel) if sel < 1 else float("inf")
+    else:
+        def rank(item):
+            _, sel, cost = item
+            return cost / sel if sel > 0 else float("inf")
+    return sorted(estimates, key=rank)
+
+
+def combine_estimates(op, estimates):
+    """(selectivity, expected cost) of evaluating the operands in the given order."""
+    reach = 1.0
+    cost = 0.0
+    for _, sel, operand_cost in estimates:
+        cost += reach * operand_cost
+        reach *= sel if op == "AND" else (1 - sel)
+    selectivity = reach if op == "AND" else 1 - reach
+    return selectivity, cost
+
+
+def estimate_condition(condition, table_info=None):
+    """(selectivity, expected per-row cost) of a whole condition tree, as ordered."""
+    def estimate(node, children):
+        if node.type == "LOGIC":
+            return (node,) + combine_estimates(node.op, children)
+        return (node,) + estimate_predicate(node, table_info)
+
+    _, selectivity, cost = fold_tree(condition, estimate, logic_children)
+    return selectivity, cost
+
+
+def table_rows(table_info):
+    """Row count from statistics, or DEFAULT_ROW_COUNT (and False) if unknown."""
+    if table_info is not None and table_info.stats is not None:
+        return table_info.stats.row_count, True
+    return DEFAULT_ROW_COUNT, False
@@ -0,0 +1,188 @@
+# evaluator.py
+
+import re
+
+from app.ast_nodes import Boolean, Condition, Expression, Literal, Logic
+from app.utils import condition_children, fold_tree
+
+# Text of a NUMBER token (see app.lexer); folded numbers must be writable as one
+NUMBER_TEXT = re.compile(r"\d+(\.\d+)?")
+
+COMPARISONS = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def literal_value(node):
+    """Python value of a NUMBER/STRING literal, or None for anything else."""
+    if node.type == "NUMBER":
+        try:
+            return int(node.value)
+        except ValueError:
+            return float(node.value)
+    if node.type == "STRING":
+        return node.value[1:-1] if node.value.startswith("'") else node.value
+    return None
+
+
+def to_literal(value):
+    """
+    Literal node for a folded value (strings are re-quoted like the lexer
+    does), or None for numbers a NUMBER token cannot spell: negative
+    numbers, exponents, inf and nan.
+    """
+    if isinstance(value, str):
+        return Literal("STRING", f"'{value}'")
+    text = repr(value)
+    if NUMBER_TEXT.fullmatch(text) is None:
+        return None
+    return Literal("NUMBER", text)
+
+
+def arithmetic(op, a, b):
+    """
+    SQL arithmetic on two numbers: int op int stays int (division truncates
+    toward zero), anything involving a float is float. Returns None when
+    the result is not a compile-time constant (e.g. division by zero).
+    """
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    if op == "/":
+        if b == 0:
+            return None
+        if isinstance(a, int) and isinstance(b, int):
+            quotient = abs(a) // abs(b)
+            return quotient if (a < 0) == (b < 0) else -quotient
+        return a / b
+    return None
+
+
+# x / 0 is SQL NULL; at run time it is represented by NaN
+NULL = float("nan")
+
+
+def divide(a, b):
+    """
+    SQL division at run time, shared by the row predicates (app.predicate)
+    and the vectorized executor (app.executor): operands are numbers or
+    NumPy arrays, integers truncate toward zero and x / 0 is NULL (NaN),
+    so every comparison with the result is false (see not_equal).
+    """
+    if not hasattr(a, "dtype") and not hasattr(b, "dtype"):
+        if b == 0:
+            return NULL
+        if isinstance(a, int) and isinstance(b, int):
+            quotient = abs(a) // abs(b)
+            return quotient if (a < 0) == (b < 0) else -quotient
+        return a / b
+
+    import numpy as np   # array operands only come from the NumPy executor
+
+    zero = np.asarray(b) == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if np.issubdtype(np.result_type(a), np.integer) and \
+                np.issubdtype(np.result_type(b), np.integer):
+            quotient = np.abs(a) // np.abs(np.where(zero, 1, b))
+            result = np.where((np.asarray(a) < 0) == (np.asarray(b) < 0), quotient, -quotient)
+        else:
+            result = np.true_divide(a, b)
+    return np.where(zero, NULL, result) if np.any(zero) else result
+
+
+def present(value):
+    """
+    False where a value is NULL: None (also inside object arrays) or the
+    NaN of x / 0. Works element-wise on arrays.
+    """
+    if getattr(value, "dtype", None) == object:
+        return (value != None) & (value == value)   # noqa: E711, element-wise
+    if value is None:
+        return False
+    return value == value
+
+
+def not_equal(a, b):
+    """
+    a != b for numbers, strings or arrays, false when either side is NULL
+    (None or NaN), as every other comparison with NULL is.
+    """
+    return (a != b) & present(a) & present(b)
+
+
+def compare(op, a, b):
+    """Compares two values of the same kind (numbers or strings), else None."""
+    if isinstance(a, str) != isinstance(b, str):
+        return None
+    comparison = COMPARISONS.get(op)
+    return comparison(a, b) if comparison is not None else None
+
+
+class ConstantFolder:
+    """
+    Folds arithmetic and comparisons over literals by walking AST nodes
+    directly. Results are memoized per node, so subtrees that were already
+    folded are neither re-walked nor re-evaluated when the same tree is
+    folded again (e.g. on every round of a rewrite loop).
+    """
+
+    def __init__(self):
+        # id(node) -> (node, folded node); the node is kept so its id stays unique
+        self.cache = {}
+
+    def fold(self, condition):
+        if condition is None:
+            return None
+        cache = self.cache
+
+        def children(node):
+            return () if id(node) in cache else condition_children(node)
+
+        def combine(node, folded):
+            cached = cache.get(id(node))
+            if cached is not None:
+                return cached[1]
+            result = self.fold_node(node, folded)
+            cache[id(node)] = (node, result)
+            return result
+
+        return fold_tree(condition, combine, children)
+
+    def fold_node(self, node, folded):
+        node_type = node.type
+
+        if node_type == "EXPRESSION":
+            left, right = folded
+            if left.type == "NUMBER" and right.type == "NUMBER":
+                value = arithmetic(node.op, literal_value(left), literal_value(right))
+                literal = to_literal(value) if value is not None else None
+                if literal is not None:
+                    return literal
+            if left is node.left and right is node.right:
+                return node
+            return Expression(node.op, left, right)
+
+        if node_type == "CONDITION":
+            left, right = folded
+            if left.type in ("NUMBER", "STRING") and right.type in ("NUMBER", "STRING"):
+                result = compare(node.op, literal_value(left), literal_value(right))
+                if result is not None:
+                    return Boolean(result)
+            if left is node.left and right is node.right:
+                return node
+            return Condition(left, node.op, right)
+
+        if node_type == "LOGIC":
+            if all(a is b for a, b in zip(folded, node.conditions)):
+                return node
+            return Logic(node.op, list(folded))
+
+        return node
@@ -1,22 +1,867 @@
 # executor.py
 
-def execute(query):
-    """
-    Simulates execution of the optimized SQL query.
-    In a real-world project, this could be integrated with SQLite or another RDBMS.
-    """
-    print("\n🔧 Simulating execution of the SQL query...")
-    print("⚡ Query to execute:")
-    print(query)
-    
-    # In a real integration, you would do:
-    # import sqlite3
-    # conn = sqlite3.connect("your_database.db")
-    # cursor = conn.cursor()
-    # cursor.execute(query)
-    # results = cursor.fetchall()
-    # return results
-    
-    # Simulated output
-    print("\n✅ Query executed successfully (mock).")
-    return [{"message": "Execution simulated, no actual DB involved."}]
+import itertools
+import operator
+import pickle
+import tempfile
+
+import numpy as np
+
+from app.evaluator import divide, literal_value, not_equal, present
+from app.index import build_index, index_rows
+from app.lexer import tokenize
+from app.optimizer import optimize
+from app.parser import parse
+from app.plan import build_plan
+from app.semantic import CATALOG, validate
+from app.storage import (
+    DEFAULT_ROW_GROUP_SIZE, FLIPPED, decode, dictionary_encode, row_group_may_match, should_encode,
+)
+from app.utils import fold_tree
+
+# Rows per batch handed from one operator to the next
+DEFAULT_BATCH_SIZE = 65536
+
+# Bytes of operator state (join build sides, buffered rows) one query may hold
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+
+# Partitions a join input is split into when it has to spill to disk
+SPILL_PARTITIONS = 32
+
+# Assumed size of one string object in an object column
+OBJECT_ITEM_BYTES = 56
+
+COMPARISONS = {
+    "=": operator.eq,
+    "!=": not_equal,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def column_dtype(sql_type):
+    """NumPy dtype for a catalog column type; strings are kept as objects."""
+    sql_type = sql_type.lower()
+    if sql_type.startswith(("int", "bigint", "smallint")):
+        return np.dtype(np.int64)
+    if sql_type in ("float", "double", "real", "decimal", "numeric"):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+class ColumnTable:
+    """
+    A table held as one NumPy array per column, all of the same length.
+    Columns in `dictionaries` hold integer codes into that column's sorted
+    dictionary (see app.storage.dictionary_encode) instead of strings.
+    """
+
+    __slots__ = ("name", "columns", "rows", "dictionaries")
+
+    def __init__(self, name, columns, dictionaries=None):
+        lengths = {len(array) for array in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns of table '{name}' have different lengths")
+        self.name = name
+        self.columns = columns
+        self.rows = lengths.pop() if lengths else 0
+        self.dictionaries = dictionaries or {}
+
+    def dictionary(self, column):
+        return self.dictionaries.get(column)
+
+    def values(self, column):
+        """The whole column, with dictionary codes decoded to strings."""
+        dictionary = self.dictionaries.get(column)
+        array = self.columns[column]
+        return decode(dictionary, array) if dictionary is not None else array
+
+    def read(self, column, start, stop):
+        return self.columns[column][start:stop]
+
+    def take(self, column, rows):
+        return self.columns[column][rows]
+
+    def row_groups(self):
+        """One group without a zone map: in-memory tables are never skipped."""
+        return [(0, self.rows, None)]
+
+
+class Database:
+    """
+    Columnar tables for the catalog's schema: tables loaded into memory
+    with add_table(), else tables of the on-disk ColumnStore (see
+    app.storage) if one is given. Tables found in neither read as empty
+    tables of the declared column types. The indexes the catalog declares
+    are built on a table's first index scan and kept until it is replaced.
+    """
+
+    def __init__(self, catalog=None, store=None):
+        self.catalog = catalog or CATALOG
+        self.store = store
+        self.tables = {}
+        self.indexes = {}
+
+    def table_info(self, name):
+        info = self.catalog.table(name)
+        if info is None:
+            raise ValueError(f"Table '{name}' does not exist")
+        return info
+
+    def add_table(self, name, columns):
+        """
+        Loads a table from a mapping of every column name to its values.
+        Low-cardinality string columns are dictionary-encoded.
+        """
+        info = self.table_info(name)
+        arrays, dictionaries = {}, {}
+        for column, sql_type in info.columns.items():
+            if columns and column not in columns:
+                raise ValueError(f"Column '{column}' of table '{name}' is missing")
+            values = columns.get(column, ())
+            arrays[column] = np.asarray(values, dtype=column_dtype(sql_type))
+            if arrays[column].dtype == object and len(arrays[column]):
+                codes, dictionary = dictionary_encode(arrays[column])
+                if should_encode(arrays[column], dictionary):
+                    arrays[column], dictionaries[column] = codes, dictionary
+        self.tables[name] = ColumnTable(name, arrays, dictionaries)
+        self.indexes = {key: index for key, index in self.indexes.items() if key[0] != name}
+        return self.tables[name]
+
+    def index(self, name, column, kind):
+        """The `kind` index of a table column (see app.index), built on first use."""
+        key = (name, column, kind)
+        index = self.indexes.get(key)
+        if index is None:
+            index = self.indexes[key] = build_index(kind, self.table(name).values(column))
+        return index
+
+    def table(self, name):
+        table = self.tables.get(name)
+        if table is None and self.store is not None:
+            table = self.store.table(name)
+        if table is None:
+            table = self.add_table(name, {})
+        return table
+
+    def save(self, store, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        """Writes every in-memory table to a ColumnStore."""
+        for name, table in self.tables.items():
+            columns = {column: table.values(column) for column in table.columns}
+            store.write_table(name, columns, row_group_size)
+
+
+def batch_rows(batch):
+    return len(next(iter(batch.values()))) if batch else 0
+
+
+def resolve_column(columns, name):
+    """The key of column `name` among the (table-qualified) batch columns."""
+    if name in columns:
+        return name
+    matches = [column for column in columns if column.endswith("." + name)]
+    if len(matches) == 1:
+        return matches[0]
+    problem = "ambiguous" if matches else "unknown"
+    raise ValueError(f"Column '{name}' is {problem}")
+
+
+ARITHMETIC = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": divide,
+}
+
+
+def compile_condition(condition, columns, subquery_values, dictionaries=None):
+    """
+    Compiles a condition into predicate(batch) -> boolean mask. The tree is
+    walked once here; evaluating a batch then runs one NumPy operation per
+    node over whole columns. Conjuncts run in the optimizer's (cost-based)
+    order and later ones are skipped once no row of the batch is left.
+    Comparisons of a dictionary-encoded column (`dictionaries` maps batch
+    keys to their dictionaries) with a string or an IN-subquery compare the
+    integer codes; other uses of the column decode it.
+    """
+    dictionaries = dictionaries or {}
+
+    def combine(node, children):
+        node_type = node.type
+        if node_type in ("NUMBER", "STRING"):
+            value = literal_value(node)
+            return lambda batch: value
+        if node_type == "IDENTIFIER":
+            key = resolve_column(columns, node.value)
+            dictionary = dictionaries.get(key)
+            if dictionary is not None:
+                return lambda batch: decode(dictionary, batch[key])
+            return lambda batch: batch[key]
+        if node_type == "BOOLEAN":
+            value = bool(node.value)
+            return lambda batch: value
+        if node_type == "SUBQUERY":
+            return None
+        if node_type == "EXPRESSION":
+            apply = ARITHMETIC[node.op]
+            left, right = children
+            return lambda batch: apply(left(batch), right(batch))
+        if node_type == "CONDITION":
+            encoded = code_comparison(node, columns, subquery_values, dictionaries)
+            if encoded is not None:
+                return encoded
+            left, right = children
+            if node.op == "IN":
+                values = subquery_values(node.right)
+                return lambda batch: np.isin(left(batch), values)
+            compare = COMPARISONS[node.op]
+            return lambda batch: compare_values(compare, left(batch), right(batch))
+        if node_type == "LOGIC":
+            return logic_predicate(node.op, children)
+        raise ValueError(f"Cannot execute condition node {node_type}")
+
+    predicate = fold_tree(condition, combine)
+
+    def evaluate(batch):
+        return np.broadcast_to(np.asarray(predicate(batch), dtype=bool), (batch_rows(batch),))
+
+    return evaluate
+
+
+def compare_values(compare, a, b):
+    """
+    compare(a, b) with NULL semantics: rows where either side is None are
+    false, as they are for dictionary-encoded columns (see code_comparison),
+    and are never handed to the comparison (None < 'a' would raise).
+    """
+    if getattr(a, "dtype", None) != object and getattr(b, "dtype", None) != object:
+        return compare(a, b)
+    mask = present(a) & present(b)
+    if np.all(mask):
+        return compare(a, b)
+    result = np.zeros(len(mask), dtype=bool)
+    result[mask] = compare(a[mask] if isinstance(a, np.ndarray) else a,
+                           b[mask] if isinstance(b, np.ndarray) else b)
+    return result
+
+
+def code_comparison(node, columns, subquery_values, dictionaries):
+    """
+    predicate(batch) comparing the codes of a dictionary-encoded column, or
+    None if the condition is not a column compared with a string or an
+    IN-subquery. The literal is looked up in the sorted dictionary once, so
+    ordering comparisons become code ranges as well. Missing values (code
+    -1) match nothing.
+    """
+    column, other, op = node.left, node.right, node.op
+    if column.type != "IDENTIFIER" and op in FLIPPED:
+        column, other, op = node.right, node.left, FLIPPED[op]
+    if column.type != "IDENTIFIER" or not dictionaries:
+        return None
+    key = resolve_column(columns, column.value)
+    dictionary = dictionaries.get(key)
+    if dictionary is None:
+        return None
+    if op == "IN":
+        codes = np.flatnonzero(np.isin(dictionary, subquery_values(other)))
+        return lambda batch: np.isin(batch[key], codes)
+    if other.type != "STRING":
+        return None
+    value = literal_value(other)
+    lo = int(np.searchsorted(dictionary, value, "left"))
+    hi = int(np.searchsorted(dictionary, value, "right"))   # hi == lo + 1 if value is present
+    if op == "=":
+        if hi == lo:
+            return lambda batch: np.zeros(len(batch[key]), dtype=bool)
+        return lambda batch: batch[key] == lo
+    if op == "!=":
+        if hi == lo:
+            return lambda batch: batch[key] >= 0
+        return lambda batch: (batch[key] != lo) & (batch[key] >= 0)
+    if op in ("<", "<="):
+        bound = lo if op == "<" else hi
+        return lambda batch: (batch[key] < bound) & (batch[key] >= 0)
+    if op == ">":
+        return lambda batch: batch[key] >= hi
+    if op == ">=":
+        return lambda batch: batch[key] >= lo
+    return None
+
+
+def logic_predicate(op, operands):
+    if op == "AND":
+        def conjunction(batch):
+            mask = operands[0](batch)
+            for operand in operands[1:]:
+                if not np.any(mask):
+                    break
+                mask = mask & operand(batch)
+            return mask
+        return conjunction
+
+    def disjunction(batch):
+        mask = operands[0](batch)
+        for operand in operands[1:]:
+            if np.all(mask):
+                break
+            mask = mask | operand(batch)
+        return mask
+    return disjunction
+
+
+def output_columns(node, database):
+    """Batch column keys an operator produces; scans qualify them with the table."""
+    operator_name = node.operator
+    if operator_name == "Scan":
+        return [f"{node.table}.{column}" for column in scan_columns(node, database)]
+    if operator_name == "Project":
+        return project_columns(node, database)[0]
+    if operator_name == "Join":
+        return output_columns(node.left, database) + output_columns(node.right, database)
+    if operator_name == "SemiJoin":
+        return output_columns(node.left, database)
+    return output_columns(node.input, database)
+
+
+def column_dictionaries(node, database):
+    """
+    Dictionaries of the batch columns an operator produces as codes. Scans
+    and filters pass codes on; projections and joins decode them.
+    """
+    operator_name = node.operator
+    if operator_name == "Scan":
+        table = database.table(node.table)
+        dictionaries = {}
+        for column in scan_columns(node, database):
+            dictionary = table.dictionary(column)
+            if dictionary is not None:
+                dictionaries[f"{node.table}.{column}"] = dictionary
+        return dictionaries
+    if operator_name in ("Filter", "Limit"):
+        return column_dictionaries(node.input, database)
+    return {}
+
+
+def decode_batches(batches, dictionaries):
+    for batch in batches:
+        if dictionaries:
+            batch = {key: decode(dictionaries[key], array) if key in dictionaries else array
+                     for key, array in batch.items()}
+        yield batch
+
+
+def scan_columns(node, database):
+    return node.columns or list(database.table(node.table).columns)
+
+
+def project_columns(node, database):
+    """(output names, input keys) of a projection; * expands to every input column."""
+    inputs = output_columns(node.input, database)
+    names, keys = [], []
+    for column in node.columns:
+        if column == "*":
+            for key in inputs:
+                short = key.split(".", 1)[-1]
+                names.append(short if resolve_unique(inputs, short) else key)
+                keys.append(key)
+        else:
+            names.append(column)
+            keys.append(resolve_column(inputs, column))
+    return names, keys
+
+
+def resolve_unique(columns, name):
+    return sum(column.endswith("." + name) for column in columns) == 1
+
+
+def subquery_resolver(database):
+    """subquery_values(node) for IN (SELECT ...) left inside a condition."""
+    def subquery_values(sub):
+        table = database.table(sub.table)
+        values = table.values(sub.columns[0])
+        if sub.where is None:
+            return values
+        batch = {f"{sub.table}.{column}": table.read(column, 0, table.rows)
+                 for column in table.columns}
+        dictionaries = {f"{sub.table}.{column}": table.dictionary(column)
+                        for column in table.columns if table.dictionary(column) is not None}
+        predicate = compile_condition(sub.where, list(batch), subquery_values, dictionaries)
+        return values[predicate(batch)]
+    return subquery_values
+
+
+class MemoryBudget:
+    """
+    Bytes held by the operator state of one query (join build sides and
+    rows buffered to form full batches). Join inputs ask fits() before
+    holding more and spill to disk when it fails; the at most one batch an
+    operator buffers is always allowed. `peak` is the most that was ever
+    held at once.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+
+    def fits(self, nbytes):
+        return self.limit is None or self.used + nbytes <= self.limit
+
+    def reserve(self, nbytes):
+        self.used += nbytes
+        self.peak = max(self.peak, self.used)
+
+    def release(self, nbytes):
+        self.used -= nbytes
+
+
+class ExecutionContext:
+    """Per-query state shared by the operators of one plan."""
+
+    def __init__(self, database, batch_size=DEFAULT_BATCH_SIZE, memory_limit=None):
+        self.database = database
+        self.batch_size = batch_size
+        self.budget = MemoryBudget(memory_limit)
+        self.batches_scanned = 0
+        self.row_groups_read = 0
+        self.row_groups_skipped = 0
+        self.spilled_partitions = 0
+        self.index_scans = 0
+        self.rows_fetched = 0
+
+    def stats(self):
+        return {
+            "peak_memory": self.budget.peak,
+            "memory_limit": self.budget.limit,
+            "batches_scanned": self.batches_scanned,
+            "row_groups_read": self.row_groups_read,
+            "row_groups_skipped": self.row_groups_skipped,
+            "spilled_partitions": self.spilled_partitions,
+            "index_scans": self.index_scans,
+            "rows_fetched": self.rows_fetched,
+        }
+
+
+def batch_bytes(batch):
+    """Approximate size of a batch; object (string) columns count their items too."""
+    total = 0
+    for array in batch.values():
+        total += array.nbytes
+        if array.dtype == object:
+            total += len(array) * OBJECT_ITEM_BYTES
+    return total
+
+
+def slice_batch(batch, start, stop):
+    return {key: array[start:stop] for key, array in batch.items()}
+
+
+def concat_batches(batches, columns):
+    parts = {column: [] for column in columns}
+    for batch in batches:
+        for column in columns:
+            parts[column].append(batch[column])
+    return {column: np.concatenate(arrays) if arrays else np.empty(0, dtype=object)
+            for column, arrays in parts.items()}
+
+
+def rebatch(batches, context):
+    """
+    Coalesces the shrinking batches of filters and joins back into batches
+    of exactly batch_size rows (the last one may be shorter). At most one
+    batch worth of rows is buffered.
+    """
+    size, budget = context.batch_size, context.budget
+    pending, rows, held = [], 0, 0
+    try:
+        for batch in batches:
+            count = batch_rows(batch)
+            if not count:
+                continue
+            if not pending and count == size:
+                yield batch
+                continue
+            pending.append(batch)
+            rows += count
+            nbytes = batch_bytes(batch)
+            budget.reserve(nbytes)
+            held += nbytes
+            if rows < size:
+                continue
+            merged = concat_batches(pending, list(batch))
+            budget.release(held)
+            pending, held = [], 0
+            full = rows - rows % size
+            for start in range(0, full, size):
+                yield slice_batch(merged, start, start + size)
+            if full < rows:
+                pending = [slice_batch(merged, full, rows)]
+                held = batch_bytes(pending[0])
+                budget.reserve(held)
+            rows -= full
+        if pending:
+            yield concat_batches(pending, list(pending[0]))
+    finally:
+        budget.release(held)
+
+
+class SpillFile:
+    """Batches written to an anonymous temporary file and read back in order."""
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.batches = 0
+
+    def write(self, batch):
+        pickle.dump(batch, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.batches += 1
+
+    def read(self):
+        self.file.seek(0)
+        for _ in range(self.batches):
+            yield pickle.load(self.file)
+
+    def close(self):
+        self.file.close()
+
+
+def partition_ids(keys, partitions):
+    """
+    Partition of every join key. Numbers are hashed by their float64 value,
+    so an int key and an equal float key land in the same partition.
+    """
+    if keys.dtype.kind in "iufb":
+        hashes = (keys.astype(np.float64) + 0.0).view(np.uint64)   # + 0.0 turns -0.0 into 0.0
+    else:
+        hashes = np.fromiter(map(hash, keys.tolist()), dtype=np.int64, count=len(keys))
+        hashes = hashes.view(np.uint64)
+    with np.errstate(over="ignore"):
+        mixed = hashes * np.uint64(0x9E3779B97F4A7C15)
+    return (mixed >> np.uint64(40)) % np.uint64(partitions)
+
+
+def spill(batches, key, context):
+    """Hash-partitions batches on column `key` into SPILL_PARTITIONS spill files."""
+    files = [SpillFile() for _ in range(SPILL_PARTITIONS)]
+    context.spilled_partitions += len(files)
+    for batch in batches:
+        ids = partition_ids(batch[key], len(files))
+        for partition in np.unique(ids):
+            mask = ids == partition
+            files[int(partition)].write({column: array[mask] for column, array in batch.items()})
+    return files
+
+
+def materialize(node, context, key, columns):
+    """
+    Pulls an input into one batch of `columns` while it fits the memory
+    budget. Returns (batch, bytes reserved), or (None, spill files) with
+    the input hash-partitioned on `key` once it does not fit.
+    """
+    budget = context.budget
+    batches, reserved = [], 0
+    batches_in = decode_batches(pull(node, context), column_dictionaries(node, context.database))
+    source = ({column: batch[column] for column in columns} for batch in batches_in)
+    for batch in source:
+        nbytes = batch_bytes(batch)
+        if not budget.fits(nbytes):
+            budget.release(reserved)
+            return None, spill(itertools.chain(batches, [batch], source), key, context)
+        budget.reserve(nbytes)
+        reserved += nbytes
+        batches.append(batch)
+    return concat_batches(batches, columns), reserved
+
+
+def load_partition(spill_file, columns, context):
+    build = concat_batches(spill_file.read(), columns)
+    nbytes = batch_bytes(build)
+    if not context.budget.fits(nbytes):
+        raise MemoryError(f"Join partition of {nbytes} bytes exceeds the memory budget "
+                          f"of {context.budget.limit} bytes")
+    context.budget.reserve(nbytes)
+    return build, nbytes
+
+
+def run_scan(node, context, condition=None):
+    """
+    Reads the scanned columns batch by batch. Row groups whose zone maps
+    prove that no row can satisfy `condition` (the filter right above the
+    scan) are skipped without reading them. Index scans read only the rows
+    their index selects.
+    """
+    table = context.database.table(node.table)
+    columns = [(f"{node.table}.{column}", column)
+               for column in scan_columns(node, context.database)]
+    size = context.batch_size
+    if node.access is not None:
+        yield from run_index_scan(node, context, table, columns)
+        return
+    for group_start, group_stop, zones in table.row_groups():
+        if condition is not None and zones is not None and \
+                not row_group_may_match(condition, zones):
+            context.row_groups_skipped += 1
+            continue
+        context.row_groups_read += 1
+        for start in range(group_start, group_stop, size):
+            stop = min(start + size, group_stop)
+            context.batches_scanned += 1
+            # In-memory and numeric stored columns are read as views, copying nothing
+            yield {key: table.read(column, start, stop) for key, column in columns}
+
+
+def run_index_scan(node, context, table, columns):
+    access = node.access
+    index = context.database.index(node.table, access.column, access.index)
+    rows = index_rows(access, index)
+    context.index_scans += 1
+    context.rows_fetched += len(rows)
+    for start in range(0, len(rows), context.batch_size):
+        selected = rows[start:start + context.batch_size]
+        context.batches_scanned += 1
+        yield {key: table.take(column, selected) for key, column in columns}
+
+
+def run_filter(node, context):
+    database = context.database
+    predicate = compile_condition(node.condition, output_columns(node.input, database),
+                                  subquery_resolver(database),
+                                  column_dictionaries(node.input, database))
+
+    if node.input.operator == "Scan":
+        source = run_scan(node.input, context, node.condition)
+    else:
+        source = pull(node.input, context)
+
+    def filtered():
+        for batch in source:
+            mask = predicate(batch)
+            if mask.all():
+                yield batch
+            elif mask.any():
+                yield {key: array[mask] for key, array in batch.items()}
+
+    return rebatch(filtered(), context)
+
+
+def run_project(node, context):
+    names, keys = project_columns(node, context.database)
+    dictionaries = column_dictionaries(node.input, context.database)
+    for batch in pull(node.input, context):
+        yield {name: decode(dictionaries[key], batch[key]) if key in dictionaries else batch[key]
+               for name, key in zip(names, keys)}
+
+
+def join_keys(node, left_columns, right_columns):
+    """Left and right batch keys of each join predicate, whichever side they name first."""
+    left_keys, right_keys = [], []
+    for a, b in node.on:
+        try:
+            left, right = resolve_column(left_columns, a), resolve_column(right_columns, b)
+        except ValueError:
+            left, right = resolve_column(left_columns, b), resolve_column(right_columns, a)
+        left_keys.append(left)
+        right_keys.append(right)
+    return left_keys, right_keys
+
+
+def probe_join(build, right_keys, batches, left_keys, batch_size):
+    """
+    Vectorized equi-join of batches against an in-memory build side: the
+    build keys are sorted once, each batch is probed with searchsorted and
+    the matching row pairs are gathered with fancy indexing. Any further
+    predicates are applied as masks on the joined batch.
+    """
+    order = np.argsort(build[right_keys[0]], kind="stable")
+    sorted_keys = build[right_keys[0]][order]
+    for batch in batches:
+        probe = batch[left_keys[0]]
+        lo = np.searchsorted(sorted_keys, probe, "left")
+        counts = np.searchsorted(sorted_keys, probe, "right") - lo
+        total = int(counts.sum())
+        if not total:
+            continue
+        left_index = np.repeat(np.arange(len(probe)), counts)
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        right_index = order[starts + np.arange(total)]
+        joined = {key: array[left_index] for key, array in batch.items()}
+        joined.update((key, array[right_index]) for key, array in build.items())
+        if len(left_keys) > 1:
+            mask = np.logical_and.reduce([joined[a] == joined[b]
+                                          for a, b in zip(left_keys[1:], right_keys[1:])])
+            joined = {key: array[mask] for key, array in joined.items()}
+        for start in range(0, batch_rows(joined), batch_size):
+            yield slice_batch(joined, start, start + batch_size)
+
+
+def probe_semi_join(build, right_keys, batches, left_keys):
+    """
+    Vectorized semi-join: each batch is filtered with np.isin against the
+    distinct build keys, so every row is kept at most once. (np.isin
+    rejects non-matching rows at array speed, so the Bloom filter the
+    planner may push down is not needed here.)
+    """
+    if len(left_keys) == 1:
+        keys = np.unique(build[right_keys[0]])
+
+        def matches(batch):
+            return np.isin(batch[left_keys[0]], keys)
+    else:
+        keys = set(zip(*(build[key].tolist() for key in right_keys)))
+
+        def matches(batch):
+            probe = zip(*(batch[key].tolist() for key in left_keys))
+            return np.fromiter((row in keys for row in probe), dtype=bool,
+                               count=batch_rows(batch))
+
+    for batch in batches:
+        mask = matches(batch)
+        if mask.all():
+            yield batch
+        elif mask.any():
+            yield {key: array[mask] for key, array in batch.items()}
+
+
+def run_join(node, context):
+    """
+    Joins in memory when the build (right) side fits the memory budget.
+    Otherwise both sides are hash-partitioned to spill files and joined
+    one partition pair at a time (grace hash join), which changes the
+    order of the output rows but bounds memory by the largest partition.
+    """
+    database = context.database
+    left_columns = output_columns(node.left, database)
+    right_columns = output_columns(node.right, database)
+    left_keys, right_keys = join_keys(node, left_columns, right_columns)
+    build_columns = right_keys if node.operator == "SemiJoin" else right_columns
+
+    def probe(build, batches):
+        if node.operator == "SemiJoin":
+            return probe_semi_join(build, right_keys, batches, left_keys)
+        return probe_join(build, right_keys, batches, left_keys, context.batch_size)
+
+    # Join inputs are decoded: the two sides have different (or no) dictionaries
+    left_dictionaries = column_dictionaries(node.left, database)
+
+    def joined():
+        build, state = materialize(node.right, context, right_keys[0], build_columns)
+        probe_side = decode_batches(pull(node.left, context), left_dictionaries)
+        if build is not None:
+            try:
+                yield from probe(build, probe_side)
+            finally:
+                context.budget.release(state)
+            return
+
+        outer = spill(probe_side, left_keys[0], context)
+        try:
+            for build_file, probe_file in zip(state, outer):
+                build, reserved = load_partition(build_file, build_columns, context)
+                try:
+                    yield from probe(build, probe_file.read())
+                finally:
+                    context.budget.release(reserved)
+        finally:
+            for spill_file in state + outer:
+                spill_file.close()
+
+    return rebatch(joined(), context)
+
+
+def run_limit(node, context):
+    """Stops pulling (and so closes every upstream scan) once `count` rows are out."""
+    remaining = node.count
+    if remaining <= 0:
+        return
+    source = pull(node.input, context)
+    try:
+        for batch in source:
+            rows = batch_rows(batch)
+            if rows >= remaining:
+                yield slice_batch(batch, 0, remaining)
+                return
+            remaining -= rows
+            yield batch
+    finally:
+        source.close()
+
+
+OPERATORS = {
+    "Scan": run_scan,
+    "Filter": run_filter,
+    "Project": run_project,
+    "Join": run_join,
+    "SemiJoin": run_join,
+    "Limit": run_limit,
+}
+
+
+def pull(node, context):
+    """
+    The batches (dicts of column -> array) an operator produces. Operators
+    are generators pulling from their inputs, so a batch is only computed
+    when the consumer asks for it and nothing runs ahead of it.
+    """
+    return OPERATORS[node.operator](node, context)
+
+
+def run(node, database, batch_size=DEFAULT_BATCH_SIZE, memory_limit=None):
+    """Yields the batches of a plan (see app.plan) run against a Database."""
+    return pull(node, ExecutionContext(database, batch_size, memory_limit))
+
+
+class QueryResult:
+    """
+    The result of one statement, streamed as batches when iterated (once).
+    stats() reports the peak memory held by operator state, which is final
+    once the batches have been consumed.
+    """
+
+    def __init__(self, plan, context):
+        self.plan = plan
+        self.context = context
+        self.columns = output_columns(plan, context.database)
+
+    def __iter__(self):
+        return pull(self.plan, self.context)
+
+    @property
+    def peak_memory(self):
+        return self.context.budget.peak
+
+    def stats(self):
+        return self.context.stats()
+
+
+def execute_statement(stmt, database, batch_size=DEFAULT_BATCH_SIZE,
+                      memory_limit=DEFAULT_MEMORY_LIMIT):
+    """Runs one optimized SELECT."""
+    context = ExecutionContext(database, batch_size, memory_limit)
+    return QueryResult(build_plan(stmt, database.catalog), context)
+
+
+def execute(query, database=None, batch_size=DEFAULT_BATCH_SIZE,
+            memory_limit=DEFAULT_MEMORY_LIMIT):
+    """
+    Executes SQL text (or already optimized statements) against a columnar
+    Database. Returns one QueryResult per statement; iterating it yields
+    batches that map the selected column names to NumPy arrays.
+    """
+    database = database or Database()
+    if isinstance(query, str):
+        ast = parse(tokenize(query))
+        errors = validate(ast, database.catalog)
+        if errors:
+            raise ValueError("; ".join(errors))
+        query = optimize(ast, database.catalog)
+    return [execute_statement(stmt, database, batch_size, memory_limit) for stmt in query]
+
+
+def fetch_rows(batches):
+    """Materializes result batches as a list of row tuples."""
+    rows = []
+    for batch in batches:
+        rows.extend(zip(*(array.tolist() for array in batch.values())))
+    return rows
@@ -0,0 +1,107 @@
+# hashcons.py
+
+from app.ast_nodes import Condition, Expression, Logic, Subquery
+from app.utils import fold_tree
+
+COMPOSITE_TYPES = ("LOGIC", "CONDITION", "EXPRESSION", "SUBQUERY")
+
+
+def dag_children(node):
+    """Like condition_children, but also descends into a subquery's WHERE."""
+    node_type = getattr(node, "type", None)
+    if node_type == "LOGIC":
+        return node.conditions
+    if node_type == "CONDITION" or node_type == "EXPRESSION":
+        return (node.left, node.right)
+    if node_type == "SUBQUERY" and node.where is not None:
+        return (node.where,)
+    return ()
+
+
+class NodeTable:
+    """
+    Hash-consing table for condition, expression and subquery nodes: every
+    structurally identical subtree interned through the same table is
+    replaced by one shared canonical node, so equality of interned subtrees
+    is an identity check. Keys are shallow (a node's key refers to its
+    children by identity), so interning is O(1) per node.
+
+    Leaves (identifiers, literals, booleans) are compared by value but
+    never replaced, which keeps the literal objects the plan cache tracks.
+    Canonical nodes are shared and must not be mutated.
+    """
+
+    def __init__(self):
+        self.nodes = {}   # structural key -> canonical node
+        self.keys = {}    # id(canonical node) -> structural key
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def is_canonical(self, node):
+        return id(node) in self.keys
+
+    def child_key(self, node):
+        if node is None:
+            return None
+        if id(node) in self.keys:
+            return id(node)
+        return (node.type, getattr(node, "value", None))
+
+    def intern(self, root):
+        """Returns the canonical version of root; leaves are returned unchanged."""
+        if root is None or root.type not in COMPOSITE_TYPES:
+            return root
+        keys = self.keys
+        if id(root) in keys:
+            return root
+
+        def children(node):
+            return () if id(node) in keys else dag_children(node)
+
+        def combine(node, canonical_children):
+            if id(node) in keys or node.type not in COMPOSITE_TYPES:
+                return node
+            return self.lookup(rebuild(node, canonical_children))
+
+        return fold_tree(root, combine, children)
+
+    def lookup(self, node):
+        key = self.structural_key(node)
+        canonical = self.nodes.get(key)
+        if canonical is None:
+            canonical = self.nodes[key] = node
+            self.keys[id(node)] = key
+        return canonical
+
+    def structural_key(self, node):
+        child_key = self.child_key
+        if node.type == "LOGIC":
+            return ("LOGIC", node.op, tuple(child_key(c) for c in node.conditions))
+        if node.type == "SUBQUERY":
+            return ("SUBQUERY", tuple(node.columns), node.table, child_key(node.where))
+        return (node.type, node.op, child_key(node.left), child_key(node.right))
+
+
+def rebuild(node, children):
+    """node with its children replaced, or node itself if none changed."""
+    original = dag_children(node)
+    if all(a is b for a, b in zip(original, children)):
+        return node
+    if node.type == "LOGIC":
+        return Logic(node.op, list(children))
+    if node.type == "CONDITION":
+        return Condition(children[0], node.op, children[1])
+    if node.type == "EXPRESSION":
+        return Expression(node.op, children[0], children[1])
+    return Subquery(node.columns, node.table, children[0])
+
+
+def iter_subqueries(condition):
+    """Yields every SUBQUERY occurrence in a condition tree (shared ones repeatedly)."""
+    stack = [condition] if condition is not None else []
+    while stack:
+        node = stack.pop()
+        if getattr(node, "type", None) == "SUBQUERY":
+            yield node
+        stack.extend(dag_children(node))
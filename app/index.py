@@ -0,0 +1,80 @@
+# index.py
+
+import numpy as np
+
+EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+def present_rows(values):
+    """Row ids of the non-missing values (None in object columns, NaN in floats)."""
+    if values.dtype == object:
+        return np.flatnonzero(np.not_equal(values, None))
+    if values.dtype.kind == "f":
+        return np.flatnonzero(~np.isnan(values))
+    return np.arange(len(values))
+
+
+class SortedIndex:
+    """
+    A column's keys in sorted order with the row id of each. Equality and
+    range lookups are two binary searches; the matching row ids come back
+    in table order, so an index scan returns rows in the same order as a
+    full scan.
+    """
+
+    __slots__ = ("keys", "row_ids")
+    kind = "sorted"
+
+    def __init__(self, values):
+        row_ids = present_rows(values)
+        keys = values[row_ids]
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.row_ids = row_ids[order]
+
+    def range(self, low=None, high=None):
+        """Row ids with low <= key <= high; bounds are (value, inclusive) or None."""
+        lo = 0 if low is None else \
+            int(np.searchsorted(self.keys, low[0], "left" if low[1] else "right"))
+        hi = len(self.keys) if high is None else \
+            int(np.searchsorted(self.keys, high[0], "right" if high[1] else "left"))
+        if hi <= lo:
+            return EMPTY_ROWS
+        return np.sort(self.row_ids[lo:hi])
+
+    def lookup(self, value):
+        return self.range((value, True), (value, True))
+
+
+class HashIndex:
+    """A dict from each key to the ids of its rows, in table order. Equality only."""
+
+    __slots__ = ("buckets",)
+    kind = "hash"
+
+    def __init__(self, values):
+        row_ids = present_rows(values)
+        keys = values[row_ids]
+        order = np.argsort(keys, kind="stable")
+        distinct, starts = np.unique(keys[order], return_index=True)
+        stops = np.append(starts[1:], len(keys))
+        self.buckets = {key: row_ids[order[start:stop]]
+                        for key, start, stop in zip(distinct.tolist(), starts, stops)}
+
+    def lookup(self, value):
+        return self.buckets.get(value, EMPTY_ROWS)
+
+
+INDEXES = {"sorted": SortedIndex, "hash": HashIndex}
+
+
+def build_index(kind, values):
+    """Builds an index of a catalog index kind (see app.catalog.INDEX_KINDS) over a column."""
+    return INDEXES[kind](values)
+
+
+def index_rows(access, index):
+    """Row ids an IndexAccess (see app.plan) selects from its index."""
+    if access.path == "lookup":
+        return index.lookup(access.low[0])
+    return index.range(access.low, access.high)
@@ -1,116 +1,121 @@
-def generate_ir(ast):
+from app.ast_nodes import Logic
+from app.plan import build_plan
+from app.utils import fold_tree, logic_children
+
+
+def generate_ir(ast, catalog=None):
+    """
+    Builds the logical plan of every statement (see app.plan) and renders
+    it as relational algebra, one statement per line.
+    """
     ra_expressions = []
     for stmt in ast:
-        if stmt.get("type") == "SELECT":
-            where = stmt.get('where')
-            if where:
-                condition_str = condition_to_string(where)
-                ra = f"π[{', '.join(stmt['columns'])}] (σ[{condition_str}] ({stmt['table']}))"
-            else:
-                ra = f"π[{', '.join(stmt['columns'])}] ({stmt['table']})"
-            ra_expressions.append(ra)
+        if stmt.type == "SELECT":
+            ra_expressions.append(plan_to_string(build_plan(stmt, catalog)))
         else:
             raise ValueError("Only SELECT statements are supported in IR.")
     return "\n".join(ra_expressions)
 
 
-def generate_ir_select(stmt):
-    return {
-        "type": "SELECT",
-        "columns": stmt["columns"],
-        "table": stmt["table"],
-        "where": format_condition_ir(stmt["where"]) if stmt.get("where") else None
-    }
-
-
-def format_condition_ir(condition):
-    if condition is None:
-        return None
-
-    if condition.get("type") == "LOGIC":
-        return {
-            "type": "LOGIC",
-            "op": condition["op"],
-            "left": format_condition_ir(condition["left"]),
-            "right": format_condition_ir(condition["right"]),
-        }
-
-    if condition.get("type") == "CONDITION":
-        return {
-            "type": "CONDITION",
-            "left": condition["left"],
-            "op": condition["op"],
-            "right": condition["right"]
-        }
-
-    return {"type": "UNKNOWN_CONDITION", "content": condition}
+def plan_to_string(plan):
+    """
+    Renders a plan tree as relational algebra (π, σ, ⋈hash, ⋉hash_semi, ...)
+    followed by the estimated rows and cost of its root. Bloom filters
+    pushed down by semi-joins and index access paths are shown on the scan
+    they apply to; a bare table name is a full scan.
+    """
+    def render(node, children):
+        operator = node.operator
+        if operator == "Scan":
+            result = node.table
+            if node.access is not None:
+                result = f"{access_to_string(node.table, node.access)} ({result})"
+            for column, source in node.blooms:
+                result = f"bloom[{node.table}.{column} ∈ {source}] ({result})"
+            return result
+        if operator in ("Join", "SemiJoin"):
+            on = " AND ".join(f"{left} = {right}" for left, right in node.on)
+            symbol = "⋉" if operator == "SemiJoin" else "⋈"
+            return f"({children[0]} {symbol}{node.algorithm or ''}[{on}] {children[1]})"
+
+        child = children[0]
+        if node.input.operator not in ("Join", "SemiJoin"):
+            child = f"({child})"
+        if operator == "Filter":
+            return f"σ[{condition_to_string(node.condition)}] {child}"
+        if operator == "Project":
+            return f"π[{', '.join(node.columns)}] {child}"
+        return f"limit[{node.count}] {child}"
+
+    rendered = fold_tree(plan, render, lambda node: node.children())
+    return f"{rendered}  {{rows={plan.rows:.2f}, cost={plan.cost:.2f}}}"
+
+
+def access_to_string(table, access):
+    """index_lookup[users.id = 42] or index_range[20 <= users.age < 30] (index kind in braces)."""
+    column = f"{table}.{access.column}"
+    if access.path == "lookup":
+        return f"index_lookup{{{access.index}}}[{column} = {value_to_string(access.low[0])}]"
+    bounds = column
+    if access.low is not None:
+        bounds = f"{value_to_string(access.low[0])} {'<=' if access.low[1] else '<'} {bounds}"
+    if access.high is not None:
+        bounds = f"{bounds} {'<=' if access.high[1] else '<'} {value_to_string(access.high[0])}"
+    return f"index_range{{{access.index}}}[{bounds}]"
+
+
+def value_to_string(value):
+    return f"'{value}'" if isinstance(value, str) else str(value)
 
 
 def normalize_condition(condition):
     if condition is None:
         return None
 
-    if condition.get("type") == "LOGIC":
-        return {
-            "type": "LOGIC",
-            "op": condition["op"],
-            "left": normalize_condition(condition["left"]),
-            "right": normalize_condition(condition["right"]),
-        }
-
-    if "type" not in condition:
-        return {
-            "type": "CONDITION",
-            "left": condition["left"],
-            "op": condition["op"],
-            "right": condition["right"]
-        }
+    def normalize(node, children):
+        if node.type == "LOGIC":
+            return Logic(node.op, children)
+        return node
 
-    return condition
+    return fold_tree(condition, normalize, logic_children)
 
 
-def expression_to_string(expr):
-    if expr is None:
+def render_node(node, children):
+    """Renders one condition or expression node given its rendered children."""
+    if node is None:
         return "?"
 
-    expr_type = expr.get("type")
+    node_type = node.type
 
-    if expr_type in ("NUMBER", "STRING", "IDENTIFIER"):
-        return str(expr.get("value"))
+    if node_type in ("NUMBER", "STRING", "IDENTIFIER"):
+        return str(node.value)
 
-    if expr_type == "EXPRESSION":
-        left = expression_to_string(expr.get("left"))
-        right = expression_to_string(expr.get("right"))
-        op = expr.get("op")
-        return f"({left} {op} {right})"
+    if node_type == "EXPRESSION":
+        left, right = children
+        return f"({left} {node.op} {right})"
 
-    if expr_type == "SUBQUERY":
-        cols = ", ".join(expr["columns"])
-        table = expr["table"]
-        where_clause = f" WHERE {condition_to_string(expr['where'])}" if expr.get("where") else ""
-        return f"(SELECT {cols} FROM {table}{where_clause})"
+    if node_type == "CONDITION":
+        left, right = children
+        return f"{left} {node.op} {right}"
 
-    return "<unknown_expr>"
+    if node_type == "LOGIC":
+        return "(" + f" {node.op} ".join(children) + ")"
 
+    if node_type == "SUBQUERY":
+        cols = ", ".join(node.columns)
+        table = node.table
+        where_clause = f" WHERE {condition_to_string(node.where)}" if node.where else ""
+        return f"(SELECT {cols} FROM {table}{where_clause})"
 
-def condition_to_string(cond):
-    if cond is None:
-        return "?"
+    if node_type == "BOOLEAN":
+        return "TRUE" if node.value else "FALSE"
 
-    cond_type = cond.get("type")
+    return "<unknown_expr>"
 
-    if cond_type == "CONDITION":
-        left = expression_to_string(cond.get("left"))
-        right = expression_to_string(cond.get("right"))
-        op = cond.get("op", "?")
-        return f"{left} {op} {right}"
 
-    if cond_type == "LOGIC":
-        left_str = condition_to_string(cond["left"])
-        right_str = condition_to_string(cond["right"])
-        return f"({left_str} {cond['op']} {right_str})"
+def expression_to_string(expr):
+    return fold_tree(expr, render_node)
 
-    if cond_type == "BOOLEAN":
-        return "TRUE" if cond.get("value") else "FALSE"
 
-    return "<unknown condition>"
+def condition_to_string(cond):
+    return fold_tree(cond, render_node)
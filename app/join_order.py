@@ -0,0 +1,313 @@
+# join_order.py
+
+import math
+
+from app.cost import DEFAULT_ROW_COUNT
+
+# Up to this many relations the optimal order is found by dynamic programming
+# over connected subsets; larger joins use greedy operator ordering (GOO)
+JOIN_DP_THRESHOLD = 10
+
+# Distinct values assumed for a join column without statistics (PostgreSQL default)
+DEFAULT_DISTINCT = 200
+
+# Per-row costs of the join algorithms, in units of one comparison
+HASH_BUILD_COST = 2.0
+HASH_PROBE_COST = 1.0
+NESTED_LOOP_COST = 1.0
+MERGE_COST = 1.0
+SORT_COST = 1.0
+
+# A Bloom filter test during the outer scan, and the filter's false-positive rate
+BLOOM_PROBE_COST = 0.25
+BLOOM_ERROR_RATE = 0.01
+
+
+class Relation:
+    """
+    One join input: a base table scan with its local filter already applied.
+    `rows` is the estimated output of that filtered scan, `scanned` the rows
+    read to produce it and `distinct` maps join columns to distinct counts.
+    """
+
+    __slots__ = ("name", "rows", "scanned", "distinct")
+
+    def __init__(self, name, rows, scanned=None, distinct=None):
+        self.name = name
+        self.rows = rows
+        self.scanned = rows if scanned is None else scanned
+        self.distinct = distinct or {}
+
+    def column_distinct(self, column):
+        distinct = self.distinct.get(column) or DEFAULT_DISTINCT
+        return max(1.0, min(distinct, self.rows))
+
+
+class JoinEdge:
+    """
+    An equi-join predicate relations[left].left_column = relations[right].right_column.
+    A semi edge only keeps the left rows that have a match on the right
+    (`left_column IN (SELECT right_column ...)`); right columns are not output.
+    """
+
+    __slots__ = ("left", "left_column", "right", "right_column", "semi")
+
+    def __init__(self, left, left_column, right, right_column, semi=False):
+        self.left = left
+        self.left_column = left_column
+        self.right = right
+        self.right_column = right_column
+        self.semi = semi
+
+
+class JoinPlan:
+    """
+    A node of a join tree. Leaves have `relation` set to the index of their
+    Relation; inner nodes join `left` and `right` with `algorithm` on
+    `edges`. `rows` and `cost` are cumulative estimates for the subtree.
+    Semi-joins keep the outer input on the left; `bloom` is set when a Bloom
+    filter over their distinct build keys is pushed into the outer scan.
+    """
+
+    __slots__ = ("mask", "rows", "cost", "relation", "left", "right", "algorithm", "edges",
+                 "bloom")
+
+    def __init__(self, mask, rows, cost, relation=None, left=None, right=None,
+                 algorithm=None, edges=(), bloom=False):
+        self.mask = mask
+        self.rows = rows
+        self.cost = cost
+        self.relation = relation
+        self.left = left
+        self.right = right
+        self.algorithm = algorithm
+        self.edges = edges
+        self.bloom = bloom
+
+    @property
+    def semi(self):
+        return bool(self.edges) and self.edges[0].semi
+
+    def leaves(self):
+        """Relation indexes in left-to-right order."""
+        result = []
+        stack = [self]
+        while stack:
+            plan = stack.pop()
+            if plan.relation is not None:
+                result.append(plan.relation)
+            else:
+                stack.append(plan.right)
+                stack.append(plan.left)
+        return result
+
+    def algorithms(self):
+        """Join algorithms in pre-order, with "+bloom" on semi-joins that push one."""
+        result = []
+        stack = [self]
+        while stack:
+            plan = stack.pop()
+            if plan.relation is None:
+                result.append(plan.algorithm + ("+bloom" if plan.bloom else ""))
+                stack.append(plan.right)
+                stack.append(plan.left)
+        return result
+
+
+def renumber(plan, mapping):
+    """Rewrites the relation indexes of a plan (and of its edges) through mapping."""
+    nodes = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        if node.relation is None:
+            stack.extend((node.left, node.right))
+    for node in reversed(nodes):  # children before their parents
+        if node.relation is not None:
+            node.relation = mapping[node.relation]
+            node.mask = 1 << node.relation
+        else:
+            for edge in node.edges:
+                edge.left, edge.right = mapping[edge.left], mapping[edge.right]
+            node.mask = node.left.mask | node.right.mask
+    return plan
+
+
+def scan_plan(index, relation):
+    return JoinPlan(1 << index, relation.rows, relation.scanned, relation=index)
+
+
+def join_algorithm(left_rows, right_rows, equi):
+    """(algorithm, cost) of the cheapest way to join inputs of the given sizes."""
+    candidates = [("nested_loop", left_rows * right_rows * NESTED_LOOP_COST)]
+    if equi:
+        build, probe = sorted((left_rows, right_rows))
+        candidates.append(("hash", build * HASH_BUILD_COST + probe * HASH_PROBE_COST))
+        sort = sum(n * math.log2(n) * SORT_COST for n in (left_rows, right_rows) if n > 1)
+        candidates.append(("merge", sort + (left_rows + right_rows) * MERGE_COST))
+    return min(candidates, key=lambda candidate: candidate[1])
+
+
+def semi_join_algorithm(outer_rows, inner_rows, matching):
+    """
+    (algorithm, cost, bloom) of the cheapest semi-join. The hash variant
+    builds a set of the distinct inner keys; with a Bloom filter over
+    them pushed into the outer scan, rejected rows skip the probe.
+    """
+    build = inner_rows * HASH_BUILD_COST
+    passing = matching + (outer_rows - matching) * BLOOM_ERROR_RATE
+    candidates = [
+        ("nested_loop_semi", outer_rows * inner_rows * NESTED_LOOP_COST, False),
+        ("hash_semi", build + outer_rows * HASH_PROBE_COST, False),
+        ("hash_semi", build + outer_rows * BLOOM_PROBE_COST + passing * HASH_PROBE_COST, True),
+    ]
+    return min(candidates, key=lambda candidate: candidate[1])
+
+
+def semi_join_plan(outer, inner, connecting, relations):
+    """JoinPlan of outer ⋉ inner, or None if inner is not the build side of the edges."""
+    if inner.relation is None or any(
+            edge.right != inner.relation or not outer.mask >> edge.left & 1 for edge in connecting):
+        return None
+    rows = outer.rows
+    for edge in connecting:
+        # Fraction of outer keys expected to find a match among the distinct inner keys
+        rows *= min(1.0, relations[edge.right].column_distinct(edge.right_column)
+                    / relations[edge.left].column_distinct(edge.left_column))
+    algorithm, cost, bloom = semi_join_algorithm(outer.rows, inner.rows, rows)
+    return JoinPlan(outer.mask | inner.mask, rows, outer.cost + inner.cost + cost,
+                    left=outer, right=inner, algorithm=algorithm, edges=tuple(connecting),
+                    bloom=bloom)
+
+
+def join_plans(left, right, relations, edges):
+    """The cheapest JoinPlan joining two disjoint subplans, or None if they cannot be joined."""
+    connecting = [
+        edge for edge in edges
+        if (left.mask >> edge.left & 1 and right.mask >> edge.right & 1)
+        or (left.mask >> edge.right & 1 and right.mask >> edge.left & 1)
+    ]
+    if any(edge.semi for edge in connecting):
+        if not all(edge.semi for edge in connecting):
+            return None
+        return semi_join_plan(left, right, connecting, relations) or \
+            semi_join_plan(right, left, connecting, relations)
+
+    rows = left.rows * right.rows
+    for edge in connecting:
+        rows /= max(relations[edge.left].column_distinct(edge.left_column),
+                    relations[edge.right].column_distinct(edge.right_column))
+    algorithm, cost = join_algorithm(left.rows, right.rows, bool(connecting))
+    # Keep the smaller input on the left, which is the build side of a hash join
+    if right.rows < left.rows:
+        left, right = right, left
+    return JoinPlan(left.mask | right.mask, rows, left.cost + right.cost + cost,
+                    left=left, right=right, algorithm=algorithm, edges=tuple(connecting))
+
+
+def is_connected(mask, adjacency):
+    seen = frontier = mask & -mask
+    while frontier:
+        bit = frontier & -frontier
+        frontier ^= bit
+        new = adjacency[bit.bit_length() - 1] & mask & ~seen
+        seen |= new
+        frontier |= new
+    return seen == mask
+
+
+def dp_join_order(relations, edges):
+    """
+    Optimal bushy join tree by dynamic programming over connected subsets
+    (cross products are only introduced if the join graph is disconnected).
+    """
+    n = len(relations)
+    adjacency = [0] * n
+    for edge in edges:
+        adjacency[edge.left] |= 1 << edge.right
+        adjacency[edge.right] |= 1 << edge.left
+
+    best = {1 << i: scan_plan(i, relation) for i, relation in enumerate(relations)}
+    for mask in sorted(range(1, 1 << n), key=lambda m: bin(m).count("1")):
+        if mask in best or not is_connected(mask, adjacency):
+            continue
+        low = mask & -mask
+        sub = (mask - 1) & mask
+        while sub:
+            # Each split is visited once: the side holding the lowest bit is `left`
+            if sub & low:
+                left, right = best.get(sub), best.get(mask ^ sub)
+                if left is not None and right is not None:
+                    plan = join_plans(left, right, relations, edges)
+                    if plan is not None and plan.edges and (
+                            mask not in best or plan.cost < best[mask].cost):
+                        best[mask] = plan
+            sub = (sub - 1) & mask
+
+    full = (1 << n) - 1
+    if full in best:
+        return best[full]
+    # Disconnected join graph: cross-join the best plans of its components
+    components = []
+    remaining = full
+    while remaining:
+        component = reachable(remaining & -remaining, adjacency)
+        components.append(best[component])
+        remaining &= ~component
+    return greedy_join_order(relations, edges, components)
+
+
+def reachable(mask, adjacency):
+    """mask extended by every relation reachable from it over join edges."""
+    seen = frontier = mask
+    while frontier:
+        bit = frontier & -frontier
+        frontier ^= bit
+        new = adjacency[bit.bit_length() - 1] & ~seen
+        seen |= new
+        frontier |= new
+    return seen
+
+
+def greedy_join_order(relations, edges, plans=None):
+    """
+    Greedy operator ordering: repeatedly joins the two subplans whose join
+    produces the fewest rows, preferring pairs connected by a join edge.
+    """
+    plans = list(plans) if plans is not None else [
+        scan_plan(i, relation) for i, relation in enumerate(relations)]
+    while len(plans) > 1:
+        best = None
+        for i in range(len(plans)):
+            for j in range(i + 1, len(plans)):
+                plan = join_plans(plans[i], plans[j], relations, edges)
+                if plan is None:
+                    continue
+                key = (not plan.edges, plan.rows, plan.cost)
+                if best is None or key < best[0]:
+                    best = (key, i, j, plan)
+        _, i, j, plan = best
+        plans = [p for k, p in enumerate(plans) if k not in (i, j)] + [plan]
+    return plans[0]
+
+
+def choose_join_order(relations, edges, threshold=JOIN_DP_THRESHOLD):
+    """Returns (plan, method) where method is "dp" or "greedy"."""
+    if len(relations) <= threshold:
+        return dp_join_order(relations, edges), "dp"
+    return greedy_join_order(relations, edges), "greedy"
+
+
+def relation_for(name, table_info, selectivity=1.0, columns=()):
+    """A Relation for a filtered scan of a catalog table."""
+    scanned = DEFAULT_ROW_COUNT
+    if table_info is not None and table_info.stats is not None:
+        scanned = table_info.stats.row_count
+    distinct = {}
+    for column in columns:
+        stats = table_info.column_stats(column) if table_info is not None else None
+        if stats is not None and stats.distinct:
+            # Filtering can only lower the number of distinct values
+            distinct[column] = min(stats.distinct, max(1.0, scanned * selectivity))
+    return Relation(name, max(1.0, scanned * selectivity), scanned, distinct)
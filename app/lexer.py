@@ -1,4 +1,6 @@
 import re
+from array import array
+from collections import namedtuple
 
 # Define token patterns
 TOKEN_SPECIFICATION = [
@@ -9,6 +11,7 @@ TOKEN_SPECIFICATION = [
     ('OR',           r'\bOR\b'),
     ('NOT',          r'\bNOT\b'),
     ('IN',           r'\bIN\b'),
+    ('LIMIT',        r'\bLIMIT\b'),
     ('NUMBER',       r'\b\d+(\.\d+)?\b'),
     ('STRING',       r"'[^']*'"),
     ('ASTERISK',     r'\*'),
@@ -32,25 +35,94 @@ TOKEN_SPECIFICATION = [
 ]
 
 # SQL keywords to capitalize in token values
-SQL_KEYWORDS = {'SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'NOT', 'IN'}
+SQL_KEYWORDS = {'SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'NOT', 'IN', 'LIMIT'}
 
-def tokenize(code):
-    tokens = []
-    regex_parts = [f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPECIFICATION]
-    regex = re.compile('|'.join(regex_parts), re.IGNORECASE)
+# Compiled once at import time and shared by every tokenize() call
+TOKEN_REGEX = re.compile(
+    '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPECIFICATION),
+    re.IGNORECASE,
+)
+
+# A token with its [start, end) offsets into the source text
+Token = namedtuple("Token", ["kind", "value", "start", "end"])
+
+# One-byte codes for every kind the lexer can emit (SKIP/MISMATCH never are)
+TOKEN_KINDS = tuple(name for name, _ in TOKEN_SPECIFICATION if name not in ('SKIP', 'MISMATCH'))
+KIND_CODES = {kind: code for code, kind in enumerate(TOKEN_KINDS)}
 
-    for match in regex.finditer(code):
+
+def iter_tokens(code):
+    """
+    Lazily yields Token(kind, value, start, end) tuples from the source text.
+    Nothing is buffered, so arbitrarily large scripts can be streamed into the parser.
+    """
+    for match in TOKEN_REGEX.finditer(code):
         kind = match.lastgroup
         value = match.group()
 
         if kind == 'SKIP':
             continue
         elif kind == 'MISMATCH':
-            raise SyntaxError(f"Unexpected character: {value}")
+            raise SyntaxError(f"Unexpected character: {value} at offset {match.start()}")
+        elif kind in SQL_KEYWORDS:
+            yield Token(kind, value.upper(), match.start(), match.end())
         else:
-            if kind.upper() in SQL_KEYWORDS:
-                tokens.append((kind.upper(), value.upper()))
-            else:
-                tokens.append((kind.upper(), value))
+            yield Token(kind, value, match.start(), match.end())
+
+
+def tokenize(code):
+    return [(token.kind, token.value) for token in iter_tokens(code)]
+
+
+class TokenBuffer:
+    """
+    Compact token storage: one byte of kind code and two 32-bit offsets per
+    token (9 bytes) instead of a tuple plus a copied substring. Values are
+    sliced from the source text only when a token is actually read.
+    """
+
+    __slots__ = ("source", "kinds", "starts", "ends")
 
-    return tokens
+    def __init__(self, source):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        start = self.starts[index]
+        end = self.ends[index]
+        kind = TOKEN_KINDS[self.kinds[index]]
+        value = self.source[start:end]
+        if kind in SQL_KEYWORDS:
+            value = value.upper()
+        return Token(kind, value, start, end)
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def kind(self, index):
+        return TOKEN_KINDS[self.kinds[index]]
+
+    def as_tuples(self):
+        """The (kind, value) list that tokenize() returns, for older consumers."""
+        return [(token.kind, token.value) for token in self]
+
+
+def tokenize_compact(code):
+    buffer = TokenBuffer(code)
+    kinds, starts, ends = buffer.kinds, buffer.starts, buffer.ends
+    for match in TOKEN_REGEX.finditer(code):
+        kind = match.lastgroup
+        if kind == 'SKIP':
+            continue
+        if kind == 'MISMATCH':
+            raise SyntaxError(f"Unexpected character: {match.group()} at offset {match.start()}")
+        kinds.append(KIND_CODES[kind])
+        starts.append(match.start())
+        ends.append(match.end())
+    return buffer
@@ -1,229 +1,621 @@
-def optimize(ast):
+from app.ast_nodes import Boolean, Condition, Identifier, Logic, Node, SemiJoin, Subquery
+from app.cost import (
+    column_predicate, combine_estimates, estimate_condition, estimate_predicate,
+    order_operands, table_rows
+)
+from app.evaluator import ConstantFolder
+from app.hashcons import NodeTable, iter_subqueries
+from app.ir_generator import expression_to_string
+from app.join_order import JOIN_DP_THRESHOLD, JoinEdge, choose_join_order, relation_for, renumber
+from app.rules import DEFAULT_BUDGET, Rule, RuleEngine
+from app.semantic import CATALOG
+from app.utils import condition_children, fold_tree, logic_children
+
+
+def optimize(ast, catalog=None):
+    """
+    Optimizes a batch of statements. Their conditions are hash-consed in
+    one NodeTable, so identical predicates and subqueries are shared
+    across the whole batch and repeated subqueries are reported.
+    """
+    catalog = catalog or CATALOG
+    nodes = NodeTable()
+    subquery_owners = {}  # id(canonical subquery) -> number of the first statement using it
     optimized_ast = []
-    for stmt in ast:
-        if stmt.get("type") == "SELECT":
-            stmt["optimization_log"] = []
-            stmt["where"] = normalize_condition(stmt.get("where"))
-            stmt = optimize_select(stmt)
+    for number, stmt in enumerate(ast, start=1):
+        if stmt.type == "SELECT":
+            stmt.optimization_log = []
+            stmt.where = nodes.intern(normalize_condition(stmt.where))
+            log_repeated_subqueries(stmt, number, subquery_owners)
+            stmt = optimize_select(stmt, catalog, nodes=nodes)
             optimized_ast.append(stmt)
         else:
             raise ValueError(f"Unsupported statement type: {stmt}")
     return optimized_ast
 
 
-def optimize_select(stmt):
-    # Remove duplicate columns (except '*')
-    if "*" not in stmt["columns"]:
-        original_len = len(stmt["columns"])
-        stmt["columns"] = list(dict.fromkeys(stmt["columns"]))  # preserves order
-        if len(stmt["columns"]) < original_len:
-            stmt["optimization_log"].append("Removed duplicate columns")
+def log_repeated_subqueries(stmt, number, owners):
+    counts = {}
+    for sub in iter_subqueries(stmt.where):
+        counts[id(sub)] = counts.get(id(sub), 0) + 1
+        if counts[id(sub)] == 2:
+            stmt.optimization_log.append(
+                f"Repeated subquery shared as one node: {expression_to_string(sub)}")
+        if counts[id(sub)] == 1:
+            owner = owners.setdefault(id(sub), (number, sub))[0]
+            if owner != number:
+                stmt.optimization_log.append(
+                    f"Subquery shared with statement {owner}: {expression_to_string(sub)}")
+
+
+def optimize_select(stmt, catalog=None, budget=DEFAULT_BUDGET, nodes=None):
+    table_info = (catalog or CATALOG).table(stmt.table)
+
+    engine = RuleEngine(REWRITE_RULES, budget)
+    context = RewriteContext(table_info, stmt.optimization_log, nodes)
+    engine.run(stmt, context)
+
+    if stmt.where is not None and stmt.where.type == "BOOLEAN" and not stmt.where.value:
+        stmt.optimization_log.append("WHERE clause is always FALSE, table scan can be skipped")
+    if stmt.where:
+        log_estimate(stmt, table_info)
+    if stmt.joins:
+        order_joins(stmt, catalog or CATALOG, context)
+    prune_columns(stmt, catalog or CATALOG, table_info)
+    engine.report(stmt.optimization_log)
+
+    return stmt
+
+
+class RewriteContext:
+    """State shared by the rewrite rules while one statement is optimized."""
+
+    def __init__(self, table_info=None, log=None, nodes=None):
+        self.table_info = table_info
+        self.log = log if log is not None else []
+        self.nodes = nodes if nodes is not None else NodeTable()
+        self.folder = ConstantFolder()
+        self.estimates = {}  # id(node) -> (node, selectivity, cost)
+
+    def estimate(self, node):
+        """(node, selectivity, cost) of a condition, memoized per subtree."""
+        estimates = self.estimates
+        cached = estimates.get(id(node))
+        if cached is not None:
+            return cached
+        if node.type != "LOGIC":
+            cached = estimates[id(node)] = (node,) + estimate_predicate(node, self.table_info)
+            return cached
+
+        def children(n):
+            return () if id(n) in estimates else logic_children(n)
+
+        def combine(n, operands):
+            cached = estimates.get(id(n))
+            if cached is None:
+                if n.type == "LOGIC":
+                    cached = (n,) + combine_estimates(n.op, operands)
+                else:
+                    cached = (n,) + estimate_predicate(n, self.table_info)
+                estimates[id(n)] = cached
+            return cached
+
+        return fold_tree(node, combine, children)
+
+
+def make_logic(op, conditions):
+    """Builds a LOGIC node, flattening operands that use the same operator."""
+    flat = []
+    for cond in conditions:
+        if cond.type == "LOGIC" and cond.op == op:
+            flat.extend(cond.conditions)
+        else:
+            flat.append(cond)
+    return Logic(op, flat)
+
+
+def is_logic(node):
+    return node.type == "LOGIC"
+
+
+def is_conjunction(node):
+    return node.type == "LOGIC" and node.op == "AND"
+
+
+def is_comparison_or_arithmetic(node):
+    return node.type in ("CONDITION", "EXPRESSION")
+
+
+def has_nested_same_op(node):
+    return node.type == "LOGIC" and any(
+        c.type == "LOGIC" and c.op == node.op for c in node.conditions)
+
+
+def has_boolean_operand(node):
+    return node.type == "LOGIC" and any(c.type == "BOOLEAN" for c in node.conditions)
 
-    # Reorder and simplify WHERE clause
-    if stmt.get("where"):
-        stmt["where"] = reorder_conditions(stmt["where"])
-        stmt["where"] = constant_fold(stmt["where"])
-        stmt["where"] = eliminate_redundant_condition(stmt["where"])
 
-    # Subquery-to-Join optimization
-    if stmt.get("where") and isinstance(stmt["where"], dict) and stmt["where"].get("op") == "IN":
-        if isinstance(stmt["where"].get("right"), dict) and stmt["where"]["right"].get("type") == "SUBQUERY":
-            stmt = convert_in_subquery_to_join(stmt)
+def flatten_logic(node, context):
+    return make_logic(node.op, node.conditions)
 
+
+def dedupe_operands(node, context):
+    """Drops repeated operands of an AND/OR (x AND x -> x), comparing interned nodes."""
+    unique = {}
+    for cond in node.conditions:
+        canonical = context.nodes.intern(cond)
+        unique.setdefault(id(canonical), canonical)
+    if len(unique) == len(node.conditions) and all(
+            a is b for a, b in zip(unique.values(), node.conditions)):
+        return None
+    removed = len(node.conditions) - len(unique)
+    if removed:
+        context.log.append(f"Removed {removed} duplicate predicate(s)")
+    if len(unique) == 1:
+        return next(iter(unique.values()))
+    return Logic(node.op, list(unique.values()))
+
+
+def fold_constants(node, context):
+    folded = context.folder.fold_node(node, (node.left, node.right))
+    return None if folded is node else folded
+
+
+def merge_ranges(node, context):
+    return simplify_conjunction(node.conditions, context.log)
+
+
+def eliminate_booleans(node, context):
+    """Drops TRUE/FALSE operands that cannot change the result of an AND/OR."""
+    absorbing = node.op == "OR"   # TRUE absorbs an OR, FALSE an AND
+    remaining = []
+    for cond in node.conditions:
+        if cond.type == "BOOLEAN":
+            if cond.value is absorbing:
+                return Boolean(absorbing)
+        else:
+            remaining.append(cond)
+    if not remaining:
+        return Boolean(not absorbing)
+    if len(remaining) == 1:
+        return remaining[0]
+    return Logic(node.op, remaining)
+
+
+def reorder_by_cost(node, context):
+    """
+    Orders the operands of an AND/OR by selectivity and evaluation cost
+    (see cost.order_operands), so short-circuit evaluation rejects or
+    accepts rows as cheaply as possible. Selectivities come from the
+    table's statistics when it has been analyzed, else textbook defaults.
+    """
+    ordered = order_operands(node.op, [context.estimate(c) for c in node.conditions])
+    if all(item[0] is c for item, c in zip(ordered, node.conditions)):
+        return None
+    return Logic(node.op, [item[0] for item in ordered])
+
+
+def has_duplicate_columns(stmt):
+    return "*" not in stmt.columns and len(set(stmt.columns)) < len(stmt.columns)
+
+
+def dedupe_columns(stmt, context):
+    stmt.columns = list(dict.fromkeys(stmt.columns))  # preserves order
+    context.log.append("Removed duplicate columns")
     return stmt
 
 
-def reorder_conditions(condition):
-    if not isinstance(condition, dict) or condition.get("type") != "LOGIC":
-        return condition
+def is_true_where(stmt):
+    return stmt.where is not None and stmt.where.type == "BOOLEAN" and stmt.where.value
 
-    left = reorder_conditions(condition["left"])
-    right = reorder_conditions(condition["right"])
-
-    def condition_cost(cond):
-        if cond.get("type") != "CONDITION":
-            return 3
-        left_val = cond.get("left", {}).get("value", "")
-        right_val = cond.get("right", {}).get("value", "")
-        if str(left_val).isdigit() and str(right_val).isdigit():
-            return 1
-        elif str(right_val).isdigit():
-            return 1
-        return 2
-
-    if condition_cost(left) > condition_cost(right):
-        left, right = right, left
-
-    return {
-        "type": "LOGIC",
-        "op": condition["op"],
-        "left": left,
-        "right": right
-    }
-
-
-def constant_fold(condition):
-    if not isinstance(condition, dict):
-        return condition
 
-    if condition.get("type") == "CONDITION":
-        try:
-            left = condition.get("left")
-            right = condition.get("right")
-            if all(side.get("type") == "NUMBER" for side in [left, right]):
-                result = eval(f"{left['value']} {condition['op']} {right['value']}")
-                return {"type": "BOOLEAN", "value": result}
-        except:
-            pass
-        return condition
+def drop_true_where(stmt, context):
+    stmt.where = None
+    return stmt
 
-    elif condition.get("type") == "LOGIC":
-        condition["left"] = constant_fold(condition["left"])
-        condition["right"] = constant_fold(condition["right"])
-        return condition
 
-    return condition
+def is_in_subquery_where(stmt):
+    return bool(in_subquery_conjuncts(stmt.where))
+
 
+def is_wide_in_subquery(node):
+    return (node.op == "IN" and node.right.type == "SUBQUERY"
+            and len(node.right.columns) > 1 and "*" not in node.right.columns)
 
-def eliminate_redundant_condition(condition):
-    if not isinstance(condition, dict):
+
+def prune_subquery_columns(node, context):
+    """IN only compares against the first column a subquery projects."""
+    sub = node.right
+    context.log.append(f"Pruned subquery on {sub.table} to column {sub.columns[0]}")
+    return Condition(node.left, node.op, Subquery(sub.columns[:1], sub.table, sub.where))
+
+
+def in_subquery_to_semi_join(stmt, context):
+    return convert_in_subquery_to_semi_join(stmt)
+
+
+# Applied in this order at every node until none of them fires
+REWRITE_RULES = [
+    Rule("dedupe_columns", has_duplicate_columns, dedupe_columns, scope="statement"),
+    Rule("drop_true_where", is_true_where, drop_true_where, scope="statement"),
+    Rule("in_subquery_to_semi_join", is_in_subquery_where, in_subquery_to_semi_join,
+         scope="statement"),
+    Rule("flatten_logic", has_nested_same_op, flatten_logic, types=("LOGIC",)),
+    Rule("dedupe_operands", is_logic, dedupe_operands, types=("LOGIC",)),
+    Rule("fold_constants", is_comparison_or_arithmetic, fold_constants,
+         types=("CONDITION", "EXPRESSION")),
+    Rule("prune_subquery_columns", is_wide_in_subquery, prune_subquery_columns,
+         types=("CONDITION",)),
+    Rule("eliminate_booleans", has_boolean_operand, eliminate_booleans, types=("LOGIC",)),
+    Rule("merge_ranges", is_conjunction, merge_ranges, types=("LOGIC",)),
+    Rule("reorder_by_cost", is_logic, reorder_by_cost, types=("LOGIC",)),
+]
+
+
+def reorder_conditions(condition, table_info=None):
+    """Cost-based operand ordering of a whole condition tree (see reorder_by_cost)."""
+    if not isinstance(condition, Node) or condition.type != "LOGIC":
+        return condition
+    context = RewriteContext(table_info)
+
+    def reorder(node, children):
+        if node.type != "LOGIC":
+            return node
+        node = Logic(node.op, children)
+        return reorder_by_cost(node, context) or node
+
+    return fold_tree(condition, reorder, logic_children)
+
+
+def log_estimate(stmt, table_info):
+    selectivity, cost = estimate_condition(stmt.where, table_info)
+    rows, analyzed = table_rows(table_info)
+    source = "statistics" if analyzed else "default estimates"
+    stmt.optimization_log.append(
+        f"Estimated {selectivity * rows:.2f} of {rows} rows from {stmt.table} "
+        f"(selectivity {selectivity:.4g}, predicate cost {cost:.2f} per row, {source})"
+    )
+
+
+def constant_fold(condition, folder=None):
+    """
+    Evaluates arithmetic and comparisons whose operands are all literals
+    (age > 10 + 5 -> age > 15, 1 = 2 -> FALSE). Pass the same ConstantFolder
+    to reuse its cache of already folded subtrees.
+    """
+    if not isinstance(condition, Node):
         return condition
+    return (folder or ConstantFolder()).fold(condition)
 
-    if condition.get("type") == "BOOLEAN":
-        if condition["value"] is True:
-            return None
-        else:
-            return {"type": "BOOLEAN", "value": False}
-
-    if condition.get("type") == "CONDITION":
-        l = condition.get("left", {})
-        r = condition.get("right", {})
-        if (
-            l.get("type") == "NUMBER" and l.get("value") == "1"
-            and r.get("type") == "NUMBER" and r.get("value") == "1"
-            and condition.get("op") == "="
-        ):
-            return None
 
-    if condition.get("type") == "LOGIC":
-        left = eliminate_redundant_condition(condition["left"])
-        right = eliminate_redundant_condition(condition["right"])
+RANGE_OPS = ("=", "!=", "<", "<=", ">", ">=")
 
-        if left is None:
-            return right
-        if right is None:
-            return left
-        return {
-            "type": "LOGIC",
-            "op": condition["op"],
-            "left": left,
-            "right": right
-        }
 
-    return condition
+def simplify_ranges(condition, log=None):
+    """
+    Within every AND, merges the `column op literal` predicates of each
+    column into one interval: implied bounds are dropped (age > 20 AND
+    age > 30 -> age > 30), equal bounds become an equality, and an empty
+    interval turns the conjunction into FALSE so the scan can be skipped.
+    """
+    if not isinstance(condition, Node):
+        return condition
 
+    def simplify(node, children):
+        if node.type != "LOGIC":
+            return node
+        if node.op != "AND":
+            return make_logic(node.op, children)
+        return simplify_conjunction(children, log) or make_logic("AND", children)
+
+    return fold_tree(condition, simplify, logic_children)
+
+
+def simplify_conjunction(conjuncts, log=None):
+    """
+    The merged form of an AND's operands (see simplify_ranges), or None if
+    no predicate could be merged. Operands keep their relative order.
+    """
+    groups = {}
+    for cond in conjuncts:
+        predicate = None
+        if cond.type == "CONDITION" and cond.op in RANGE_OPS:
+            predicate = column_predicate(cond)
+        if predicate is not None and predicate[2] is not None:
+            column, op, value = predicate
+            groups.setdefault(column, []).append((op, value, cond))
+
+    replaced = {}  # id(first condition of a merged column) -> its merged conditions
+    dropped = set()
+    for column, predicates in groups.items():
+        if len(predicates) < 2:
+            continue
+        try:
+            merged = merge_column_predicates(column, predicates)
+        except TypeError:
+            # Values of different types cannot be ordered; leave them alone
+            continue
+        if merged is None:
+            if log is not None:
+                log.append(f"Contradictory predicates on {column}: conjunction is always FALSE")
+            return Boolean(False)
+        originals = [cond for _, _, cond in predicates]
+        if len(merged) == len(originals) and {id(c) for c in merged} == {id(c) for c in originals}:
+            continue
+        if log is not None and len(merged) < len(predicates):
+            log.append(f"Removed {len(predicates) - len(merged)} implied predicate(s) on {column}")
+        replaced[id(originals[0])] = merged
+        dropped.update(id(c) for c in originals[1:])
+
+    if not replaced:
+        return None
+    result = []
+    for cond in conjuncts:
+        if id(cond) in replaced:
+            result.extend(replaced[id(cond)])
+        elif id(cond) not in dropped:
+            result.append(cond)
+    if len(result) == 1:
+        return result[0]
+    return make_logic("AND", result)
+
+
+def merge_column_predicates(column, predicates):
+    """
+    Reduces the (op, value, condition) predicates on one column to the
+    conditions that still matter, or None if they contradict each other.
+    """
+    low = high = equal = None
+    not_equal = []
+    for op, value, cond in predicates:
+        if op == "=":
+            if equal is not None and equal[0] != value:
+                return None
+            equal = equal or (value, cond)
+        elif op == "!=":
+            not_equal.append((value, cond))
+        elif op in (">", ">="):
+            inclusive = op == ">="
+            if low is None or value > low[0] or (value == low[0] and not inclusive):
+                low = (value, inclusive, cond)
+        else:
+            inclusive = op == "<="
+            if high is None or value < high[0] or (value == high[0] and not inclusive):
+                high = (value, inclusive, cond)
+
+    def inside(value):
+        if low is not None and (value < low[0] or (value == low[0] and not low[1])):
+            return False
+        if high is not None and (value > high[0] or (value == high[0] and not high[1])):
+            return False
+        return True
+
+    if equal is not None:
+        if not inside(equal[0]) or any(value == equal[0] for value, _ in not_equal):
+            return None
+        return [equal[1]]
 
-def convert_in_subquery_to_join(stmt):
-    condition = stmt["where"]
-    if not isinstance(condition, dict) or condition.get("op") != "IN":
+    if low is not None and high is not None:
+        if low[0] > high[0] or (low[0] == high[0] and not (low[1] and high[1])):
+            return None
+        if low[0] == high[0]:
+            if any(value == low[0] for value, _ in not_equal):
+                return None
+            literal = low[2].right if low[2].left.type == "IDENTIFIER" else low[2].left
+            return [Condition(Identifier(column), "=", literal)]
+
+    merged = [bound[2] for bound in (low, high) if bound is not None]
+    seen = set()
+    for value, cond in not_equal:
+        if inside(value) and value not in seen:
+            seen.add(value)
+            merged.append(cond)
+    return merged
+
+
+def in_subquery_conjuncts(where):
+    """The `column IN (SELECT ...)` operands of a WHERE that is one of them or an AND."""
+    if where is None:
+        return []
+    conjuncts = where.conditions if where.type == "LOGIC" and where.op == "AND" else [where]
+    return [
+        cond for cond in conjuncts
+        if cond.type == "CONDITION" and cond.op == "IN" and cond.left.type == "IDENTIFIER"
+        and cond.right.type == "SUBQUERY" and cond.right.columns
+    ]
+
+
+def convert_in_subquery_to_semi_join(stmt):
+    """
+    Turns every `column IN (SELECT ...)` conjunct of the WHERE into a
+    semi-join, which unlike an inner join never duplicates outer rows.
+    """
+    converted = in_subquery_conjuncts(stmt.where)
+    if not converted:
         return stmt
 
-    if not isinstance(condition.get("right"), dict):
-        return stmt
+    if stmt.joins is None:
+        stmt.joins = []
+    for condition in converted:
+        sub = condition.right
+        stmt.joins.append(SemiJoin(
+            sub.table,
+            Condition(condition.left, "=", Identifier(f"{sub.table}.{sub.columns[0]}")),
+            sub.where
+        ))
+        stmt.optimization_log.append("Converted IN-subquery to semi-join")
+
+    if len(converted) == 1 and stmt.where is converted[0]:
+        stmt.where = None
+    else:
+        remaining = [c for c in stmt.where.conditions if all(c is not x for x in converted)]
+        stmt.where = None if not remaining else \
+            remaining[0] if len(remaining) == 1 else Logic("AND", remaining)
 
-    sub = condition["right"]
-    if sub.get("type") != "SUBQUERY":
-        return stmt
+    return stmt
 
-    main_col = condition.get("left")
-    sub_columns = sub.get("columns", [])
 
-    # Safely extract subquery's first column name
-    if not sub_columns:
-        return stmt
-    sub_col = sub_columns[0]
-    if isinstance(sub_col, dict):
-        sub_col = sub_col.get("value", "<unknown_col>")
-
-    sub_table = sub.get("table")
-    sub_where = sub.get("where")
-
-    stmt.setdefault("joins", []).append({
-        "type": "JOIN",
-        "table": sub_table,
-        "on": {
-            "left": main_col.get("value") if isinstance(main_col, dict) else str(main_col),
-            "op": "=",
-            "right": f"{sub_table}.{sub_col}"
-        },
-        "where": sub_where
-    })
-
-    stmt["where"] = None
-    stmt["optimization_log"].append("Converted IN-subquery to JOIN")
+def order_joins(stmt, catalog, context, threshold=JOIN_DP_THRESHOLD):
+    """
+    Picks the join order and algorithms for stmt.joins from catalog
+    statistics (see app.join_order), reorders the joins accordingly and
+    stores the chosen JoinPlan in stmt.join_plan.
+    """
+    joins = stmt.joins
+    edges = []
+    join_columns = [[] for _ in range(len(joins) + 1)]
+    for index, join in enumerate(joins, start=1):
+        outer_column = join.on.left.value
+        inner_column = join.on.right.value.split(".", 1)[-1]
+        edges.append(JoinEdge(0, outer_column, index, inner_column, semi=join.type == "SEMI_JOIN"))
+        join_columns[0].append(outer_column)
+        join_columns[index].append(inner_column)
+
+    selectivity = context.estimate(stmt.where)[1] if stmt.where is not None else 1.0
+    relations = [relation_for(stmt.table, context.table_info, selectivity, join_columns[0])]
+    for index, join in enumerate(joins, start=1):
+        info = catalog.table(join.table)
+        selectivity = estimate_condition(join.where, info)[0] if join.where is not None else 1.0
+        relations.append(relation_for(join.table, info, selectivity, join_columns[index]))
+
+    plan, method = choose_join_order(relations, edges, threshold)
+    order = [index for index in plan.leaves() if index != 0]
+    mapping = {0: 0}
+    mapping.update((old, new) for new, old in enumerate(order, start=1))
+    stmt.joins = [joins[index - 1] for index in order]
+    stmt.join_plan = renumber(plan, mapping)
+
+    names = [stmt.table] + [join.table for join in stmt.joins]
+    stmt.optimization_log.append(
+        f"Join order ({method}): {' -> '.join(names[i] for i in plan.leaves())} "
+        f"using {', '.join(plan.algorithms())}; "
+        f"estimated {plan.rows:.2f} rows, cost {plan.cost:.2f}"
+    )
+    return stmt
+
 
+def referenced_columns(condition):
+    """Columns a condition reads, in order of first use (subqueries are not entered)."""
+    seen = {}
+    stack = [condition] if condition is not None else []
+    while stack:
+        node = stack.pop()
+        if node.type == "IDENTIFIER":
+            seen.setdefault(node.value, None)
+        else:
+            stack.extend(reversed(condition_children(node)))
+    return list(seen)
+
+
+def scan_columns(table_info, needed):
+    """The needed columns without duplicates, in the table's column order."""
+    needed = dict.fromkeys(needed)
+    if table_info is None:
+        return list(needed)
+    ordered = [column for column in table_info.columns if column in needed]
+    return ordered + [column for column in needed if not table_info.has_column(column)]
+
+
+def prune_columns(stmt, catalog, table_info):
+    """
+    Required-columns analysis: starting from the projection, collects the
+    columns every scan has to read (the base table's for the output, the
+    WHERE and the join keys; each join input's for its key and filter)
+    and records them in stmt.scan_columns and join.columns. `*` is
+    expanded from the catalog.
+    """
+    if "*" in stmt.columns:
+        needed = list(table_info.columns) if table_info is not None else []
+    else:
+        needed = list(stmt.columns)
+    needed += referenced_columns(stmt.where)
+    joins = stmt.joins or []
+    needed += [join.on.left.value for join in joins]
+    stmt.scan_columns = scan_columns(table_info, needed)
+    log_pruning(stmt.optimization_log, stmt.table, stmt.scan_columns, table_info)
+
+    for join in joins:
+        info = catalog.table(join.table)
+        key = join.on.right.value.split(".", 1)[-1]
+        join.columns = scan_columns(info, [key] + referenced_columns(join.where))
+        log_pruning(stmt.optimization_log, join.table, join.columns, info)
     return stmt
 
 
+def log_pruning(log, table, columns, table_info):
+    if table_info is not None and len(columns) < len(table_info.columns):
+        log.append(
+            f"Reading {len(columns)} of {len(table_info.columns)} columns from {table}: "
+            f"{', '.join(columns)}"
+        )
+
+
 def ast_to_sql(ast):
     def format_operand(operand):
-        if not isinstance(operand, dict):
+        if not isinstance(operand, Node):
             return str(operand)
-        if operand["type"] == "STRING":
-            return f"'{operand['value']}'"
-        return str(operand.get("value", "<unknown>"))
-
-    def format_logic_condition(condition):
-        if condition["type"] == "CONDITION":
-            left = format_operand(condition["left"])
-            right = format_operand(condition["right"])
-            return f"{left} {condition['op']} {right}"
-        elif condition["type"] == "LOGIC":
-            left = format_logic_condition(condition["left"])
-            right = format_logic_condition(condition["right"])
-            return f"({left} {condition['op']} {right})"
-        elif condition["type"] == "BOOLEAN":
-            return "TRUE" if condition["value"] else "FALSE"
+        if operand.type in ("EXPRESSION", "SUBQUERY"):
+            return expression_to_string(operand)
+        # STRING literals keep their quotes from the source text
+        return str(getattr(operand, "value", "<unknown>"))
+
+    def format_node(condition, children):
+        if condition.type == "CONDITION":
+            left = format_operand(condition.left)
+            right = format_operand(condition.right)
+            return f"{left} {condition.op} {right}"
+        elif condition.type == "LOGIC":
+            return "(" + f" {condition.op} ".join(children) + ")"
+        elif condition.type == "BOOLEAN":
+            return "TRUE" if condition.value else "FALSE"
         else:
             return "<unknown condition>"
 
+    def format_logic_condition(condition):
+        return fold_tree(condition, format_node, logic_children)
+
+    def semi_join_condition(join):
+        sub_column = join.on.right.value.split(".", 1)[-1]
+        where_clause = f" WHERE {format_logic_condition(join.where)}" if join.where else ""
+        return f"{format_operand(join.on.left)} IN (SELECT {sub_column} FROM {join.table}{where_clause})"
+
     sql_statements = []
     for stmt in ast:
-        if stmt["type"] == "SELECT":
-            columns = ", ".join(stmt["columns"])
-            table = stmt["table"]
-            where = stmt.get("where")
-            where_clause = f" WHERE {format_logic_condition(where)}" if where else ""
-
-            join_clause = ""
-            if "joins" in stmt:
-                join_strs = []
-                for j in stmt["joins"]:
-                    join_str = f"JOIN {j['table']} ON {j['on']['left']} {j['on']['op']} {j['on']['right']}"
-                    if j.get("where"):
-                        join_str += f" /* filter: {format_logic_condition(j['where'])} */"
-                    join_strs.append(join_str)
-                join_clause = " " + " ".join(join_strs)
-
-            sql = f"SELECT {columns} FROM {table}{join_clause}{where_clause};"
+        if stmt.type == "SELECT":
+            columns = ", ".join(stmt.columns)
+            table = stmt.table
+            joins = stmt.joins or []
+
+            # Semi-joins are written back as IN-subqueries, which have the same semantics
+            conditions = [format_logic_condition(stmt.where)] if stmt.where else []
+            conditions += [semi_join_condition(j) for j in joins if j.type == "SEMI_JOIN"]
+            where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            join_strs = []
+            for j in joins:
+                if j.type == "SEMI_JOIN":
+                    continue
+                join_str = f"JOIN {j.table} ON {format_node(j.on, ())}"
+                if j.where:
+                    join_str += f" /* filter: {format_logic_condition(j.where)} */"
+                join_strs.append(join_str)
+            join_clause = "".join(" " + j for j in join_strs)
+
+            limit_clause = f" LIMIT {stmt.limit.value}" if stmt.limit is not None else ""
+            sql = f"SELECT {columns} FROM {table}{join_clause}{where_clause}{limit_clause};"
             sql_statements.append(sql)
         else:
-            raise ValueError(f"Unsupported statement type: {stmt['type']}")
+            raise ValueError(f"Unsupported statement type: {stmt.type}")
     return "\n".join(sql_statements)
 
 
 def normalize_condition(condition):
-    if not isinstance(condition, dict):
+    if not isinstance(condition, Node):
         return condition
 
-    if condition.get("type") == "LOGIC":
-        left = normalize_condition(condition["left"])
-        right = normalize_condition(condition["right"])
-        return {
-            "type": "LOGIC",
-            "op": condition["op"],
-            "left": left,
-            "right": right
-        }
-
-    return condition
+    def normalize(node, children):
+        if node.type == "LOGIC":
+            return make_logic(node.op, children)
+        return node
+
+    return fold_tree(condition, normalize, logic_children)
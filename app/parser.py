@@ -1,20 +1,83 @@
+from collections import deque
+
+from app.ast_nodes import (
+    Condition, Expression, Identifier, Literal, Logic, Select, Subquery
+)
+from app.lexer import TOKEN_KINDS, TokenBuffer
+
+# Returned by peek() once the input is exhausted
+EOF = ("EOF", "")
+
+# Binding strength of the binary operators allowed in a WHERE condition
+BINARY_PRECEDENCE = {
+    "OR": 1,
+    "AND": 2,
+    "EQ": 3, "NEQ": 3, "LT": 3, "GT": 3, "LTE": 3, "GTE": 3, "IN": 3,
+    "PLUS": 4, "MINUS": 4,
+    "ASTERISK": 5, "MULTIPLY": 5, "DIVIDE": 5,
+}
+
+CONDITION_TYPES = ("CONDITION", "LOGIC")
+
+
+def reduce_operator(operator, operands):
+    """Pops the two topmost operands and pushes the node built from operator."""
+    kind, op = operator
+    right = operands.pop()
+    left = operands.pop()
+
+    if kind in ("AND", "OR"):
+        if left.type not in CONDITION_TYPES or right.type not in CONDITION_TYPES:
+            raise SyntaxError(f"Expected comparison operator before {op}")
+        if left.type == "LOGIC" and left.op == op:
+            node = left
+        else:
+            node = Logic(op, [left])
+        if right.type == "LOGIC" and right.op == op:
+            node.conditions.extend(right.conditions)
+        else:
+            node.conditions.append(right)
+        operands.append(node)
+        return
+
+    if left.type in CONDITION_TYPES or right.type in CONDITION_TYPES:
+        raise SyntaxError(f"Unexpected operator {op} between conditions")
+    if BINARY_PRECEDENCE[kind] == 3:
+        operands.append(Condition(left, op, right))
+    else:
+        operands.append(Expression(op, left, right))
+
+
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
+        # Sequences (lists, token buffers) are indexed in place; any other
+        # iterable, such as lexer.iter_tokens(), is pulled through a small
+        # lookahead buffer so the whole script never has to be materialized.
+        # A TokenBuffer is additionally read by kind code, without slicing values.
+        self.compact = tokens if isinstance(tokens, TokenBuffer) else None
+        if hasattr(tokens, "__getitem__") and hasattr(tokens, "__len__"):
+            self.tokens = tokens
+            self.stream = None
+        else:
+            self.tokens = None
+            self.stream = iter(tokens)
+            self.lookahead = deque()
         self.position = 0
 
     def parse(self):
-        ast = []
-        while self.position < len(self.tokens):
+        return list(self.parse_iter())
+
+    def parse_iter(self):
+        """Yields statements one at a time as they are parsed."""
+        while not self.at_end():
             stmt = self.parse_statement()
             if stmt:
-                ast.append(stmt)
-            if self.position < len(self.tokens) and self.peek()[0] == "SEMICOLON":
+                yield stmt
+            if self.peek_kind() == "SEMICOLON":
                 self.advance()
-        return ast
 
     def parse_statement(self):
-        token_type, token_value = self.peek()
+        token_type, token_value = self.peek()[:2]
         if token_type == "SELECT":
             return self.parse_select()
         else:
@@ -27,133 +90,150 @@ class Parser:
         table_name = self.expect("IDENTIFIER")[1]
 
         where_clause = None
-        if self.position < len(self.tokens) and self.peek()[0] == "WHERE":
+        if self.peek_kind() == "WHERE":
             self.expect("WHERE")
             where_clause = self.parse_condition()
 
-        return {
-            "type": "SELECT",
-            "columns": columns,
-            "table": table_name,
-            "where": where_clause
-        }
+        limit = None
+        if self.peek_kind() == "LIMIT":
+            self.expect("LIMIT")
+            count = self.expect("NUMBER")[1]
+            if not count.isdigit():
+                raise SyntaxError(f"LIMIT expects a whole number but got {count}")
+            limit = Literal("NUMBER", count)
+
+        return Select(columns, table_name, where_clause, limit=limit)
 
     def parse_columns(self):
         columns = []
-        if self.peek()[0] == "ASTERISK":
+        if self.peek_kind() == "ASTERISK":
             self.expect("ASTERISK")
             return ["*"]
 
         while True:
             columns.append(self.expect("IDENTIFIER")[1])
-            if self.peek()[0] == "COMMA":
+            if self.peek_kind() == "COMMA":
                 self.expect("COMMA")
             else:
                 break
         return columns
 
+    def parse_subquery(self):
+        self.expect("LPAREN")
+        self.expect("SELECT")
+        columns = self.parse_columns()
+        self.expect("FROM")
+        table = self.expect("IDENTIFIER")[1]
+
+        where = None
+        if self.peek_kind() == "WHERE":
+            self.expect("WHERE")
+            where = self.parse_condition()
+
+        self.expect("RPAREN")
+        return Subquery(columns, table, where)
+
     def parse_condition(self):
-        def parse_subquery():
-            self.expect("LPAREN")
-            self.expect("SELECT")
-            columns = self.parse_columns()
-            self.expect("FROM")
-            table = self.expect("IDENTIFIER")[1]
-
-            where = None
-            if self.position < len(self.tokens) and self.peek()[0] == "WHERE":
-                self.expect("WHERE")
-                where = self.parse_condition()
-
-            self.expect("RPAREN")
-            return {
-                "type": "SUBQUERY",
-                "columns": columns,
-                "table": table,
-                "where": where
-            }
-
-        def parse_operand():
-            if self.peek()[0] == "LPAREN":
-                self.expect("LPAREN")
-                expr = parse_expression()
-                self.expect("RPAREN")
-                return expr
-            elif self.peek()[0] in ("NUMBER", "STRING", "IDENTIFIER"):
-                tok_type, tok_val = self.expect(self.peek()[0])
-                return {"type": tok_type, "value": tok_val}
-            else:
-                raise SyntaxError(f"Unexpected token in condition: {self.peek()[1]}")
-
-        def parse_expression():
-            left = parse_operand()
-            while self.position < len(self.tokens) and self.peek()[0] in ("PLUS", "MINUS", "STAR", "SLASH"):
-                op = self.expect(self.peek()[0])[1]
-                right = parse_operand()
-                left = {
-                    "type": "EXPRESSION",
-                    "op": op,
-                    "left": left,
-                    "right": right
-                }
-            return left
-
-        def parse_atomic_condition():
-            if self.peek()[0] == "LPAREN":
-                self.expect("LPAREN")
-                condition = self.parse_condition()
-                self.expect("RPAREN")
-                return condition
-
-            left = parse_operand()
-
-            if self.peek()[0] == "IN":
-                self.expect("IN")
-                subquery = parse_subquery()
-                return {
-                    "type": "CONDITION",
-                    "op": "IN",
-                    "left": left,
-                    "right": subquery
-                }
-
-            op_type, op_val = self.peek()
-            if op_type not in ("EQ", "NEQ", "LT", "GT", "LTE", "GTE"):
-                raise SyntaxError(f"Expected comparison operator but got {op_type}")
-            self.advance()
-
-            right = parse_expression()
-
-            return {
-                "type": "CONDITION",
-                "left": left,
-                "op": op_val,
-                "right": right
-            }
-
-        left_condition = parse_atomic_condition()
-
-        while self.position < len(self.tokens) and self.peek()[0] in ("AND", "OR"):
-            logical_op = self.expect(self.peek()[0])[1]
-            right_condition = self.parse_condition()
-            left_condition = {
-                "type": "LOGIC",
-                "op": logical_op,
-                "left": left_condition,
-                "right": right_condition
-            }
-
-        return left_condition
+        """
+        Iterative precedence climbing over OR < AND < comparison/IN < +,- < *,/.
+        Parentheses live on the explicit operator stack instead of the Python
+        call stack, and AND/OR chains are flattened into one n-ary Logic node
+        as they reduce.
+        """
+        operands = []
+        operators = []
+        open_parens = 0
+        expect_operand = True
+
+        while True:
+            kind = self.peek_kind()
+
+            if expect_operand:
+                if kind == "LPAREN" and operators and operators[-1][0] == "IN":
+                    operands.append(self.parse_subquery())
+                    expect_operand = False
+                elif kind == "LPAREN":
+                    self.advance()
+                    operators.append(("LPAREN", "("))
+                    open_parens += 1
+                elif kind == "IDENTIFIER":
+                    operands.append(Identifier(self.expect(kind)[1]))
+                    expect_operand = False
+                elif kind in ("NUMBER", "STRING"):
+                    operands.append(Literal(kind, self.expect(kind)[1]))
+                    expect_operand = False
+                else:
+                    raise SyntaxError(f"Unexpected token in condition: {self.peek()[1]}")
+                continue
+
+            if kind == "RPAREN" and open_parens:
+                self.advance()
+                while operators[-1][0] != "LPAREN":
+                    reduce_operator(operators.pop(), operands)
+                operators.pop()
+                open_parens -= 1
+                continue
+
+            precedence = BINARY_PRECEDENCE.get(kind)
+            if precedence is None:
+                break
+            while (operators and operators[-1][0] != "LPAREN"
+                   and BINARY_PRECEDENCE[operators[-1][0]] >= precedence):
+                reduce_operator(operators.pop(), operands)
+            operators.append((kind, self.expect(kind)[1]))
+            if kind == "IN" and self.peek_kind() != "LPAREN":
+                raise SyntaxError(f"Expected subquery after IN but got {self.peek_kind()}")
+            expect_operand = True
+
+        if open_parens:
+            raise SyntaxError(f"Expected RPAREN but got {self.peek_kind()}")
+        while operators:
+            reduce_operator(operators.pop(), operands)
+
+        condition = operands.pop()
+        if condition.type not in CONDITION_TYPES:
+            raise SyntaxError(f"Expected comparison operator but got {self.peek_kind()}")
+        return condition
 
     def peek(self):
-        return self.tokens[self.position]
+        if self.stream is None:
+            if self.position < len(self.tokens):
+                return self.tokens[self.position]
+            return EOF
+        if not self.lookahead:
+            token = next(self.stream, None)
+            if token is None:
+                return EOF
+            self.lookahead.append(token)
+        return self.lookahead[0]
+
+    def peek_kind(self):
+        if self.compact is not None:
+            if self.position < len(self.compact.kinds):
+                return TOKEN_KINDS[self.compact.kinds[self.position]]
+            return EOF[0]
+        return self.peek()[0]
+
+    def at_end(self):
+        return self.peek_kind() == EOF[0]
 
     def advance(self):
+        if self.stream is not None:
+            if not self.lookahead:
+                self.peek()
+            if self.lookahead:
+                self.lookahead.popleft()
         self.position += 1
 
     def expect(self, expected_type):
+        if self.peek_kind() != expected_type:
+            token = self.peek()
+            location = f" at offset {token.start}" if hasattr(token, "start") else ""
+            raise SyntaxError(f"Expected {expected_type} but got {token[0]}{location}")
         token = self.peek()
-        if token[0] != expected_type:
-            raise SyntaxError(f"Expected {expected_type} but got {token[0]}")
         self.advance()
         return token
+
+
+def parse(tokens):
+    return Parser(tokens).parse()
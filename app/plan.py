@@ -0,0 +1,344 @@
+# plan.py
+
+import math
+
+from app.ast_nodes import Logic
+from app.cost import (
+    COMPARISON_COST, DEFAULT_RANGE_SELECTIVITY, column_predicate, comparison_selectivity,
+    estimate_condition, table_rows,
+)
+from app.join_order import DEFAULT_DISTINCT
+from app.semantic import CATALOG
+
+# Cost of reading one row in a table scan, in units of one comparison
+SCAN_ROW_COST = 1.0
+
+# Cost of one hash index probe, and of fetching one row through an index
+# (random rather than sequential access)
+HASH_PROBE_COST = 1.0
+INDEX_ROW_COST = 4.0
+
+RANGE_OPS = ("<", "<=", ">", ">=")
+NUMERIC_TYPES = ("float", "double", "real", "decimal", "numeric")
+
+
+class PlanNode:
+    """
+    Logical plan operator. Every operator carries its estimated output
+    cardinality (`rows`) and the cumulative cost of producing it (`cost`).
+    """
+
+    __slots__ = ("rows", "cost")
+    operator = None
+
+    def children(self):
+        return ()
+
+    def __repr__(self):
+        return f"<{self.operator} rows={self.rows:.2f} cost={self.cost:.2f}>"
+
+
+class IndexAccess:
+    """
+    Reads a table through the index of `column` instead of scanning it:
+    path "lookup" fetches the rows equal to one key, path "range" those
+    between the bounds. `low` and `high` are (value, inclusive) or None.
+    """
+
+    __slots__ = ("column", "index", "path", "low", "high", "rows", "cost")
+
+    def __init__(self, column, index, path, low, high, rows, cost):
+        self.column = column
+        self.index = index
+        self.path = path
+        self.low = low
+        self.high = high
+        self.rows = rows
+        self.cost = cost
+
+
+class Scan(PlanNode):
+    """
+    Reads `columns` of a table, in full or through an index if `access`
+    (an IndexAccess) is set. `blooms` lists the (column, source) pairs of
+    Bloom filters pushed into the scan by semi-joins.
+    """
+
+    __slots__ = ("table", "columns", "blooms", "access")
+    operator = "Scan"
+
+    def __init__(self, table, columns, rows, blooms=None, access=None):
+        self.table = table
+        self.columns = columns
+        self.blooms = blooms or []
+        self.access = access
+        self.rows = access.rows if access is not None else rows
+        self.cost = access.cost if access is not None else rows * SCAN_ROW_COST
+
+
+class Filter(PlanNode):
+    __slots__ = ("input", "condition")
+    operator = "Filter"
+
+    def __init__(self, input, condition, table_info=None):
+        self.input = input
+        self.condition = condition
+        selectivity, cost = estimate_condition(condition, table_info)
+        self.rows = input.rows * selectivity
+        self.cost = input.cost + input.rows * cost
+
+    def children(self):
+        return (self.input,)
+
+
+class Project(PlanNode):
+    __slots__ = ("input", "columns")
+    operator = "Project"
+
+    def __init__(self, input, columns):
+        self.input = input
+        self.columns = columns
+        self.rows = input.rows
+        self.cost = input.cost
+
+    def children(self):
+        return (self.input,)
+
+
+class Join(PlanNode):
+    """
+    Inner equi-join; `on` holds (left column, right column) pairs qualified
+    with their table names and `algorithm` the physical choice, if made.
+    """
+
+    __slots__ = ("left", "right", "on", "algorithm")
+    operator = "Join"
+
+    def __init__(self, left, right, on, algorithm=None, rows=None, cost=None):
+        self.left = left
+        self.right = right
+        self.on = on
+        self.algorithm = algorithm
+        self.rows = rows if rows is not None else left.rows * right.rows / DEFAULT_DISTINCT
+        self.cost = left.cost + right.cost + (cost if cost is not None else left.rows + right.rows)
+
+    def children(self):
+        return (self.left, self.right)
+
+
+class SemiJoin(Join):
+    """Keeps the rows of `left` that have a match in `right`, each at most once."""
+
+    __slots__ = ()
+    operator = "SemiJoin"
+
+    def __init__(self, left, right, on, algorithm=None, rows=None, cost=None):
+        super().__init__(left, right, on, algorithm, left.rows if rows is None else rows, cost)
+
+
+class Limit(PlanNode):
+    __slots__ = ("input", "count")
+    operator = "Limit"
+
+    def __init__(self, input, count):
+        self.input = input
+        self.count = count
+        self.rows = min(float(count), input.rows)
+        self.cost = input.cost
+
+    def children(self):
+        return (self.input,)
+
+
+def iter_plan(plan):
+    """Yields the operators of a plan in pre-order."""
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.children()))
+
+
+def scan_input(table, columns, where, table_info):
+    rows, _ = table_rows(table_info)
+    if columns is None:
+        columns = list(table_info.columns) if table_info is not None else []
+    access, where = choose_access_path(table, where, table_info, rows)
+    scan = Scan(table, columns, rows, access=access)
+    return scan, (Filter(scan, where, table_info) if where is not None else scan)
+
+
+def conjuncts(where):
+    if where is None:
+        return []
+    if where.type == "LOGIC" and where.op == "AND":
+        return list(where.conditions)
+    return [where]
+
+
+def value_fits(value, column_type):
+    """Whether a literal can be looked up in an index of a column of this type."""
+    column_type = (column_type or "").lower()
+    numeric = column_type.startswith(("int", "bigint", "smallint")) or column_type in NUMERIC_TYPES
+    return numeric != isinstance(value, str)
+
+
+def indexed_predicates(table, where, table_info):
+    """(conjunct, column, op, value) of the top-level conjuncts an index can answer."""
+    found = []
+    for condition in conjuncts(where):
+        if condition.type != "CONDITION":
+            continue
+        predicate = column_predicate(condition)
+        if predicate is None:
+            continue
+        column, op, value = predicate
+        qualifier, _, name = column.rpartition(".")
+        if qualifier and qualifier != table:
+            continue
+        kind = table_info.index_kind(name)
+        if kind is None or not value_fits(value, table_info.column_type(name)):
+            continue
+        if op == "=" or (op in RANGE_OPS and kind == "sorted"):
+            found.append((condition, name, op, value))
+    return found
+
+
+def tighter(bound, candidate, lower):
+    """The more selective of two (value, inclusive) bounds."""
+    if bound is None or candidate[0] != bound[0]:
+        if bound is None or (candidate[0] > bound[0]) == lower:
+            return candidate
+        return bound
+    return bound if not bound[1] else candidate
+
+
+def range_selectivity(stats, low, high):
+    if low is None or high is None:
+        op, bound = (">=" if low[1] else ">", low) if high is None else ("<=" if high[1] else "<", high)
+        return comparison_selectivity(stats, op, bound[0])
+    if stats is None:
+        return DEFAULT_RANGE_SELECTIVITY ** 2
+    above = comparison_selectivity(stats, ">=" if low[1] else ">", low[0])
+    below = comparison_selectivity(stats, "<=" if high[1] else "<", high[0])
+    return max(0.0, above + below - (1 - stats.null_frac))
+
+
+def choose_access_path(table, where, table_info, rows):
+    """
+    Picks the cheapest way to read a table for its WHERE clause: a full
+    scan, an index lookup (an equality on an indexed column) or an index
+    range scan (the bounds of the range conjuncts on a sorted index's
+    column). Costs follow the estimated selectivity: an index pays a probe
+    plus INDEX_ROW_COST per row it fetches, a full scan SCAN_ROW_COST per
+    row of the table. Returns (IndexAccess or None, the conditions left
+    for the filter above the scan).
+    """
+    if table_info is None or not table_info.indexes:
+        return None, where
+    candidates = []
+    ranges = {}
+    for condition, column, op, value in indexed_predicates(table, where, table_info):
+        if op == "=":
+            candidates.append((column, (value, True), (value, True), [condition]))
+            continue
+        low, high, used = ranges.get(column, (None, None, []))
+        if op in (">", ">="):
+            low = tighter(low, (value, op == ">="), lower=True)
+        else:
+            high = tighter(high, (value, op == "<="), lower=False)
+        ranges[column] = (low, high, used + [condition])
+    candidates.extend((column, low, high, used) for column, (low, high, used) in ranges.items())
+
+    best, best_cost, consumed = None, rows * SCAN_ROW_COST, []
+    for column, low, high, used in candidates:
+        stats = table_info.column_stats(column)
+        index = table_info.index_kind(column)
+        path = "lookup" if low is not None and low == high and low[1] else "range"
+        if path == "lookup":
+            selectivity = comparison_selectivity(stats, "=", low[0])
+        else:
+            selectivity = range_selectivity(stats, low, high)
+        matched = rows * selectivity
+        if index == "hash":
+            probe = HASH_PROBE_COST
+        else:
+            probe = math.log2(max(rows, 2)) * COMPARISON_COST
+        cost = probe + matched * INDEX_ROW_COST
+        if cost < best_cost:
+            best = IndexAccess(column, index, path, low, high, matched, cost)
+            best_cost, consumed = cost, used
+
+    if best is None:
+        return None, where
+    rest = [condition for condition in conjuncts(where) if all(condition is not c for c in consumed)]
+    if not rest:
+        return best, None
+    return best, rest[0] if len(rest) == 1 else Logic("AND", rest)
+
+
+def build_plan(stmt, catalog=None):
+    """
+    Builds the logical plan of an optimized SELECT:
+    Limit? -> Project -> joins (as chosen in stmt.join_plan) -> Filter? -> Scan.
+    """
+    catalog = catalog or CATALOG
+    table_info = catalog.table(stmt.table)
+    scans = []
+    inputs = []
+    scan, node = scan_input(stmt.table, stmt.scan_columns, stmt.where, table_info)
+    scans.append(scan)
+    inputs.append(node)
+
+    joins = stmt.joins or []
+    for join in joins:
+        scan, node = scan_input(join.table, join.columns, join.where, catalog.table(join.table))
+        scans.append(scan)
+        inputs.append(node)
+
+    if joins:
+        names = [stmt.table] + [join.table for join in joins]
+        if stmt.join_plan is not None:
+            root = build_join_tree(stmt.join_plan, inputs, scans, names)
+        else:
+            root = inputs[0]
+            for index, join in enumerate(joins, start=1):
+                on = [(join.on.left.value, join.on.right.value)]
+                operator = SemiJoin if join.type == "SEMI_JOIN" else Join
+                root = operator(root, inputs[index], on)
+    else:
+        root = inputs[0]
+
+    root = Project(root, stmt.columns)
+    if stmt.limit is not None:
+        root = Limit(root, int(stmt.limit.value))
+    return root
+
+
+def build_join_tree(join_plan, inputs, scans, names):
+    """Converts an optimizer JoinPlan into Join/SemiJoin operators over the inputs."""
+    built = {}
+    order = []
+    stack = [join_plan]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if node.relation is None:
+            stack.extend((node.left, node.right))
+
+    for node in reversed(order):  # children before their parents
+        if node.relation is not None:
+            built[id(node)] = inputs[node.relation]
+            continue
+        left, right = built[id(node.left)], built[id(node.right)]
+        on = [(f"{names[e.left]}.{e.left_column}", f"{names[e.right]}.{e.right_column}")
+              for e in node.edges]
+        own_cost = node.cost - node.left.cost - node.right.cost
+        if node.semi:
+            if node.bloom:
+                for e in node.edges:
+                    scans[e.left].blooms.append((e.left_column, f"{names[e.right]}.{e.right_column}"))
+            built[id(node)] = SemiJoin(left, right, on, node.algorithm, node.rows, own_cost)
+        else:
+            built[id(node)] = Join(left, right, on, node.algorithm, node.rows, own_cost)
+    return built[id(join_plan)]
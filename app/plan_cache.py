@@ -0,0 +1,193 @@
+# plan_cache.py
+
+from collections import OrderedDict
+
+from app.ast_nodes import Literal, Param, copy_tree, iter_literals
+from app.lexer import tokenize
+from app.parser import Parser
+from app.semantic import CATALOG, validate
+from app.optimizer import optimize
+from app.plan_codec import encode_plan
+from app.plan_store import PlanStore, write_plan_store
+
+LITERAL_KINDS = {"NUMBER": "?N", "STRING": "?S"}
+
+# Literals after these tokens are part of the key: the parser checks them
+# (LIMIT takes a whole number), which a bound parameter would skip
+FIXED_AFTER = frozenset({"LIMIT"})
+
+
+def fingerprint(tokens):
+    """
+    Returns (key, literals) for a token list: the key is the token stream
+    with every literal replaced by a typed parameter slot ('?' cannot occur
+    in any other token), and literals are the (kind, value) pairs in order.
+    LIMIT counts are kept in the key rather than parameterized.
+    """
+    parts = []
+    literals = []
+    previous = None
+    for kind, value in tokens:
+        slot = LITERAL_KINDS.get(kind)
+        fixed, previous = previous in FIXED_AFTER, kind
+        if slot is None or fixed:
+            parts.append(value)
+        else:
+            parts.append(slot)
+            literals.append((kind, value))
+    return " ".join(parts), literals
+
+
+class PlanCache:
+    """
+    LRU cache of optimized statement templates keyed by literal-normalized
+    fingerprint. `WHERE age > 25` and `WHERE age > 31` share one entry; on a
+    hit the new literals are bound into a copy of the cached template and
+    the parse/validate/optimize pipeline is skipped.
+
+    A template is only stored when every literal of the query survives
+    optimization unchanged. Queries whose rewrite consumed a literal (for
+    example `1 = 1` being eliminated) depend on the literal values and are
+    always compiled from scratch. The cache empties itself whenever the
+    catalog reloads a changed schema file.
+
+    With a store_path, templates saved by an earlier process (see save())
+    are looked up in that memory-mapped plan store on a miss and decoded
+    on first use, so a warm start does not pay for plans it never needs.
+    """
+
+    def __init__(self, capacity=1024, catalog=None, store_path=None):
+        self.capacity = capacity
+        self.catalog = catalog or CATALOG
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store_hits = 0
+        self.store = None
+        self.store_path = store_path
+        self.catalog.add_listener(self.invalidate)
+        if store_path is not None:
+            self.load_store(store_path)
+
+    def load_store(self, path):
+        """
+        Opens the plan store at path. Stores written for another version of
+        the catalog (or of the plan format) are ignored.
+        """
+        self.catalog.refresh()
+        try:
+            store = PlanStore(path)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not open plan store {path}: {e}")
+            return False
+        if store.catalog_version != self.catalog.mtime:
+            store.close()
+            return False
+        self.store = store
+        return True
+
+    def save(self, path=None):
+        """
+        Writes every cached template, plus those of the open store that were
+        never decoded, to the plan store at path (default: store_path).
+        """
+        path = path or self.store_path
+        self.catalog.refresh()
+        plans = {key: encode_plan(template) for key, template in self.entries.items()}
+        if self.store is not None:
+            for key, plan in self.store.items():
+                plans.setdefault(key, plan)
+        write_plan_store(path, plans.items(), self.catalog.mtime)
+
+    def compile(self, sql):
+        """Returns (optimized_ast, errors) for the SQL text."""
+        self.catalog.refresh()
+        tokens = tokenize(sql)
+        key, literals = fingerprint(tokens)
+
+        template = self.entries.get(key)
+        if template is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return bind(template, literals), []
+
+        if self.store is not None:
+            template = self.store.get(key)
+            if template is not None:
+                self.remember(key, template)
+                self.hits += 1
+                self.store_hits += 1
+                return bind(template, literals), []
+
+        self.misses += 1
+        ast = Parser(tokens).parse()
+        errors = validate(ast, self.catalog)
+        if errors:
+            return [], errors
+
+        slots = {id(node): slot for slot, node in enumerate(
+            node for stmt in ast for node in iter_literals(stmt) if node is not stmt.limit)}
+        optimized_ast = optimize(ast)
+
+        template = make_template(optimized_ast, slots)
+        if template is not None and len(slots) == len(literals):
+            self.remember(key, template)
+        return optimized_ast, []
+
+    def remember(self, key, template):
+        self.entries[key] = template
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        """Drops every cached plan, e.g. after the schema has changed."""
+        self.entries.clear()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "store_hits": self.store_hits,
+            "stored": len(self.store) if self.store is not None else 0,
+        }
+
+
+def make_template(optimized_ast, slots):
+    """
+    Copies the optimized AST with its original literals replaced by Param
+    slots, or returns None if any literal was consumed by a rewrite.
+    """
+    seen = set()
+
+    def parameterize(node):
+        if isinstance(node, Literal) and id(node) in slots:
+            slot = slots[id(node)]
+            seen.add(slot)
+            return Param(slot, node.type)
+        return None
+
+    template = copy_tree(optimized_ast, parameterize)
+    if len(seen) != len(slots):
+        return None
+    return template
+
+
+def bind(template, literals):
+    """Copies a template, filling each Param slot with the matching literal."""
+    def fill(node):
+        if isinstance(node, Param):
+            kind, value = literals[node.slot]
+            return Literal(kind, value)
+        return None
+
+    return copy_tree(template, fill)
@@ -0,0 +1,204 @@
+# plan_codec.py
+
+import struct
+import sys
+
+from app.ast_nodes import (
+    Boolean, Condition, Expression, Identifier, Join, Literal, Logic, Param, SemiJoin,
+    Select, Subquery
+)
+from app.join_order import JoinEdge, JoinPlan
+
+# Bump whenever SCHEMA or the layout below changes; stores written with
+# another version are ignored
+FORMAT_VERSION = 1
+
+# An encoded plan is COUNTS, then the string lengths (u32) and UTF-8 bytes,
+# the doubles (f64), the node records and the field values (i64). Nodes
+# are written children first, so the root is the last record.
+COUNTS = struct.Struct("<IIII")
+NODE = struct.Struct("<BxxxII")   # tag, number of field values, index of the first one
+
+NONE = -1
+
+# tag -> (class, fields). Field kinds: "node" refers to an earlier node
+# record, "str" and "float" index the string and double tables, "int" and
+# "bool" are stored inline and "mask" is recomputed from the children.
+SCHEMA = (
+    (list, None),
+    (tuple, None),
+    (str, None),
+    (Select, (("columns", "node"), ("table", "str"), ("where", "node"), ("joins", "node"),
+              ("optimization_log", "node"), ("join_plan", "node"),
+              ("scan_columns", "node"), ("limit", "node"))),
+    (Subquery, (("columns", "node"), ("table", "str"), ("where", "node"))),
+    (Join, (("table", "str"), ("on", "node"), ("where", "node"), ("columns", "node"))),
+    (SemiJoin, (("table", "str"), ("on", "node"), ("where", "node"), ("columns", "node"))),
+    (Logic, (("op", "str"), ("conditions", "node"))),
+    (Condition, (("left", "node"), ("op", "str"), ("right", "node"))),
+    (Expression, (("op", "str"), ("left", "node"), ("right", "node"))),
+    (Literal, (("type", "str"), ("value", "str"))),
+    (Identifier, (("value", "str"),)),
+    (Boolean, (("value", "bool"),)),
+    (Param, (("slot", "int"), ("kind", "str"))),
+    (JoinPlan, (("mask", "mask"), ("rows", "float"), ("cost", "float"), ("relation", "int"),
+                ("left", "node"), ("right", "node"), ("algorithm", "str"), ("edges", "node"),
+                ("bloom", "bool"))),
+    (JoinEdge, (("left", "int"), ("left_column", "str"), ("right", "int"),
+                ("right_column", "str"), ("semi", "bool"))),
+)
+TAGS = {cls: tag for tag, (cls, _) in enumerate(SCHEMA)}
+
+
+class PlanEncoder:
+    """
+    Flattens statements into string, double, node and field tables.
+    Shared subtrees (hash-consed conditions, join plans) are written once.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.doubles = []
+        self.nodes = []
+        self.fields = []
+        self.memo = {}
+
+    def string(self, value):
+        if value is None:
+            return NONE
+        if not isinstance(value, str):
+            raise ValueError(f"Cannot encode {value!r} as a string")
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def children(self, value):
+        cls = type(value)
+        if cls is list or cls is tuple:
+            return value
+        if cls is str:
+            return ()
+        fields = SCHEMA[self.tag(value)][1]
+        return [getattr(value, name) for name, kind in fields
+                if kind == "node" and getattr(value, name) is not None]
+
+    def tag(self, value):
+        tag = TAGS.get(type(value))
+        if tag is None:
+            raise ValueError(f"Cannot encode {type(value).__name__} in a plan")
+        return tag
+
+    def emit(self, value):
+        tag = self.tag(value)
+        start = len(self.fields)
+        fields = self.fields
+        cls, kinds = SCHEMA[tag]
+        if kinds is None:
+            if cls is str:
+                fields.append(self.string(value))
+            else:
+                fields.extend(self.memo[id(item)] for item in value)
+        else:
+            for name, kind in kinds:
+                field = getattr(value, name)
+                if kind == "node":
+                    fields.append(NONE if field is None else self.memo[id(field)])
+                elif kind == "str":
+                    fields.append(self.string(field))
+                elif kind == "float":
+                    fields.append(len(self.doubles))
+                    self.doubles.append(field)
+                elif kind == "mask":
+                    fields.append(0)
+                else:
+                    fields.append(NONE if field is None else int(field))
+        self.memo[id(value)] = len(self.nodes)
+        self.nodes.append((tag, len(fields) - start, start))
+
+    def add(self, root):
+        """Encodes root and everything below it; returns the index of its record."""
+        stack = [(root, False)]
+        while stack:
+            value, expanded = stack.pop()
+            if id(value) in self.memo:
+                continue
+            if expanded:
+                self.emit(value)
+                continue
+            stack.append((value, True))
+            stack.extend((child, False) for child in reversed(self.children(value))
+                         if id(child) not in self.memo)
+        return self.memo[id(root)]
+
+    def to_bytes(self):
+        encoded = [s.encode("utf-8") for s in self.strings]
+        parts = [
+            COUNTS.pack(len(encoded), len(self.doubles), len(self.nodes), len(self.fields)),
+            struct.pack(f"<{len(encoded)}I", *map(len, encoded)),
+            b"".join(encoded),
+            struct.pack(f"<{len(self.doubles)}d", *self.doubles),
+            b"".join(NODE.pack(*record) for record in self.nodes),
+            struct.pack(f"<{len(self.fields)}q", *self.fields),
+        ]
+        return b"".join(parts)
+
+
+def encode_plan(statements):
+    """Encodes a list of (optimized or template) statements as bytes."""
+    encoder = PlanEncoder()
+    encoder.add(statements)
+    return encoder.to_bytes()
+
+
+def decode_plan(buf, offset=0):
+    """
+    Decodes the plan encoded at buf[offset:]; buf may be bytes or an mmap,
+    in which case only this plan's bytes are read.
+    """
+    n_strings, n_doubles, n_nodes, n_fields = COUNTS.unpack_from(buf, offset)
+    pos = offset + COUNTS.size
+    lengths = struct.unpack_from(f"<{n_strings}I", buf, pos)
+    pos += 4 * n_strings
+    strings = []
+    for length in lengths:
+        strings.append(sys.intern(buf[pos:pos + length].decode("utf-8")))
+        pos += length
+    doubles = struct.unpack_from(f"<{n_doubles}d", buf, pos)
+    pos += 8 * n_doubles
+    records = NODE.iter_unpack(buf[pos:pos + NODE.size * n_nodes])
+    pos += NODE.size * n_nodes
+    fields = struct.unpack_from(f"<{n_fields}q", buf, pos)
+
+    values = []
+    for tag, count, start in records:
+        cls, kinds = SCHEMA[tag]
+        args = fields[start:start + count]
+        if kinds is None:
+            if cls is str:
+                values.append(strings[args[0]])
+            else:
+                values.append(cls(values[i] for i in args))
+            continue
+        node = object.__new__(cls)
+        for (name, kind), field in zip(kinds, args):
+            if kind == "mask":
+                continue
+            if field == NONE and kind != "bool":
+                value = None
+            elif kind == "node":
+                value = values[field]
+            elif kind == "str":
+                value = strings[field]
+            elif kind == "float":
+                value = doubles[field]
+            elif kind == "bool":
+                value = bool(field)
+            else:
+                value = field
+            setattr(node, name, value)
+        if cls is JoinPlan:
+            node.mask = 1 << node.relation if node.relation is not None \
+                else node.left.mask | node.right.mask
+        values.append(node)
+    return values[-1]
@@ -0,0 +1,127 @@
+# plan_store.py
+
+import hashlib
+import mmap
+import os
+import struct
+
+from app.plan_codec import FORMAT_VERSION, decode_plan
+
+MAGIC = b"SQLPLANS"
+
+# magic, format version, entry count, catalog version (two mtimes, -1 if
+# missing) and the offset of the index
+HEADER = struct.Struct("<8sHxxIqqQ")
+# The index is the sorted key hashes (u64) followed by one ENTRY per hash:
+# offset of the entry, length of its key and length of its encoded plan
+KEY_HASH = struct.Struct("<Q")
+ENTRY = struct.Struct("<QII")
+
+
+def key_hash(key):
+    """Stable 64-bit hash of a fingerprint (hash() is salted per process)."""
+    return KEY_HASH.unpack(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest())[0]
+
+
+def pack_version(version):
+    return tuple(-1 if part is None else part for part in version)
+
+
+def write_plan_store(path, entries, catalog_version):
+    """
+    Writes (fingerprint, encoded plan) pairs to a plan store file. The file
+    is written next to path and moved into place, so readers that still
+    have the old file mapped are not affected.
+    """
+    entries = [(key_hash(key), key.encode("utf-8"), plan) for key, plan in entries]
+    entries.sort(key=lambda entry: entry[0])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        offsets = []
+        for _, key, plan in entries:
+            offsets.append(f.tell())
+            f.write(key)
+            f.write(plan)
+        index_offset = f.tell()
+        f.write(b"".join(KEY_HASH.pack(h) for h, _, _ in entries))
+        f.write(b"".join(ENTRY.pack(offset, len(key), len(plan))
+                         for offset, (_, key, plan) in zip(offsets, entries)))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(entries),
+                            *pack_version(catalog_version), index_offset))
+    os.replace(tmp_path, path)
+
+
+class PlanStore:
+    """
+    Read-only view of a plan store file. The file is memory-mapped and
+    nothing but the header is read on open; get() binary-searches the key
+    hash index and decodes only the plan asked for, so opening a store
+    costs the same with a hundred plans as with a hundred thousand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < HEADER.size:
+            self.close()
+            raise ValueError("truncated plan store")
+        magic, version, count, catalog_mtime, stats_mtime, index = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("not a plan store")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"plan store format {version} is not supported")
+        self.count = count
+        self.catalog_version = tuple(None if part == -1 else part
+                                     for part in (catalog_mtime, stats_mtime))
+        self.hashes_offset = index
+        self.entries_offset = index + KEY_HASH.size * count
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def close(self):
+        self.mm.close()
+
+    def entry(self, i):
+        return ENTRY.unpack_from(self.mm, self.entries_offset + ENTRY.size * i)
+
+    def find(self, key):
+        """(offset of the encoded plan, its length) for key, or None."""
+        target = key_hash(key)
+        mm, base = self.mm, self.hashes_offset
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY_HASH.unpack_from(mm, base + KEY_HASH.size * mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        encoded_key = key.encode("utf-8")
+        # Colliding hashes are adjacent; the stored key tells them apart
+        while lo < self.count and KEY_HASH.unpack_from(mm, base + KEY_HASH.size * lo)[0] == target:
+            offset, key_length, length = self.entry(lo)
+            if mm[offset:offset + key_length] == encoded_key:
+                return offset + key_length, length
+            lo += 1
+        return None
+
+    def get(self, key):
+        """Decodes the plan stored for key, or returns None."""
+        found = self.find(key)
+        return decode_plan(self.mm, found[0]) if found is not None else None
+
+    def items(self):
+        """Yields (key, encoded plan) pairs without decoding the plans."""
+        mm = self.mm
+        for i in range(self.count):
+            offset, key_length, length = self.entry(i)
+            key = mm[offset:offset + key_length].decode("utf-8")
+            yield key, mm[offset + key_length:offset + key_length + length]
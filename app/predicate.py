@@ -0,0 +1,205 @@
+# predicate.py
+
+from collections import OrderedDict
+
+from app.evaluator import divide, literal_value, not_equal
+from app.utils import condition_children, fold_tree
+
+DEFAULT_CAPACITY = 1024
+
+COMPARISONS = {"=": "==", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def column_offset(columns, name):
+    """Index of column `name` in a row layout; unqualified names match a qualified column."""
+    if name in columns:
+        return columns.index(name)
+    matches = [i for i, column in enumerate(columns) if column.endswith("." + name)]
+    if len(matches) != 1:
+        problem = "ambiguous" if matches else "unknown"
+        raise ValueError(f"Column '{name}' is {problem}")
+    return matches[0]
+
+
+def condition_operands(condition):
+    """Literal and subquery nodes of a condition, left to right (subqueries are not entered)."""
+    operands = []
+    stack = [condition]
+    while stack:
+        node = stack.pop()
+        if node.type in ("NUMBER", "STRING", "SUBQUERY"):
+            operands.append(node)
+        else:
+            stack.extend(reversed(condition_children(node)))
+    return operands
+
+
+def condition_shape(condition):
+    """
+    Literal-free shape of a condition: everything its generated source
+    depends on (node types, operators, columns and the arity of logic
+    nodes), but not the literal values it binds.
+    """
+    shape = []
+    stack = [condition]
+    while stack:
+        node = stack.pop()
+        node_type = node.type
+        if node_type in ("NUMBER", "STRING", "SUBQUERY"):
+            shape.append(node_type == "SUBQUERY")
+            continue
+        if node_type == "LOGIC":
+            shape.append((node_type, node.op, len(node.conditions)))
+        elif node_type in ("IDENTIFIER", "BOOLEAN"):
+            shape.append((node_type, node.value))
+        else:
+            shape.append((node_type, node.op))
+        stack.extend(reversed(condition_children(node)))
+    return tuple(shape)
+
+
+def generate_source(condition, columns):
+    """
+    Python source of a factory make(params, sets) -> predicate(row) for a
+    condition. Column references become constant row offsets, literals
+    the closure variables p0, p1, ... and IN-subqueries the sets s0, ...
+    Logic nodes become `and`/`or` chains in the order the optimizer left
+    their operands, so Python's short-circuiting follows its cost order.
+    """
+    params = []
+    sets = []
+
+    def combine(node, children):
+        node_type = node.type
+        if node_type in ("NUMBER", "STRING"):
+            params.append(f"p{len(params)}")
+            return params[-1]
+        if node_type == "SUBQUERY":
+            sets.append(f"s{len(sets)}")
+            return sets[-1]
+        if node_type == "IDENTIFIER":
+            return f"row[{column_offset(columns, node.value)}]"
+        if node_type == "BOOLEAN":
+            return "True" if node.value else "False"
+        if node_type == "EXPRESSION":
+            left, right = children
+            if node.op == "/":
+                return f"_divide({left}, {right})"
+            return f"({left} {node.op} {right})"
+        if node_type == "CONDITION":
+            left, right = children
+            if node.op == "IN":
+                return f"({left} in {right})"
+            if node.op == "!=":
+                return f"_not_equal({left}, {right})"
+            return f"({left} {COMPARISONS[node.op]} {right})"
+        if node_type == "LOGIC":
+            return "(" + f" {node.op.lower()} ".join(children) + ")"
+        raise ValueError(f"Cannot compile condition node {node_type}")
+
+    expression = fold_tree(condition, combine)
+    lines = ["def make(params, sets):"]
+    if params:
+        lines.append(f"    {', '.join(params)}, = params")
+    if sets:
+        lines.append(f"    {', '.join(sets)}, = sets")
+    lines += [
+        "    def predicate(row):",
+        f"        return {expression}",
+        "    return predicate",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class CompiledPredicate:
+    """
+    A compiled factory; bind() turns it into the predicate for one query's
+    literals. `shape` (see condition_shape) is kept for entries cached
+    under a caller's key, to tell whether another condition fits them.
+    """
+
+    __slots__ = ("source", "make", "shape")
+
+    def __init__(self, source, shape=None):
+        self.source = source
+        self.shape = shape
+        namespace = {"_divide": divide, "_not_equal": not_equal}
+        exec(compile(source, "<predicate>", "exec"), namespace)
+        self.make = namespace["make"]
+
+    def bind(self, condition, subquery_values=None):
+        params, sets = [], []
+        for node in condition_operands(condition):
+            if node.type == "SUBQUERY":
+                if subquery_values is None:
+                    raise ValueError("IN-subquery predicates need subquery_values")
+                sets.append(frozenset(subquery_values(node)))
+            else:
+                params.append(literal_value(node))
+        return self.make(params, sets)
+
+
+class PredicateCompiler:
+    """
+    LRU cache of compiled predicates. With a key (e.g. the plan cache
+    fingerprint of the query) a hit skips source generation and only binds
+    the new literals. The optimizer can give queries with one fingerprint
+    differently shaped conditions (e.g. `1 = 1` folds away, `1 = 2` does
+    not), so a keyed entry is only reused if the condition's shape matches;
+    otherwise it is regenerated. Without a key, predicates are cached by
+    their generated source, which is literal-free and so still shared by
+    queries that differ only in their constants.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, condition, columns, key=None, subquery_values=None):
+        """Returns predicate(row) -> bool for rows laid out as `columns`."""
+        cache_key = ("key", key, tuple(columns)) if key is not None else None
+        shape = condition_shape(condition) if key is not None else None
+        compiled = self.entries.get(cache_key) if cache_key is not None else None
+        if compiled is not None and compiled.shape != shape:
+            compiled = None
+        if compiled is None:
+            source = generate_source(condition, columns)
+            if cache_key is None:
+                cache_key = ("source", source)
+                compiled = self.entries.get(cache_key)
+            if compiled is None:
+                self.misses += 1
+                compiled = self.entries[cache_key] = CompiledPredicate(source, shape)
+                if len(self.entries) > self.capacity:
+                    self.entries.popitem(last=False)
+            else:
+                self.hits += 1
+        else:
+            self.hits += 1
+        self.entries.move_to_end(cache_key)
+        return compiled.bind(condition, subquery_values)
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+PREDICATES = PredicateCompiler()
+
+
+def compile_predicate(condition, columns, key=None, subquery_values=None):
+    """predicate(row) for a condition, compiled through the shared PredicateCompiler."""
+    return PREDICATES.compile(condition, columns, key, subquery_values)
+
+
+def filter_rows(rows, condition, columns, key=None, subquery_values=None):
+    """The rows (tuples laid out as `columns`) that satisfy a condition."""
+    if condition is None:
+        return list(rows)
+    return list(filter(compile_predicate(condition, columns, key, subquery_values), rows))
@@ -0,0 +1,144 @@
+# rules.py
+
+import time
+
+from app.ast_nodes import Condition, Expression, Logic
+from app.utils import condition_children, fold_tree
+
+# Maximum number of rule firings per statement before the engine gives up
+DEFAULT_BUDGET = 100000
+
+
+class Rule:
+    """
+    A named rewrite. `pattern(node)` tells whether the rule applies to a
+    node; `rewrite(node, context)` returns the replacement, or None when
+    there is nothing to change. Condition rules are applied to every node
+    of the WHERE tree bottom-up; statement rules receive the SELECT itself
+    and may update it in place (returning it to signal a change).
+    `types` lists the node types a condition rule can match at all, so the
+    engine never calls its pattern on other nodes.
+    """
+
+    __slots__ = ("name", "pattern", "rewrite", "scope", "types")
+
+    def __init__(self, name, pattern, rewrite, scope="condition", types=("LOGIC", "CONDITION", "EXPRESSION")):
+        self.name = name
+        self.pattern = pattern
+        self.rewrite = rewrite
+        self.scope = scope
+        self.types = types
+
+
+def with_children(node, children):
+    """node with its operands replaced, or node itself if none changed."""
+    original = condition_children(node)
+    if len(original) == len(children) and all(a is b for a, b in zip(original, children)):
+        return node
+    if node.type == "LOGIC":
+        return Logic(node.op, list(children))
+    if node.type == "CONDITION":
+        return Condition(children[0], node.op, children[1])
+    return Expression(node.op, children[0], children[1])
+
+
+class RuleEngine:
+    """
+    Applies rules until nothing changes (a fixpoint) or `budget` rule
+    firings have been spent. Each round walks the WHERE tree bottom-up and
+    rewrites a node until no rule matches it any more; nodes that reached
+    their fixpoint are remembered and skipped in later rounds, so only the
+    parts of the tree touched by a rewrite are visited again.
+    """
+
+    def __init__(self, rules, budget=DEFAULT_BUDGET):
+        self.rules = list(rules)
+        self.condition_rules = {}  # node type -> rules in registration order
+        for rule in self.rules:
+            if rule.scope == "condition":
+                for node_type in rule.types:
+                    self.condition_rules.setdefault(node_type, []).append(rule)
+        self.statement_rules = [rule for rule in self.rules if rule.scope == "statement"]
+        self.budget = budget
+        self.remaining = budget
+        self.exhausted = False
+        self.rounds = 0
+        # rule name -> [times fired, times tried, seconds spent]
+        self.stats = {rule.name: [0, 0, 0.0] for rule in self.rules}
+
+    def run(self, stmt, context):
+        """Rewrites stmt (and stmt.where) in place; returns the number of rounds."""
+        done = {}  # id(node) -> node already at its fixpoint
+
+        rounds = 0
+        while not self.exhausted:
+            rounds += 1
+            changed = False
+            for rule in self.statement_rules:
+                if self.apply(rule, stmt, context) is not None:
+                    changed = True
+            if stmt.where is not None:
+                where = self.rewrite_tree(stmt.where, context, done)
+                if where is not stmt.where:
+                    stmt.where = where
+                    changed = True
+            if not changed:
+                break
+        self.rounds += rounds
+        return rounds
+
+    def rewrite_tree(self, root, context, done):
+        condition_rules = self.condition_rules
+
+        def children(node):
+            return () if id(node) in done else condition_children(node)
+
+        def combine(node, rewritten):
+            if not rewritten and node.type not in condition_rules or id(node) in done:
+                return node
+            node = self.rewrite_node(with_children(node, rewritten), context)
+            done[id(node)] = node
+            return node
+
+        return fold_tree(root, combine, children)
+
+    def rewrite_node(self, node, context):
+        progress = True
+        while progress and not self.exhausted:
+            progress = False
+            for rule in self.condition_rules.get(node.type, ()):
+                result = self.apply(rule, node, context)
+                if result is not None:
+                    node = result
+                    progress = True
+                    break
+        return node
+
+    def apply(self, rule, node, context):
+        if not rule.pattern(node):
+            return None
+        stats = self.stats[rule.name]
+        start = time.perf_counter()
+        result = rule.rewrite(node, context)
+        stats[2] += time.perf_counter() - start
+        stats[1] += 1
+        if result is not None:
+            stats[0] += 1
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.exhausted = True
+        return result
+
+    def report(self, log):
+        """Appends per-rule firing counts and timings to an optimization log."""
+        for name, (fired, tried, seconds) in self.stats.items():
+            if tried:
+                log.append(
+                    f"Rule {name}: fired {fired} time(s) in {seconds * 1000:.3f} ms "
+                    f"({tried} attempt(s))"
+                )
+        if self.exhausted:
+            log.append(
+                f"Rewrite budget of {self.budget} rule firings exhausted "
+                f"after {self.rounds} round(s)"
+            )
@@ -1,46 +1,43 @@
-import os
-import json
-
-# Load schema from JSON file
-SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '../schema/mock_schema.json')
-
-try:
-    with open(SCHEMA_PATH, 'r') as f:
-        SCHEMA = json.load(f)
-except FileNotFoundError:
-    print(f"Error: Schema file not found at {SCHEMA_PATH}")
-    SCHEMA = {}
-except json.JSONDecodeError as e:
-    print(f"Error: Invalid JSON in schema file: {e}")
-    SCHEMA = {}
-
-def validate(ast):
+from app.catalog import Catalog, DEFAULT_SCHEMA_PATH
+
+SCHEMA_PATH = DEFAULT_SCHEMA_PATH
+
+# Loaded lazily on first lookup and reloaded whenever the schema file changes
+CATALOG = Catalog(SCHEMA_PATH)
+
+
+def __getattr__(name):
+    # SCHEMA used to be a dict loaded at import time; keep it readable
+    if name == "SCHEMA":
+        return CATALOG.as_dict()
+    raise AttributeError(name)
+
+
+def validate(ast, catalog=None):
+    catalog = catalog or CATALOG
     errors = []
-    # Get the set of tables from the schema keys dynamically
-    valid_tables = set(SCHEMA.keys())
 
     for stmt in ast:
-        if stmt.get("type") == "SELECT":
-            table_name = stmt.get("table")
-            if table_name not in valid_tables:
-                errors.append(f"Table '{table_name}' does not exist.")
+        if stmt.type == "SELECT":
+            errors += validate_select(stmt, catalog)
         else:
-            errors.append(f"Unsupported statement type: {stmt.get('type')}")
+            errors.append(f"Unsupported statement type: {stmt.type}")
     return errors
 
 
-
-def validate_select(stmt):
-    table = stmt["table"]
-    columns = stmt["columns"]
-    where = stmt.get("where")
+def validate_select(stmt, catalog=None):
+    catalog = catalog or CATALOG
+    table = stmt.table
+    columns = stmt.columns
+    where = stmt.where
     errors = []
 
-    if table not in SCHEMA:
+    table_info = catalog.table(table)
+    if table_info is None:
         errors.append(f"Table '{table}' does not exist.")
         return errors  # Can't go further without a valid table
 
-    table_columns = SCHEMA[table]["columns"]
+    table_columns = table_info.column_set
 
     # Check selected columns
     if columns != ["*"]:
@@ -50,34 +47,46 @@ def validate_select(stmt):
 
     # Check WHERE conditions
     if where:
-        errors += validate_condition(where, table_columns)
+        errors += validate_condition(where, table_columns, catalog)
+
+    return errors
 
+
+def validate_subquery(sub, catalog):
+    """An IN-subquery must select exactly one column of an existing table."""
+    if len(sub.columns) != 1 or sub.columns[0] == "*":
+        return [f"IN-subquery on '{sub.table}' must select exactly one column."]
+    table_info = catalog.table(sub.table)
+    if table_info is None:
+        return [f"Table '{sub.table}' does not exist."]
+    errors = []
+    if sub.columns[0] not in table_info.column_set:
+        errors.append(f"Column '{sub.columns[0]}' does not exist in table '{sub.table}'.")
+    if sub.where:
+        errors += validate_condition(sub.where, table_info.column_set, catalog)
     return errors
 
 
-def validate_condition(cond, table_columns):
+def validate_condition(cond, table_columns, catalog=None):
+    catalog = catalog or CATALOG
     errors = []
 
-    cond_type = cond.get("type")
-
-    # Fallback: assume simple condition if type is missing
-    if cond_type is None and all(k in cond for k in ("left", "op", "right")):
-        cond_type = "CONDITION"
-        cond = {
-            "type": "CONDITION",
-            "column": cond["left"],
-            "op": cond["op"],
-            "value": cond["right"]
-        }
-
-    if cond_type == "CONDITION":
-        column = cond["column"]
-        if column not in table_columns:
-            errors.append(f"Column '{column}' not found in table.")
-    elif cond_type == "LOGIC":
-        errors += validate_condition(cond["left"], table_columns)
-        errors += validate_condition(cond["right"], table_columns)
-    else:
-        errors.append("Unknown condition type.")
+    # Walked with an explicit stack so very wide WHERE clauses cannot overflow
+    stack = [cond]
+    while stack:
+        node = stack.pop()
+        node_type = node.type
+
+        if node_type == "LOGIC":
+            stack.extend(reversed(node.conditions))
+        elif node_type in ("CONDITION", "EXPRESSION"):
+            stack.extend((node.right, node.left))
+        elif node_type == "IDENTIFIER":
+            if node.value not in table_columns:
+                errors.append(f"Column '{node.value}' not found in table.")
+        elif node_type == "SUBQUERY":
+            errors += validate_subquery(node, catalog)
+        elif node_type not in ("NUMBER", "STRING", "BOOLEAN"):
+            errors.append("Unknown condition type.")
 
     return errors
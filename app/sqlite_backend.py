@@ -0,0 +1,236 @@
+# sqlite_backend.py
+
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.ast_nodes import Literal
+from app.evaluator import literal_value
+from app.lexer import tokenize
+from app.optimizer import ast_to_sql
+from app.plan_cache import LITERAL_KINDS, PlanCache, fingerprint
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_STATEMENT_CACHE = 256
+
+# Rows fetched from SQLite per fetchmany() call
+DEFAULT_FETCH_SIZE = 1024
+
+SQLITE_TYPES = {"int": "INTEGER", "float": "REAL"}
+
+# The parameter slots of a fingerprint ('?' occurs in no other token)
+PLACEHOLDER = re.compile("|".join(re.escape(slot) for slot in LITERAL_KINDS.values()))
+
+
+def parameterize(sql):
+    """
+    Returns (key, text, parameters) for an SQL statement: `key` is its
+    literal-normalized fingerprint, `text` the statement with every literal
+    replaced by a `?` placeholder and `parameters` the literal values.
+    """
+    key, literals = fingerprint(tokenize(sql))
+    text = PLACEHOLDER.sub("?", key)
+    return key, text, [literal_value(Literal(kind, value)) for kind, value in literals]
+
+
+class PooledConnection:
+    """
+    An SQLite connection that sends statements `?`-parameterized (see
+    parameterize()). Statements that differ only in their literals share
+    one text, so SQLite's own per-connection statement cache (sized by
+    `capacity`) reuses the compiled statement instead of preparing it
+    again. The parameterized form of each SQL string is kept in an LRU of
+    the same size, so repeated statements are not tokenized again; its
+    hits and misses count that cache, not SQLite's.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_STATEMENT_CACHE):
+        self.conn = sqlite3.connect(path, check_same_thread=False,
+                                    cached_statements=capacity)
+        self.capacity = capacity
+        self.statements = OrderedDict()   # sql -> (parameterized text, parameters)
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, sql):
+        """(parameterized text, parameters) for sql; repeated sql skips parameterize()."""
+        cached = self.statements.get(sql)
+        if cached is not None:
+            self.statements.move_to_end(sql)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        _, text, parameters = parameterize(sql)
+        cached = self.statements[sql] = (text, tuple(parameters))
+        if len(self.statements) > self.capacity:
+            self.statements.popitem(last=False)
+        return cached
+
+    def execute(self, sql):
+        text, parameters = self.prepare(sql)
+        return self.conn.execute(text, parameters)
+
+    def close(self):
+        self.conn.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of up to `size` connections to one SQLite file.
+    Connections are opened on first demand; acquiring blocks while all of
+    them are in use.
+    """
+
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, statement_cache=DEFAULT_STATEMENT_CACHE):
+        self.path = path
+        self.size = size
+        self.statement_cache = statement_cache
+        self.idle = queue.LifoQueue()
+        self.opened = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if len(self.opened) < self.size:
+                conn = PooledConnection(self.path, self.statement_cache)
+                self.opened.append(conn)
+                return conn
+        return self.idle.get()
+
+    def close(self):
+        with self.lock:
+            for conn in self.opened:
+                conn.close()
+            self.opened = []
+
+    def stats(self):
+        return {
+            "connections": len(self.opened),
+            "statement_hits": sum(conn.hits for conn in self.opened),
+            "statement_misses": sum(conn.misses for conn in self.opened),
+        }
+
+
+class SqliteBackend:
+    """
+    Runs SQL against a local SQLite database: queries go through the plan
+    cache and optimizer, and the optimized SQL (see ast_to_sql) is sent to
+    SQLite. compare() times a query against its optimized rewrite, so the
+    optimizer's rewrites can be measured on a real engine.
+    """
+
+    def __init__(self, path, pool_size=DEFAULT_POOL_SIZE, plan_cache=None,
+                 fetch_size=DEFAULT_FETCH_SIZE):
+        self.pool = ConnectionPool(path, pool_size)
+        self.plan_cache = plan_cache or PlanCache()
+        self.fetch_size = fetch_size
+        self.timings = []
+        # The plan cache is not thread-safe; compiling is cheap next to running
+        self.compile_lock = threading.Lock()
+
+    def create_schema(self, catalog=None):
+        """Creates (if missing) a table, and its declared indexes, for every table of the catalog."""
+        catalog = catalog or self.plan_cache.catalog
+        with self.pool.connection() as conn:
+            for name in catalog.table_names():
+                info = catalog.table(name)
+                columns = ", ".join(
+                    f"{column} {SQLITE_TYPES.get(sql_type.lower(), 'TEXT')}"
+                    for column, sql_type in info.columns.items())
+                conn.conn.execute(f"CREATE TABLE IF NOT EXISTS {name} ({columns})")
+                # SQLite only has B-tree indexes; hash indexes become B-trees too
+                for column in info.indexes:
+                    conn.conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {name}_{column}_idx ON {name} ({column})")
+            conn.conn.commit()
+
+    def insert(self, table, rows):
+        """Inserts rows (sequences in the table's column order)."""
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return
+        placeholders = ", ".join("?" * len(first))
+        with self.pool.connection() as conn:
+            conn.conn.execute(f"INSERT INTO {table} VALUES ({placeholders})", first)
+            conn.conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+            conn.conn.commit()
+
+    def optimized_sql(self, sql):
+        """Optimized SQL text of each statement in sql."""
+        with self.compile_lock:
+            statements, errors = self.plan_cache.compile(sql)
+        if errors:
+            raise ValueError("; ".join(errors))
+        return [ast_to_sql([stmt]) for stmt in statements]
+
+    def stream(self, sql, fetch_size=None):
+        """
+        Yields the rows of a single statement in lists of up to fetch_size
+        rows, holding one pooled connection until the rows are consumed.
+        """
+        fetch_size = fetch_size or self.fetch_size
+        with self.pool.connection() as conn:
+            cursor = conn.execute(sql)
+            try:
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                cursor.close()
+
+    def execute(self, sql, fetch_size=None):
+        """Optimizes sql and streams the rows of each statement (see stream())."""
+        return [self.stream(text, fetch_size) for text in self.optimized_sql(sql)]
+
+    def compare(self, sql, repeat=3):
+        """
+        Runs a single statement as written and as optimized `repeat` times
+        each and records the best wall-clock time of both. Returns (and
+        appends to self.timings) a dict with both timings, the speedup and
+        the row counts, which should agree.
+        """
+        [optimized] = self.optimized_sql(sql)
+        original_seconds, original_rows = self.time_query(sql, repeat)
+        optimized_seconds, optimized_rows = self.time_query(optimized, repeat)
+        timing = {
+            "original_sql": sql,
+            "optimized_sql": optimized,
+            "original_seconds": original_seconds,
+            "optimized_seconds": optimized_seconds,
+            "speedup": original_seconds / optimized_seconds if optimized_seconds else None,
+            "original_rows": original_rows,
+            "optimized_rows": optimized_rows,
+        }
+        self.timings.append(timing)
+        return timing
+
+    def time_query(self, sql, repeat):
+        best, rows = None, 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = sum(len(batch) for batch in self.stream(sql))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, rows
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,288 @@
+# statistics.py
+
+import csv
+import heapq
+import json
+import os
+import random
+import sqlite3
+import sys
+
+from app.utils import mix64
+
+# Number of equi-depth histogram buckets and most-common values kept per column
+HISTOGRAM_BUCKETS = 20
+MCV_SIZE = 10
+
+# Values tracked exactly before the collector falls back to sketches
+MAX_EXACT_DISTINCT = 10000
+MCV_TRACKED = MCV_SIZE * 10
+RESERVOIR_SIZE = 10000
+KMV_SIZE = 1024
+
+NULL_MARKERS = {"", "NULL", "null", "None"}
+
+_MASK64 = (1 << 64) - 1
+
+
+class ColumnStats:
+    __slots__ = ("null_frac", "distinct", "min", "max", "histogram", "mcv")
+
+    def __init__(self, null_frac=0.0, distinct=0, min=None, max=None, histogram=None, mcv=None):
+        self.null_frac = null_frac
+        self.distinct = distinct
+        self.min = min
+        self.max = max
+        self.histogram = histogram or []   # bucket bounds, len == buckets + 1
+        self.mcv = mcv or []               # [(value, frequency), ...] most common first
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data["mcv"] = [tuple(pair) for pair in data.get("mcv", [])]
+        return cls(**data)
+
+
+class TableStats:
+    __slots__ = ("row_count", "columns")
+
+    def __init__(self, row_count=0, columns=None):
+        self.row_count = row_count
+        self.columns = columns or {}
+
+    def column(self, name):
+        return self.columns.get(name)
+
+    def to_dict(self):
+        return {
+            "row_count": self.row_count,
+            "columns": {name: stats.to_dict() for name, stats in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("row_count", 0),
+            {name: ColumnStats.from_dict(stats) for name, stats in data.get("columns", {}).items()},
+        )
+
+
+class ColumnCollector:
+    """
+    Single-pass statistics for one column in bounded memory: exact value
+    counts until MAX_EXACT_DISTINCT distinct values are seen, then a
+    Misra-Gries summary for the most common values and a k-minimum-values
+    sketch for the distinct count. Histograms come from a reservoir sample.
+    """
+
+    def __init__(self, seed=0):
+        self.rows = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.counts = {}
+        self.exact = True
+        self.kmv = []          # max-heap (negated) of the KMV_SIZE smallest hashes
+        self.kmv_members = set()
+        self.sample = []
+        self.random = random.Random(seed)
+
+    def add(self, value):
+        self.rows += 1
+        if value is None:
+            self.nulls += 1
+            return
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        self._count(value)
+        self._sketch(value)
+
+        seen = self.rows - self.nulls
+        if len(self.sample) < RESERVOIR_SIZE:
+            self.sample.append(value)
+        else:
+            slot = self.random.randrange(seen)
+            if slot < RESERVOIR_SIZE:
+                self.sample[slot] = value
+
+    def _count(self, value):
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+            return
+        if self.exact and len(counts) < MAX_EXACT_DISTINCT:
+            counts[value] = 1
+            return
+        # Too many distinct values: keep a Misra-Gries summary of the heavy ones
+        self.exact = False
+        counts[value] = 1
+        if len(counts) > 2 * MCV_TRACKED:
+            # Batched decrement: subtract the (k+1)-th largest count from all
+            cut = heapq.nlargest(MCV_TRACKED + 1, counts.values())[-1]
+            self.counts = {key: count - cut for key, count in counts.items() if count > cut}
+
+    def _sketch(self, value):
+        h = mix64(value)
+        if h in self.kmv_members:
+            return
+        if len(self.kmv) < KMV_SIZE:
+            heapq.heappush(self.kmv, -h)
+            self.kmv_members.add(h)
+        elif h < -self.kmv[0]:
+            evicted = -heapq.heapreplace(self.kmv, -h)
+            self.kmv_members.discard(evicted)
+            self.kmv_members.add(h)
+
+    def distinct(self):
+        if self.exact:
+            return len(self.counts)
+        if len(self.kmv) < KMV_SIZE:
+            return len(self.kmv)
+        kth = -self.kmv[0]
+        return int((KMV_SIZE - 1) * (_MASK64 + 1) / kth)
+
+    def finish(self):
+        non_null = self.rows - self.nulls
+        histogram = []
+        if self.sample:
+            ordered = sorted(self.sample)
+            buckets = min(HISTOGRAM_BUCKETS, len(ordered))
+            histogram = [ordered[min(len(ordered) - 1, (len(ordered) - 1) * i // buckets)]
+                         for i in range(buckets + 1)]
+            histogram[0], histogram[-1] = self.min, self.max
+
+        mcv = []
+        if non_null:
+            top = heapq.nlargest(MCV_SIZE, self.counts.items(), key=lambda item: item[1])
+            mcv = [(value, count / self.rows) for value, count in top if count > 1]
+
+        return ColumnStats(
+            null_frac=self.nulls / self.rows if self.rows else 0.0,
+            distinct=self.distinct(),
+            min=self.min,
+            max=self.max,
+            histogram=histogram,
+            mcv=mcv,
+        )
+
+
+def convert_value(raw, column_type):
+    """Types a raw CSV field according to the catalog column type."""
+    if raw is None or raw in NULL_MARKERS:
+        return None
+    kind = (column_type or "").lower()
+    try:
+        if kind.startswith("int"):
+            return int(raw)
+        if kind in ("float", "double", "real", "decimal", "numeric"):
+            return float(raw)
+    except ValueError:
+        return None
+    return raw
+
+
+def collect(rows, column_names):
+    """Builds TableStats from an iterable of row tuples in one streaming pass."""
+    collectors = [ColumnCollector(seed=i) for i in range(len(column_names))]
+    row_count = 0
+    for row in rows:
+        row_count += 1
+        for collector, value in zip(collectors, row):
+            collector.add(value)
+    return TableStats(row_count, {
+        name: collector.finish() for name, collector in zip(column_names, collectors)
+    })
+
+
+def analyze_csv(path, table, catalog=None):
+    """ANALYZE a table from a CSV file with a header row."""
+    column_types = catalog.columns(table) if catalog is not None else {}
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        types = [column_types.get(name) for name in header]
+        rows = ([convert_value(raw, kind) for raw, kind in zip(row, types)] for row in reader)
+        return collect(rows, header)
+
+
+def analyze_sqlite(db_path, table, batch_size=10000):
+    """ANALYZE a table stored in an SQLite database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(f'SELECT * FROM "{table}"')
+        names = [column[0] for column in cursor.description]
+
+        def rows():
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                yield from batch
+
+        return collect(rows(), names)
+    finally:
+        conn.close()
+
+
+def stats_path_for(schema_path):
+    """Statistics live next to the schema: mock_schema.json -> mock_schema.stats.json."""
+    if os.path.isdir(schema_path):
+        return os.path.join(schema_path, "stats.json")
+    return os.path.splitext(schema_path)[0] + ".stats.json"
+
+
+def load_statistics(path):
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in statistics file: {e}")
+        return {}
+    return {table: TableStats.from_dict(stats) for table, stats in data.items()}
+
+
+def save_statistics(path, table, stats):
+    """Stores the statistics of one table, keeping those of the others."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        data = {}
+    data[table] = stats.to_dict()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def analyze(table, source, catalog=None):
+    """
+    Collects statistics for table from a .csv file or an SQLite database and
+    persists them next to the catalog's schema file.
+    """
+    from app.semantic import CATALOG
+    catalog = catalog or CATALOG
+
+    if source.endswith(".csv"):
+        stats = analyze_csv(source, table, catalog)
+    else:
+        stats = analyze_sqlite(source, table)
+    save_statistics(stats_path_for(catalog.path), table, stats)
+    return stats
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m app.statistics <table> <data.csv|database.sqlite>")
+        sys.exit(1)
+    result = analyze(sys.argv[1], sys.argv[2])
+    print(f"✅ Analyzed {sys.argv[1]}: {result.row_count} rows")
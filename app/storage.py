@@ -0,0 +1,339 @@
+# storage.py
+
+import json
+import mmap
+import os
+
+import numpy as np
+
+from app.evaluator import literal_value
+
+# Version 2 added dictionary-encoded columns; version 1 tables are still read
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+
+# Rows per row group; each row group has its own zone map
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+META_FILE = "_table.json"
+
+# On-disk layouts of the column kinds. Numeric columns are a plain
+# little-endian array (NaN marks a missing float). String columns are
+# (rows + 1) int64 offsets, one validity byte per row, then the UTF-8 data.
+# Dictionary columns are little-endian codes; the sorted dictionary is
+# kept in the table metadata.
+NUMERIC_DTYPES = {"int64": np.dtype("<i8"), "float64": np.dtype("<f8")}
+
+# String columns with at most this many distinct values (and at most one
+# per two rows) are dictionary-encoded
+DICTIONARY_MAX_VALUES = 65536
+
+FLIPPED = {"=": "=", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+
+def column_kind(array):
+    if array.dtype.kind in "iub":
+        return "int64"
+    if array.dtype.kind == "f":
+        return "float64"
+    return "string"
+
+
+def code_dtype(size):
+    """Smallest signed integer type for codes 0..size-1 plus -1 for missing values."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if size <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def dictionary_encode(array):
+    """
+    (codes, dictionary) of a string column: the dictionary holds the
+    distinct values in sorted order, so comparing codes orders rows the
+    same way as comparing the strings. Missing values get code -1.
+    """
+    present = np.not_equal(array, None)
+    dictionary, inverse = np.unique(array[present], return_inverse=True)
+    codes = np.full(len(array), -1, dtype=code_dtype(len(dictionary)))
+    codes[present] = inverse
+    return codes, dictionary
+
+
+def should_encode(array, dictionary):
+    return len(dictionary) <= DICTIONARY_MAX_VALUES and len(dictionary) * 2 <= len(array)
+
+
+def decode(dictionary, codes):
+    """The strings for an array of codes (None for -1)."""
+    if not len(dictionary):
+        return np.full(len(codes), None, dtype=object)
+    values = dictionary[codes]
+    missing = codes < 0
+    if missing.any():
+        values[missing] = None
+    return values
+
+
+def zone_map(array, kind):
+    """[min, max, null count] of one row group of a column (min/max None if all null)."""
+    if kind == "string":
+        values = [value for value in array.tolist() if value is not None]
+    elif kind == "float64":
+        values = array[~np.isnan(array)]
+    else:
+        values = array
+    nulls = len(array) - len(values)
+    if not len(values):
+        return [None, None, nulls]
+    if kind == "string":
+        return [min(values), max(values), nulls]
+    return [values.min().item(), values.max().item(), nulls]
+
+
+def encode_column(array, kind):
+    if kind != "string":
+        return np.ascontiguousarray(array, dtype=NUMERIC_DTYPES[kind]).tobytes()
+    values = array.tolist()
+    encoded = [b"" if value is None else str(value).encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    valid = np.array([value is not None for value in values], dtype=np.uint8)
+    return offsets.tobytes() + valid.tobytes() + b"".join(encoded)
+
+
+def write_table(root, name, columns, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    Stores a table (a mapping of column name to NumPy array, as held by
+    app.executor.ColumnTable) under root/name: one file per column plus
+    the table metadata with a zone map per row group and column.
+    """
+    directory = os.path.join(root, name)
+    os.makedirs(directory, exist_ok=True)
+    rows = len(next(iter(columns.values()))) if columns else 0
+    kinds = {column: column_kind(array) for column, array in columns.items()}
+    dictionaries = {}
+    for column, array in columns.items():
+        data = None
+        if kinds[column] == "string":
+            codes, dictionary = dictionary_encode(array)
+            if should_encode(array, dictionary):
+                dictionaries[column] = {"dtype": codes.dtype.name, "values": dictionary.tolist()}
+                data = codes.astype(codes.dtype.newbyteorder("<")).tobytes()
+        tmp_path = os.path.join(directory, column + ".col.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data if data is not None else encode_column(array, kinds[column]))
+        os.replace(tmp_path, os.path.join(directory, column + ".col"))
+
+    row_groups = []
+    for start in range(0, rows, row_group_size):
+        stop = min(start + row_group_size, rows)
+        row_groups.append({
+            "start": start,
+            "rows": stop - start,
+            "zones": {column: zone_map(array[start:stop], kinds[column])
+                      for column, array in columns.items()},
+        })
+    meta = {
+        "version": FORMAT_VERSION,
+        "rows": rows,
+        "row_group_size": row_group_size,
+        "columns": {column: "dictionary" if column in dictionaries else kind
+                    for column, kind in kinds.items()},
+        "dictionaries": dictionaries,
+        "row_groups": row_groups,
+    }
+    tmp_path = os.path.join(directory, META_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+
+def map_file(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class StoredColumns:
+    """Mapping view of a stored table's columns; whole columns are read (and decoded) on access."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, column):
+        return self.table.values(column)
+
+    def __iter__(self):
+        return iter(self.table.kinds)
+
+    def __len__(self):
+        return len(self.table.kinds)
+
+    def __contains__(self, column):
+        return column in self.table.kinds
+
+    def items(self):
+        return ((column, self[column]) for column in self)
+
+
+class StoredTable:
+    """
+    A table in columnar storage. Column files are memory-mapped: reading
+    a numeric range is a zero-copy view, and string ranges decode only the
+    rows asked for.
+    """
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get("version") not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported storage format {meta.get('version')} for table '{name}'")
+        self.rows = meta["rows"]
+        self.kinds = meta["columns"]
+        self.dictionaries = {
+            column: (np.dtype(encoding["dtype"]).newbyteorder("<"),
+                     np.array(encoding["values"], dtype=object))
+            for column, encoding in meta.get("dictionaries", {}).items()}
+        self.groups = [(group["start"], group["start"] + group["rows"], group["zones"])
+                       for group in meta["row_groups"]]
+        self.maps = {}
+        self.columns = StoredColumns(self)
+
+    def mapped(self, column):
+        mm = self.maps.get(column)
+        if mm is None:
+            if column not in self.kinds:
+                raise ValueError(f"Column '{column}' is not stored for table '{self.name}'")
+            mm = self.maps[column] = map_file(os.path.join(self.directory, column + ".col"))
+        return mm
+
+    def dictionary(self, column):
+        """Sorted dictionary of an encoded column, or None."""
+        encoding = self.dictionaries.get(column)
+        return encoding[1] if encoding is not None else None
+
+    def values(self, column):
+        """The whole column, with dictionary codes decoded to strings."""
+        data = self.read(column, 0, self.rows)
+        dictionary = self.dictionary(column)
+        return decode(dictionary, data) if dictionary is not None else data
+
+    def read(self, column, start, stop):
+        """Rows start..stop of a column as stored (codes for encoded columns)."""
+        kind = self.kinds[column]
+        mm = self.mapped(column)
+        if kind == "dictionary":
+            dtype = self.dictionaries[column][0]
+            return np.frombuffer(mm, dtype=dtype, count=stop - start, offset=start * dtype.itemsize)
+        if kind != "string":
+            dtype = NUMERIC_DTYPES[kind]
+            return np.frombuffer(mm, dtype=dtype, count=stop - start, offset=start * dtype.itemsize)
+        offsets = np.frombuffer(mm, dtype="<i8", count=self.rows + 1)
+        valid_base = (self.rows + 1) * 8
+        data_base = valid_base + self.rows
+        valid = mm[valid_base + start:valid_base + stop]
+        lo = offsets[start:stop].tolist()
+        hi = offsets[start + 1:stop + 1].tolist()
+        base = data_base + (lo[0] if lo else 0)
+        data = mm[base:data_base + (hi[-1] if hi else 0)]
+        first = lo[0] if lo else 0
+        values = np.empty(stop - start, dtype=object)
+        values[:] = [data[a - first:b - first].decode("utf-8") if ok else None
+                     for a, b, ok in zip(lo, hi, valid)]
+        return values
+
+    def take(self, column, rows):
+        """The rows with the given (ascending) ids of a column, as stored."""
+        if self.kinds[column] != "string":
+            return self.read(column, 0, self.rows)[rows]
+        values = np.empty(len(rows), dtype=object)
+        values[:] = [self.read(column, row, row + 1)[0] for row in rows.tolist()]
+        return values
+
+    def row_groups(self):
+        """(start, stop, zone map) of every row group."""
+        return self.groups
+
+
+class ColumnStore:
+    """A directory of stored tables, one subdirectory per table."""
+
+    def __init__(self, root):
+        self.root = root
+        self.tables = {}
+
+    def has_table(self, name):
+        return os.path.exists(os.path.join(self.root, name, META_FILE))
+
+    def table(self, name):
+        table = self.tables.get(name)
+        if table is None and self.has_table(name):
+            table = self.tables[name] = StoredTable(os.path.join(self.root, name), name)
+        return table
+
+    def write_table(self, name, columns, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        self.tables.pop(name, None)
+        write_table(self.root, name, columns, row_group_size)
+
+
+def zone_column(name):
+    return name.split(".", 1)[-1]
+
+
+def comparison_may_match(op, zone, value):
+    low, high, nulls = zone
+    if low is None:
+        return False   # every value is missing, and missing values match nothing
+    if isinstance(value, str) != isinstance(low, str):
+        return True
+    if op == "=":
+        return low <= value <= high
+    if op == "!=":
+        return not (low == high == value)
+    if op == "<":
+        return low < value
+    if op == "<=":
+        return low <= value
+    if op == ">":
+        return high > value
+    if op == ">=":
+        return high >= value
+    return True
+
+
+def row_group_may_match(condition, zones):
+    """
+    False only if the zone map proves no row of the group satisfies the
+    condition. Comparisons of a column with a literal are checked against
+    the column's min/max; anything else is assumed to match.
+    """
+    stack = [(condition, False)]
+    results = []
+    while stack:
+        node, expanded = stack.pop()
+        if node.type == "LOGIC":
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.conditions)
+                continue
+            operands = results[-len(node.conditions):]
+            del results[-len(node.conditions):]
+            results.append(all(operands) if node.op == "AND" else any(operands))
+        elif node.type == "BOOLEAN":
+            results.append(bool(node.value))
+        elif node.type == "CONDITION" and node.op in FLIPPED:
+            column, literal, op = node.left, node.right, node.op
+            if column.type != "IDENTIFIER":
+                column, literal, op = node.right, node.left, FLIPPED[node.op]
+            zone = zones.get(zone_column(column.value)) if column.type == "IDENTIFIER" else None
+            if zone is None or literal.type not in ("NUMBER", "STRING"):
+                results.append(True)
+            else:
+                results.append(comparison_may_match(op, zone, literal_value(literal)))
+        else:
+            results.append(True)
+    return results[0]
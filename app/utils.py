@@ -1,5 +1,7 @@
 import os
 
+_MASK64 = (1 << 64) - 1
+
 
 def save_to_file(content, filepath):
     """
@@ -11,6 +13,56 @@ def save_to_file(content, filepath):
         f.write(content)
 
 
+def mix64(value):
+    """splitmix64 finalizer over Python's hash, so sketches see uniformly spread hashes."""
+    x = hash(value) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def condition_children(node):
+    """Child nodes of a condition/expression node; subqueries are leaves."""
+    node_type = getattr(node, "type", None)
+    if node_type == "LOGIC":
+        return node.conditions
+    if node_type == "CONDITION" or node_type == "EXPRESSION":
+        return (node.left, node.right)
+    return ()
+
+
+def logic_children(node):
+    """Operands of a LOGIC node; comparisons are treated as leaves."""
+    if getattr(node, "type", None) == "LOGIC":
+        return node.conditions
+    return ()
+
+
+def fold_tree(root, combine, children=condition_children):
+    """
+    Evaluates a tree bottom-up without recursion: combine(node, child_results)
+    is called for every node once all of its children have been combined.
+    Used by the optimizer and IR passes so deep or very wide WHERE clauses
+    never hit the interpreter's recursion limit.
+    """
+    results = []
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        kids = children(node)
+        if kids and not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(kids))
+            continue
+        if kids:
+            args = results[-len(kids):]
+            del results[-len(kids):]
+        else:
+            args = []
+        results.append(combine(node, args))
+    return results[0]
+
+
 def ast_to_sql(ast):
     """
     Converts the AST back into an SQL query string.
@@ -32,10 +84,8 @@ def ast_to_sql(ast):
             return ""
 
         if cond.get("type") == "LOGIC":
-            left = condition_to_str(cond["left"])
-            right = condition_to_str(cond["right"])
             op = cond["op"]
-            return f"({left} {op} {right})"
+            return "(" + f" {op} ".join(condition_to_str(c) for c in cond["conditions"]) + ")"
 
         # Simple condition: {'left': ..., 'op': ..., 'right': ...}
         left = cond["left"]
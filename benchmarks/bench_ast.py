@@ -0,0 +1,85 @@
+"""
+Compares the old dict-based AST with the slotted node classes in
+app/ast_nodes.py: memory per WHERE-clause node and type-dispatch speed.
+
+    python -m benchmarks.bench_ast [terms]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from app.lexer import tokenize_compact
+from app.parser import Parser
+
+
+def build_sql(terms):
+    return "SELECT id FROM users WHERE " + " OR ".join(
+        f"(age > {i} AND status = 'active')" for i in range(terms)
+    )
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, after - before
+
+
+def count_comparisons_dict(where):
+    count = 0
+    stack = [where]
+    while stack:
+        node = stack.pop()
+        node_type = node.get("type")
+        if node_type == "LOGIC":
+            stack.extend(node["conditions"])
+        elif node_type == "CONDITION":
+            count += 1
+    return count
+
+
+def count_comparisons_nodes(where):
+    count = 0
+    stack = [where]
+    while stack:
+        node = stack.pop()
+        node_type = node.type
+        if node_type == "LOGIC":
+            stack.extend(node.conditions)
+        elif node_type == "CONDITION":
+            count += 1
+    return count
+
+
+def best_of(runs, func, arg):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    terms = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    tokens = tokenize_compact(build_sql(terms))
+
+    stmt, node_bytes = measure_memory(lambda: Parser(tokens).parse()[0])
+    as_dict, dict_bytes = measure_memory(stmt.to_dict)
+    node_count = terms * 7 + 1  # per term: AND, 2 conditions, 4 operands
+
+    print(f"WHERE clause with {terms} OR'd terms (~{node_count} nodes)")
+    print(f"  dict AST : {dict_bytes / node_count:8.1f} bytes/node")
+    print(f"  node AST : {node_bytes / node_count:8.1f} bytes/node")
+
+    dict_time = best_of(5, count_comparisons_dict, as_dict["where"])
+    node_time = best_of(5, count_comparisons_nodes, stmt.where)
+    print(f"  dispatch : dict {dict_time * 1000:.1f} ms, nodes {node_time * 1000:.1f} ms "
+          f"({dict_time / node_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
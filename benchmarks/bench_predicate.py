@@ -0,0 +1,71 @@
+"""
+Compares row-at-a-time WHERE evaluation by walking the condition tree for
+every row with the compiled predicates of app/predicate.py.
+
+    python -m benchmarks.bench_predicate [rows]
+"""
+
+import sys
+import time
+
+from app.evaluator import COMPARISONS, divide, literal_value
+from app.lexer import tokenize
+from app.optimizer import optimize
+from app.parser import parse
+from app.predicate import PredicateCompiler, column_offset
+
+SQL = ("SELECT id FROM users WHERE age > 30 AND status = 'active' "
+       "AND (age / 2 < 40 OR name = 'x') AND id + 1 > 10;")
+COLUMNS = ["users.id", "users.name", "users.age", "users.status", "users.email"]
+ARITHMETIC = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": divide,
+}
+
+
+def interpret(node, row):
+    """Tree-walking evaluation of one row (what the compiler replaces)."""
+    node_type = node.type
+    if node_type == "LOGIC":
+        if node.op == "AND":
+            return all(interpret(c, row) for c in node.conditions)
+        return any(interpret(c, row) for c in node.conditions)
+    if node_type == "CONDITION":
+        return COMPARISONS[node.op](interpret(node.left, row), interpret(node.right, row))
+    if node_type == "EXPRESSION":
+        return ARITHMETIC[node.op](interpret(node.left, row), interpret(node.right, row))
+    if node_type == "IDENTIFIER":
+        return row[column_offset(COLUMNS, node.value)]
+    if node_type == "BOOLEAN":
+        return node.value
+    return literal_value(node)
+
+
+def best_of(runs, func):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rows = [(i, f"u{i}", i % 90, "active" if i % 3 else "idle", "") for i in range(count)]
+    condition = optimize(parse(tokenize(SQL)))[0].where
+    predicate = PredicateCompiler().compile(condition, COLUMNS)
+
+    assert [interpret(condition, row) for row in rows[:1000]] == \
+        [bool(predicate(row)) for row in rows[:1000]]
+    walk_time = best_of(3, lambda: [row for row in rows if interpret(condition, row)])
+    compiled_time = best_of(3, lambda: list(filter(predicate, rows)))
+    print(f"WHERE over {count} rows")
+    print(f"  tree walk : {walk_time * 1000:8.1f} ms")
+    print(f"  compiled  : {compiled_time * 1000:8.1f} ms ({walk_time / compiled_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
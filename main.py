@@ -7,11 +7,41 @@ from app.optimizer import optimize
 from app.ir_generator import generate_ir, normalize_condition
 from app.utils import save_to_file
 
+def compile_sql_file(path, workers=None):
+    from app.batch import compile_file
+    from app.optimizer import ast_to_sql
+
+    print(f"📂 Compiling SQL file: {path}\n")
+    compiled, failed = 0, 0
+    os.makedirs("outputs", exist_ok=True)
+    with open("outputs/optimized_query.sql", "w") as out:
+        for result in compile_file(path, workers=workers):
+            if result["errors"]:
+                failed += 1
+                for error in result["errors"]:
+                    print(f"❌ Statement at byte {result['offset']}: {error}")
+                continue
+            compiled += 1
+            out.write(ast_to_sql(result["statements"]) + "\n")
+
+    print(f"\n✅ {compiled} statement(s) optimized, {failed} failed.")
+    print("✅ Optimized SQL saved to outputs/optimized_query.sql")
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python main.py '<SQL query>'")
+        print("       python main.py --file <path.sql> [workers]")
         sys.exit(1)
 
+    if sys.argv[1] == "--file":
+        if len(sys.argv) < 3:
+            print("Usage: python main.py --file <path.sql> [workers]")
+            sys.exit(1)
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        compile_sql_file(sys.argv[2], workers)
+        return
+
     sql_query = " ".join(sys.argv[1:]).strip()
     print("🔍 Original SQL Input:\n" + sql_query + "\n")
 
@@ -44,8 +74,8 @@ def main():
         print()
 
         for stmt in optimized_ast:
-            if stmt.get("where"):
-                stmt["where"] = normalize_condition(stmt["where"])
+            if stmt.where:
+                stmt.where = normalize_condition(stmt.where)
 
         ir = generate_ir(optimized_ast)
         print("🛠 Intermediate Representation (Relational Algebra):")
@@ -190,8 +190,8 @@ class SQLQueryOptimizerGUI(QWidget):
 
             optimized_ast = optimize(ast)
             for stmt in optimized_ast:
-                if stmt.get("where"):
-                    stmt["where"] = normalize_condition(stmt["where"])
+                if stmt.where:
+                    stmt.where = normalize_condition(stmt.where)
             self.append_log(f"> Optimized AST:\n{optimized_ast}")
 
             ir = generate_ir(optimized_ast)
@@ -0,0 +1,50 @@
+import pytest
+from app import batch
+from app.batch import compile_chunk, iter_statement_ranges, compile_file
+
+
+def test_statement_ranges_respect_string_literals():
+    sql = b"SELECT id FROM users WHERE status = 'a;b'; SELECT * FROM orders;"
+    ranges = list(iter_statement_ranges(sql))
+
+    assert len(ranges) == 2
+    assert sql[ranges[0][0]:ranges[0][1]].endswith(b"'a;b';")
+
+
+def test_compile_file_preserves_order(tmp_path):
+    path = tmp_path / "dump.sql"
+    path.write_text("".join(f"SELECT id FROM users WHERE age > {i};\n" for i in range(50)) + "SELECT x FROM nope;")
+
+    results = list(compile_file(str(path), workers=2, chunk_bytes=64))
+
+    assert len(results) == 51
+    ages = [r["statements"][0]["where"]["right"]["value"] for r in results[:50]]
+    assert ages == [str(i) for i in range(50)]
+    assert results[-1]["errors"]
+
+
+def test_compile_file_repeats_in_subqueries(tmp_path):
+    path = tmp_path / "dump.sql"
+    path.write_text("SELECT id FROM users WHERE id IN (SELECT user_id FROM orders);\n" * 3)
+
+    results = list(compile_file(str(path), workers=1))
+
+    assert [r["errors"] for r in results] == [[], [], []]
+    assert all(r["statements"][0]["joins"][0]["on"]["right"]["value"] == "orders.user_id" for r in results)
+
+
+def test_unexpected_errors_are_reported_per_statement(tmp_path, monkeypatch):
+    path = tmp_path / "dump.sql"
+    path.write_text("SELECT id FROM users; SELECT name FROM users; SELECT age FROM users;")
+    compile_statement = batch.compile_statement
+
+    def flaky(sql):
+        if "name" in sql:
+            raise AttributeError("boom")
+        return compile_statement(sql)
+
+    monkeypatch.setattr(batch, "compile_statement", flaky)
+    results = compile_chunk(str(path), 0, path.stat().st_size)
+
+    assert [r["offset"] for r in results] == [0, 21, 45]
+    assert [r["errors"] for r in results] == [[], ["AttributeError: boom"], []]
@@ -0,0 +1,42 @@
+from app.lexer import tokenize
+from app.parser import parse
+from app.optimizer import ast_to_sql, optimize
+from app.ir_generator import generate_ir
+from app.bloom import BloomFilter, semi_join
+from app.join_order import JoinEdge, Relation, choose_join_order
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter.from_keys(range(0, 20000, 2), error_rate=0.01)
+    assert all(key in bloom for key in range(0, 20000, 2))
+
+    false_positives = sum(key in bloom for key in range(1, 20000, 2))
+    assert false_positives < 10000 * 0.03
+    assert bloom.error_rate() < 0.02
+
+
+def test_semi_join_keeps_each_outer_row_once():
+    outer = [(1, "a"), (2, "b"), (3, "c"), (2, "d")]
+    inner = [2, 2, 2, 3, 7]
+    bloom = BloomFilter.from_keys(inner)
+
+    assert list(semi_join(outer, lambda row: row[0], inner, bloom)) == [(2, "b"), (3, "c"), (2, "d")]
+
+
+def test_semi_join_pushes_bloom_into_large_outer_scan():
+    relations = [Relation("users", 1000000, distinct={"id": 1000000}),
+                 Relation("orders", 5000, distinct={"user_id": 1000})]
+    plan, _ = choose_join_order(relations, [JoinEdge(0, "id", 1, "user_id", semi=True)])
+
+    assert plan.semi and plan.bloom and plan.algorithm == "hash_semi"
+    assert plan.left.relation == 0
+    assert plan.rows == 1000
+
+
+def test_in_subquery_keeps_in_semantics_in_sql():
+    sql = "SELECT name FROM users WHERE age > 30 AND id IN (SELECT user_id FROM orders WHERE amount > 5);"
+    ast = optimize(parse(tokenize(sql)))
+
+    assert ast[0].joins[0].type == "SEMI_JOIN"
+    assert ast_to_sql(ast) == sql
+    assert "⋉hash_semi" in generate_ir(ast)
@@ -0,0 +1,50 @@
+import json
+import os
+import pytest
+from app.catalog import Catalog, build_sharded_catalog, build_sqlite_catalog
+
+SCHEMA = {
+    "users": {"columns": {"id": "int", "name": "string"}},
+    "orders": {"columns": {"order_id": "int", "user_id": "int"}},
+}
+
+
+def write_schema(path, schema, mtime_ns):
+    path.write_text(json.dumps(schema))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_catalog_lookups_and_hot_reload(tmp_path):
+    path = tmp_path / "schema.json"
+    write_schema(path, SCHEMA, 1_000_000_000)
+    catalog = Catalog(str(path))
+    reloads = []
+    catalog.add_listener(lambda: reloads.append(True))
+
+    assert catalog.has_table("users")
+    assert catalog.has_column("users", "name")
+    assert not catalog.has_column("users", "email")
+
+    schema = dict(SCHEMA, users={"columns": {"id": "int", "email": "string"}})
+    write_schema(path, schema, 2_000_000_000)
+
+    assert catalog.has_column("users", "email")
+    assert reloads == [True]
+
+
+@pytest.mark.parametrize("layout", ["sharded", "sqlite"])
+def test_scalable_catalog_layouts(tmp_path, layout):
+    schema = {f"t{i}": {"columns": {"id": "int", f"c{i}": "string"}, "indexes": {"id": "hash"}}
+              for i in range(500)}
+    if layout == "sharded":
+        path = str(tmp_path / "catalog")
+        build_sharded_catalog(schema, path, shards=16)
+    else:
+        path = str(tmp_path / "catalog.sqlite")
+        build_sqlite_catalog(schema, path)
+    catalog = Catalog(path)
+
+    assert catalog.columns("t42") == {"id": "int", "c42": "string"}
+    assert catalog.table("t42").indexes == {"id": "hash"}
+    assert not catalog.has_table("missing")
+    assert len(catalog.table_names()) == 500
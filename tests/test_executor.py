@@ -0,0 +1,142 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.executor import Database, execute, fetch_rows, run
+from app.lexer import tokenize
+from app.optimizer import optimize
+from app.parser import parse
+from app.predicate import filter_rows
+from app.plan import Join, Project, Scan
+
+
+def sample_database():
+    db = Database()
+    db.add_table("users", {
+        "id": [1, 2, 3, 4, 5],
+        "name": ["ann", "bob", "cat", "dan", "eve"],
+        "age": [20, 35, 40, 50, 17],
+        "status": ["a", "b", "a", "b", "a"],
+        "email": ["", "", "", "", ""],
+    })
+    db.add_table("orders", {
+        "order_id": [10, 11, 12, 13],
+        "user_id": [2, 2, 4, 5],
+        "amount": [10.0, 3.0, 7.5, 1.0],
+        "status": ["p", "p", "q", "q"],
+    })
+    return db
+
+
+def test_filters_and_projections_run_over_column_batches():
+    db = sample_database()
+    [result] = execute("SELECT name, age FROM users WHERE age > 18 AND status = 'a';", db, batch_size=2)
+    batches = list(result)
+
+    assert all(isinstance(array, np.ndarray) for batch in batches for array in batch.values())
+    assert fetch_rows(batches) == [("ann", 20), ("cat", 40)]
+    [result] = execute("SELECT id FROM users WHERE age / 3 = 16 OR id = 5 LIMIT 1;", db)
+    assert fetch_rows(result) == [(4,)]
+
+
+def test_semi_join_keeps_each_outer_row_once():
+    db = sample_database()
+    [result] = execute(
+        "SELECT name FROM users WHERE age > 18 AND id IN (SELECT user_id FROM orders WHERE amount > 2);",
+        db, batch_size=3)
+
+    assert fetch_rows(result) == [("bob",), ("dan",)]
+
+
+def test_in_subqueries_must_select_one_known_column():
+    db = sample_database()
+    for sub in ("SELECT * FROM orders", "SELECT user_id, amount FROM orders",
+                "SELECT nope FROM orders", "SELECT user_id FROM nope"):
+        with pytest.raises(ValueError):
+            execute(f"SELECT name FROM users WHERE id IN ({sub});", db)
+
+
+def test_vectorized_join_matches_every_pair():
+    db = sample_database()
+    plan = Project(Join(Scan("users", ["id", "name"], 5), Scan("orders", ["user_id", "amount"], 4),
+                        [("users.id", "orders.user_id")], "hash"),
+                   ["name", "amount"])
+
+    assert sorted(fetch_rows(run(plan, db, batch_size=2))) == \
+        [("bob", 3.0), ("bob", 10.0), ("dan", 7.5), ("eve", 1.0)]
+
+
+def large_database(rows=20000):
+    db = Database()
+    ids = np.arange(rows)
+    text = np.array(["x"] * rows, dtype=object)
+    db.add_table("users", {"id": ids, "name": text, "age": ids % 100, "status": text, "email": text})
+    db.add_table("orders", {"order_id": ids, "user_id": (ids * 7) % rows, "amount": ids % 10 * 1.0,
+                            "status": text})
+    return db
+
+
+def test_join_spills_to_disk_within_memory_budget():
+    db = large_database()
+    sql = "SELECT id FROM users WHERE age > 50 AND id IN (SELECT user_id FROM orders WHERE amount > 4);"
+    [in_memory] = execute(sql, db, batch_size=500)
+    expected = sorted(fetch_rows(in_memory))
+    [spilled] = execute(sql, db, batch_size=500, memory_limit=50000)
+    batches = list(spilled)
+
+    assert sorted(fetch_rows(batches)) == expected
+    assert all(len(batch["id"]) == 500 for batch in batches[:-1])
+    assert spilled.stats()["spilled_partitions"] > 0
+    assert spilled.peak_memory < in_memory.peak_memory
+
+
+def test_limit_stops_upstream_scan_early():
+    db = large_database()
+    [result] = execute("SELECT id FROM users WHERE age > 10 LIMIT 5;", db, batch_size=100)
+
+    assert fetch_rows(result) == [(11,), (12,), (13,), (14,), (15,)]
+    assert result.stats()["batches_scanned"] <= 2   # of 200
+    assert result.peak_memory > 0
+
+
+def test_index_scans_fetch_only_matching_rows():
+    db = large_database()
+    [result] = execute("SELECT id, age FROM users WHERE id = 4242;", db, batch_size=1000)
+    assert fetch_rows(result) == [(4242, 42)]
+    assert result.stats()["rows_fetched"] == 1 and result.stats()["row_groups_read"] == 0
+
+    sql = "SELECT order_id FROM orders WHERE user_id >= 700 AND user_id < 714 AND amount > 4;"
+    [result] = execute(sql, db, batch_size=3)
+    expected = [(i,) for i in range(20000) if 700 <= i * 7 % 20000 < 714 and i % 10 > 4]
+    assert fetch_rows(result) == expected
+    assert result.stats()["index_scans"] == 1 and result.stats()["rows_fetched"] == 14
+
+
+def test_division_by_zero_is_null_in_every_engine():
+    db = sample_database()
+    columns = ["users.id", "users.name", "users.age", "users.status", "users.email"]
+    rows = list(zip([1, 2], ["ann", "bob"], [20, 0], ["a", "b"], ["", ""]))
+    for where in ("age / 0 = 0", "age / 0 != 0", "age / 0.0 < 1", "age / (id - 1) >= 0"):
+        sql = f"SELECT id FROM users WHERE {where};"
+        [result] = execute(sql, db)
+        expected = [(2,), (3,), (4,), (5,)] if "id - 1" in where else []
+        assert fetch_rows(result) == expected, where
+        condition = optimize(parse(tokenize(sql)))[0].where
+        assert [row[0] for row in filter_rows(rows, condition, columns)] == \
+            [row[0] for row in rows if "id - 1" in where and row[0] != 1], where
+
+
+def test_null_semantics_do_not_depend_on_dictionary_encoding():
+    encoded = ["a", "a", "b", None, "a", "b"]
+    plain = ["a", "c", "b", None, "d", "e"]
+    for statuses in (encoded, plain):
+        db = Database()
+        db.add_table("users", {"id": list(range(6)), "name": [""] * 6, "age": [0] * 6,
+                               "status": statuses, "email": [""] * 6})
+        assert (db.table("users").dictionary("status") is not None) == (statuses is encoded)
+        checks = {"=": str.__eq__, "!=": str.__ne__, "<": str.__lt__, "<=": str.__le__,
+                  ">": str.__gt__, ">=": str.__ge__}
+        for op, check in checks.items():
+            [result] = execute(f"SELECT id FROM users WHERE status {op} 'b';", db)
+            expected = [(i,) for i, s in enumerate(statuses) if s is not None and check(s, "b")]
+            assert fetch_rows(result) == expected, (op, statuses)
@@ -0,0 +1,42 @@
+from app.lexer import tokenize
+from app.parser import parse
+from app.optimizer import ast_to_sql, optimize
+from app.hashcons import NodeTable
+
+
+def test_identical_subtrees_share_one_node():
+    ast = parse(tokenize(
+        "SELECT id FROM users WHERE age + 1 > 5 OR name = 'x';"
+        "SELECT id FROM users WHERE age + 1 > 5;"
+    ))
+    nodes = NodeTable()
+    first = nodes.intern(ast[0].where)
+    second = nodes.intern(ast[1].where)
+
+    assert first.conditions[0] is second
+    assert nodes.intern(second) is second
+    assert len(nodes) == 4  # age + 1, age + 1 > 5, name = 'x', the OR
+
+
+def test_duplicate_operands_are_removed():
+    stmt = optimize(parse(tokenize(
+        "SELECT id FROM users WHERE age > 5 AND (id = 1 OR id = 1) AND age > 5;")))[0]
+
+    assert ast_to_sql([stmt]) == "SELECT id FROM users WHERE (id = 1 AND age > 5);"
+    assert stmt.optimization_log.count("Removed 1 duplicate predicate(s)") == 2
+
+
+def test_repeated_subqueries_are_detected_across_batch():
+    ast = optimize(parse(tokenize(
+        "SELECT id FROM users WHERE id IN (SELECT id FROM users WHERE age > 3)"
+        " OR age IN (SELECT id FROM users WHERE age > 3);"
+        "SELECT name FROM users WHERE id IN (SELECT id FROM users WHERE age > 3);"
+    )))
+
+    first, second = ast
+    assert first.where.conditions[0].right is first.where.conditions[1].right
+    assert "Repeated subquery shared as one node: (SELECT id FROM users WHERE age > 3)" \
+        in first.optimization_log
+    assert second.joins[0].where is first.where.conditions[0].right.where
+    assert "Subquery shared with statement 1: (SELECT id FROM users WHERE age > 3)" \
+        in second.optimization_log
@@ -0,0 +1,52 @@
+from app.lexer import tokenize
+from app.parser import parse
+from app.optimizer import optimize
+from app.ir_generator import generate_ir
+from app.plan import build_plan
+from app.join_order import JoinEdge, Relation, choose_join_order, join_algorithm
+
+
+def chain(sizes):
+    relations = [Relation(f"t{i}", rows, distinct={"k": rows}) for i, rows in enumerate(sizes)]
+    edges = [JoinEdge(i, "k", i + 1, "k") for i in range(len(sizes) - 1)]
+    return relations, edges
+
+
+def test_dp_joins_selective_relations_first():
+    relations, edges = chain([1000000, 1000, 10, 1000000])
+    plan, method = choose_join_order(relations, edges)
+
+    assert method == "dp"
+    assert sorted(plan.leaves()) == [0, 1, 2, 3]
+    # The first join pairs the 10-row relation with its neighbour
+    inner = plan
+    while inner.left.relation is None or inner.right.relation is None:
+        inner = inner.left if inner.left.relation is None else inner.right
+    assert {inner.left.relation, inner.right.relation} == {1, 2}
+
+
+def test_greedy_above_threshold_and_algorithm_choice():
+    relations, edges = chain([100, 5, 100, 50, 7])
+    dp_plan, _ = choose_join_order(relations, edges)
+    greedy_plan, method = choose_join_order(relations, edges, threshold=2)
+
+    assert method == "greedy"
+    assert sorted(greedy_plan.leaves()) == [0, 1, 2, 3, 4]
+    assert dp_plan.cost <= greedy_plan.cost
+    assert join_algorithm(1, 3, True)[0] == "nested_loop"
+    assert join_algorithm(10000, 20000, True)[0] == "hash"
+
+
+def test_join_plan_is_shown_in_ir():
+    ast = optimize(parse(tokenize(
+        "SELECT name FROM users WHERE age > 30 AND id IN (SELECT user_id FROM orders WHERE amount > 5);"
+    )))
+    stmt = ast[0]
+
+    assert [join.table for join in stmt.joins] == ["orders"]
+    ir = generate_ir(ast)
+    assert "⋉hash_semi[users.id = orders.user_id]" in ir
+    plan = build_plan(stmt)
+    assert f"{{rows={plan.rows:.2f}, cost={plan.cost:.2f}}}" in ir
+    assert plan.input.rows == stmt.join_plan.rows
+    assert any(line.startswith("Join order (dp)") for line in stmt.optimization_log)
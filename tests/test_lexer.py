@@ -14,3 +14,20 @@ def test_tokenize_simple_select():
 def test_tokenize_empty_string():
     tokens = tokenize("")
     assert tokens == []
+
+def test_iter_tokens_carries_offsets():
+    from app.lexer import iter_tokens
+    sql = "SELECT id FROM users"
+    tokens = list(iter_tokens(sql))
+
+    assert [t.kind for t in tokens] == ["SELECT", "IDENTIFIER", "FROM", "IDENTIFIER"]
+    assert all(sql[t.start:t.end] == t.value for t in tokens)
+
+def test_tokenize_compact_matches_tokenize():
+    from app.lexer import tokenize_compact
+    sql = "select id, name from users where status = 'active';"
+    buffer = tokenize_compact(sql)
+
+    assert len(buffer) == len(tokenize(sql))
+    assert buffer.as_tuples() == tokenize(sql)
+    assert buffer.kinds.itemsize == 1
@@ -22,3 +22,90 @@ def test_optimize_pushdown():
 
     # For this test, just check optimizer returns something valid
     assert isinstance(optimized_ast, list)
+
+def test_optimize_wide_predicate_without_recursion():
+    from app.ir_generator import generate_ir
+    from app.optimizer import ast_to_sql
+    sql = "SELECT id FROM users WHERE " + " OR ".join(f"(age = {i} AND 1 = 1)" for i in range(5000))
+    optimized_ast = optimize(parse(tokenize(sql)))
+    where = optimized_ast[0]['where']
+
+    assert where['op'] == 'OR'
+    assert len(where['conditions']) == 5000
+    assert generate_ir(optimized_ast).count(" OR ") == 4999
+    assert ast_to_sql(optimized_ast).count(" OR ") == 4999
+
+def test_reorder_uses_column_statistics(tmp_path):
+    import json
+    from app.catalog import Catalog
+    from app.statistics import collect, save_statistics
+    schema_path = tmp_path / "schema.json"
+    schema_path.write_text(json.dumps({"users": {"columns": {"age": "int", "status": "string"}}}))
+    rows = [(i % 100, "banned" if i % 50 == 0 else "active") for i in range(1000)]
+    save_statistics(str(tmp_path / "schema.stats.json"), "users", collect(rows, ["age", "status"]))
+    catalog = Catalog(str(schema_path))
+
+    sql = "SELECT age FROM users WHERE age > 5 AND status = 'banned';"
+    stmt = optimize(parse(tokenize(sql)), catalog)[0]
+
+    assert stmt.where.conditions[0].left.value == "status"
+    assert "Estimated 18.80 of 1000 rows" in stmt.optimization_log[0]
+
+def test_range_predicates_are_merged():
+    from app.optimizer import ast_to_sql
+    stmt = optimize(parse(tokenize("SELECT id FROM users WHERE age > 20 AND age > 30 AND age != 10;")))[0]
+
+    assert ast_to_sql([stmt]) == "SELECT id FROM users WHERE age > 30;"
+    assert "Removed 2 implied predicate(s) on age" in stmt.optimization_log
+
+
+def test_contradictory_ranges_become_false():
+    stmt = optimize(parse(tokenize("SELECT id FROM users WHERE age > 30 AND status = 'a' AND age < 20;")))[0]
+
+    assert stmt.where.type == "BOOLEAN" and stmt.where.value is False
+    assert "WHERE clause is always FALSE, table scan can be skipped" in stmt.optimization_log
+
+    stmt = optimize(parse(tokenize("SELECT id FROM users WHERE age >= 5 AND age <= 5 AND age != 5;")))[0]
+    assert stmt.where.type == "BOOLEAN" and stmt.where.value is False
+
+
+def test_constant_fold_evaluates_literal_arithmetic():
+    from app.optimizer import ast_to_sql
+    stmt = optimize(parse(tokenize("SELECT id FROM users WHERE age > 10 + 5 * 2 AND age < 7 / 2;")))[0]
+    assert ast_to_sql([stmt]) == "SELECT id FROM users WHERE FALSE;"
+
+    stmt = optimize(parse(tokenize("SELECT id FROM users WHERE age >= 3 / 2.0 OR name = 'x';")))[0]
+    assert ast_to_sql([stmt]) == "SELECT id FROM users WHERE (age >= 1.5 OR name = 'x');"
+
+    # 1e+21 has no NUMBER spelling, so the product is left unfolded
+    sql = "SELECT id FROM users WHERE age > 10000000000.0 * 100000000000.0;"
+    stmt = optimize(parse(tokenize(sql)))[0]
+    assert ast_to_sql([stmt]) == "SELECT id FROM users WHERE age > (10000000000.0 * 100000000000.0);"
+
+
+def test_constant_fold_comparisons_and_caching():
+    from app.evaluator import ConstantFolder
+    where = parse(tokenize("SELECT id FROM users WHERE 1 = 2 OR 'a' < 'b' OR age > 1 / 0;"))[0].where
+    folder = ConstantFolder()
+    folded = folder.fold(where)
+
+    assert [c.type for c in folded.conditions] == ["BOOLEAN", "BOOLEAN", "CONDITION"]
+    assert folded.conditions[0].value is False and folded.conditions[1].value is True
+    # Division by zero is left for execution time
+    assert folded.conditions[2].right.type == "EXPRESSION"
+    assert folder.fold(folded.conditions[2]) is folded.conditions[2]
+
+
+def test_required_columns_are_pushed_into_scans():
+    stmt = optimize(parse(tokenize(
+        "SELECT * FROM users WHERE id IN (SELECT user_id, amount, status FROM orders WHERE amount > 5);"
+    )))[0]
+
+    assert stmt.scan_columns == ["id", "name", "age", "status", "email"]
+    assert stmt.joins[0].columns == ["user_id", "amount"]
+    assert "Reading 2 of 4 columns from orders: user_id, amount" in stmt.optimization_log
+
+    stmt = optimize(parse(tokenize(
+        "SELECT name FROM users WHERE age > 3 OR id IN (SELECT user_id, amount FROM orders);")))[0]
+    assert stmt.scan_columns == ["id", "name", "age"]
+    assert stmt.where.conditions[1].right.columns == ["user_id"]
@@ -17,3 +17,52 @@ def test_parse_invalid_syntax():
     tokens = tokenize(sql)
     with pytest.raises(Exception):
         parse(tokens)
+
+def test_parse_token_stream():
+    from app.lexer import iter_tokens
+    sql = "SELECT id FROM users WHERE age > 25; SELECT * FROM orders;"
+    ast = parse(iter_tokens(sql))
+
+    assert [stmt['table'] for stmt in ast] == ['users', 'orders']
+    assert [s.to_dict() for s in ast] == [s.to_dict() for s in parse(tokenize(sql))]
+
+def test_parse_compact_tokens():
+    from app.lexer import tokenize_compact
+    sql = "SELECT id FROM users WHERE age > 25 AND status = 'active';"
+
+    compact_ast = parse(tokenize_compact(sql))
+    assert [s.to_dict() for s in compact_ast] == [s.to_dict() for s in parse(tokenize(sql))]
+
+def test_and_binds_tighter_than_or():
+    ast = parse(tokenize("SELECT id FROM users WHERE age > 1 AND age < 5 OR status = 'x';"))
+    where = ast[0]['where']
+
+    assert where['op'] == 'OR'
+    assert [c['type'] for c in where['conditions']] == ['LOGIC', 'CONDITION']
+    assert where['conditions'][0]['op'] == 'AND'
+
+
+def test_wide_predicates_are_flattened():
+    sql = "SELECT id FROM users WHERE " + " OR ".join(f"age = {i}" for i in range(20000))
+    where = parse(tokenize(sql))[0]['where']
+
+    assert where['type'] == 'LOGIC'
+    assert len(where['conditions']) == 20000
+
+def test_ast_nodes_are_slotted_and_export_dicts():
+    stmt = parse(tokenize("SELECT id FROM users WHERE age > 25;"))[0]
+
+    assert not hasattr(stmt.where, '__dict__')
+    assert stmt.where.to_dict() == {
+        'type': 'CONDITION',
+        'left': {'type': 'IDENTIFIER', 'value': 'age'},
+        'op': '>',
+        'right': {'type': 'NUMBER', 'value': '25'},
+    }
+
+def test_parse_limit():
+    ast = parse(tokenize("SELECT id FROM users WHERE age > 25 LIMIT 10;"))
+
+    assert ast[0].to_dict()["limit"] == 10
+    with pytest.raises(SyntaxError):
+        parse(tokenize("SELECT id FROM users LIMIT 2.5;"))
@@ -0,0 +1,46 @@
+from app.lexer import tokenize
+from app.parser import parse
+from app.optimizer import optimize
+from app.ir_generator import plan_to_string
+from app.plan import build_plan, iter_plan
+
+
+def plan_for(sql):
+    return build_plan(optimize(parse(tokenize(sql)))[0])
+
+
+def test_plan_operators_and_estimates():
+    plan = plan_for("SELECT id FROM users WHERE age > 25 LIMIT 5;")
+
+    assert [node.operator for node in iter_plan(plan)] == ["Limit", "Project", "Filter", "Scan"]
+    limit, project, filter_, scan = iter_plan(plan)
+    assert filter_.rows <= scan.rows
+    assert filter_.cost >= scan.cost
+    assert limit.rows == min(5, project.rows)
+    assert plan_to_string(plan).startswith("limit[5] (π[id] (σ[age > 25] (users)))")
+
+
+def test_semi_join_plan_follows_join_order():
+    plan = plan_for(
+        "SELECT name FROM users WHERE id IN (SELECT user_id FROM orders WHERE amount > 5);"
+    )
+    join = plan.input
+
+    assert join.operator == "SemiJoin"
+    assert join.on == [("users.id", "orders.user_id")]
+    assert join.rows <= join.left.rows
+    assert join.cost >= join.left.cost + join.right.cost
+
+
+def test_access_path_follows_selectivity():
+    lookup = plan_for("SELECT name FROM users WHERE id = 42;").input
+    assert lookup.operator == "Scan" and lookup.access.path == "lookup"
+    assert lookup.cost < lookup.access.rows * 10 < 1000
+
+    scan = plan_for("SELECT name FROM users WHERE age >= 20 AND age < 30 AND status = 'a';").input.input
+    assert (scan.access.path, scan.access.low, scan.access.high) == ("range", (20, True), (30, False))
+    assert plan_to_string(scan).startswith("index_range{sorted}[20 <= users.age < 30] (users)")
+
+    # A hash index cannot answer ranges, and a wide range is cheaper to scan
+    assert plan_for("SELECT name FROM users WHERE id > 42;").input.input.access is None
+    assert plan_for("SELECT name FROM users WHERE age > 25;").input.input.access is None
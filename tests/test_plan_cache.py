@@ -0,0 +1,66 @@
+import pytest
+from app.optimizer import ast_to_sql
+from app.plan_cache import PlanCache, fingerprint
+from app.lexer import tokenize
+
+
+def test_fingerprint_ignores_literal_values():
+    key_a, literals_a = fingerprint(tokenize("SELECT id FROM users WHERE age > 25;"))
+    key_b, literals_b = fingerprint(tokenize("SELECT id FROM users WHERE age > 31;"))
+
+    assert key_a == key_b
+    assert literals_a == [("NUMBER", "25")]
+    assert literals_b == [("NUMBER", "31")]
+
+
+def test_cache_hit_binds_new_literals():
+    cache = PlanCache(capacity=2)
+    cache.compile("SELECT id FROM users WHERE age > 25 AND status = 'a';")
+    ast, errors = cache.compile("SELECT id FROM users WHERE age > 31 AND status = 'b';")
+
+    assert errors == []
+    assert cache.stats()["hits"] == 1
+    assert "age > 31" in ast_to_sql(ast)
+    assert "'b'" in ast_to_sql(ast)
+
+
+def test_limit_count_is_checked_on_cache_hits():
+    cache = PlanCache()
+    cache.compile("SELECT id FROM users WHERE age > 25 LIMIT 10;")
+    ast, errors = cache.compile("SELECT id FROM users WHERE age > 31 LIMIT 10;")
+
+    assert errors == [] and cache.stats()["hits"] == 1
+    assert ast_to_sql(ast) == "SELECT id FROM users WHERE age > 31 LIMIT 10;"
+    with pytest.raises(SyntaxError):
+        cache.compile("SELECT id FROM users WHERE age > 31 LIMIT 2.5;")
+
+
+def test_semi_join_templates_keep_inherited_fields():
+    cache = PlanCache()
+    sql = "SELECT id FROM users WHERE id IN (SELECT user_id FROM orders WHERE amount > {});"
+    cache.compile(sql.format(5))
+    ast, errors = cache.compile(sql.format(7))
+
+    assert errors == [] and cache.stats()["hits"] == 1
+    assert ast_to_sql(ast) == \
+        "SELECT id FROM users WHERE id IN (SELECT user_id FROM orders WHERE amount > 7);"
+
+
+def test_value_dependent_plans_are_not_cached():
+    cache = PlanCache()
+    cache.compile("SELECT id FROM users WHERE 1 = 1;")
+    ast, _ = cache.compile("SELECT id FROM users WHERE 1 = 1;")
+
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["size"] == 0
+    assert ast[0].where is None
+
+
+def test_lru_eviction_and_invalidation():
+    cache = PlanCache(capacity=1)
+    cache.compile("SELECT id FROM users WHERE age > 1;")
+    cache.compile("SELECT name FROM users WHERE age > 1;")
+
+    assert cache.stats()["evictions"] == 1
+    cache.invalidate()
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,50 @@
+from app.lexer import tokenize
+from app.optimizer import ast_to_sql, optimize
+from app.parser import parse
+from app.plan_cache import PlanCache
+from app.plan_codec import decode_plan, encode_plan
+from app.plan_store import PlanStore, write_plan_store
+
+
+def test_plan_round_trip_keeps_structure_and_sharing():
+    ast = optimize(parse(tokenize(
+        "SELECT name FROM users WHERE (age > 30 OR age < 5) AND (age > 30 OR age < 5) "
+        "AND id IN (SELECT user_id FROM orders WHERE amount > 5) LIMIT 10;"
+    )))
+    decoded = decode_plan(encode_plan(ast))
+
+    assert [s.to_dict() for s in decoded] == [s.to_dict() for s in ast]
+    assert ast_to_sql(decoded) == ast_to_sql(ast)
+    plan, original = decoded[0].join_plan, ast[0].join_plan
+    assert (plan.mask, plan.rows, plan.cost, plan.algorithms()) == \
+        (original.mask, original.rows, original.cost, original.algorithms())
+
+
+def test_store_lookup_decodes_only_requested_plans(tmp_path):
+    path = str(tmp_path / "plans.bin")
+    plans = {f"SELECT c{i} FROM t": encode_plan([]) for i in range(1000)}
+    plans["SELECT id FROM users"] = encode_plan(optimize(parse(tokenize("SELECT id FROM users;"))))
+    write_plan_store(path, plans.items(), (1, None))
+
+    store = PlanStore(path)
+    assert len(store) == 1001
+    assert store.catalog_version == (1, None)
+    assert store.get("SELECT id FROM users")[0].table == "users"
+    assert store.get("SELECT missing FROM t") is None
+    assert dict(store.items()) == plans
+    store.close()
+
+
+def test_cache_warm_starts_from_store(tmp_path):
+    path = str(tmp_path / "plans.bin")
+    cache = PlanCache()
+    cache.compile("SELECT id FROM users WHERE age > 25 AND status = 'a';")
+    cache.save(path)
+
+    warm = PlanCache(store_path=path)
+    ast, errors = warm.compile("SELECT id FROM users WHERE age > 31 AND status = 'b';")
+
+    assert errors == []
+    assert "age > 31" in ast_to_sql(ast) and "'b'" in ast_to_sql(ast)
+    assert warm.stats()["store_hits"] == 1
+    assert warm.stats()["misses"] == 0
@@ -0,0 +1,66 @@
+from app.lexer import tokenize
+from app.optimizer import optimize
+from app.parser import parse
+from app.predicate import PredicateCompiler, filter_rows, generate_source
+
+COLUMNS = ["users.id", "users.name", "users.age", "users.status", "users.email"]
+ROWS = [(i, f"u{i}", 15 + i * 3, "active" if i % 3 else "idle", "") for i in range(20)]
+
+
+def where(sql):
+    return optimize(parse(tokenize(sql)))[0].where
+
+
+def test_generated_source_uses_offsets_and_parameters():
+    source = generate_source(where("SELECT id FROM users WHERE age > 30 AND status = 'idle';"), COLUMNS)
+
+    assert "row[2]" in source and "row[3]" in source
+    assert "30" not in source and "idle" not in source
+    assert " and " in source
+
+
+def test_compiled_predicate_matches_sql_semantics():
+    condition = where(
+        "SELECT id FROM users WHERE (age / 4 = 6 OR status = 'idle') AND id + 1 > 3;")
+    expected = [row for row in ROWS
+                if (int(row[2] / 4) == 6 or row[3] == "idle") and row[0] + 1 > 3]
+
+    assert filter_rows(ROWS, condition, COLUMNS) == expected
+    subquery = where("SELECT id FROM users WHERE id IN (SELECT user_id FROM orders) OR age > 70;")
+    assert [row[0] for row in filter_rows(ROWS, subquery, COLUMNS,
+                                          subquery_values=lambda sub: {1, 2})] == [1, 2, 19]
+
+
+def test_predicates_are_cached_per_fingerprint():
+    compiler = PredicateCompiler()
+    first = compiler.compile(where("SELECT id FROM users WHERE age > 30;"), COLUMNS, key="q1")
+    second = compiler.compile(where("SELECT id FROM users WHERE age > 60;"), COLUMNS, key="q1")
+    by_source = compiler.compile(where("SELECT id FROM users WHERE age > 45;"), COLUMNS)
+    compiler.compile(where("SELECT id FROM users WHERE age > 50;"), COLUMNS)
+
+    assert compiler.stats()["misses"] == 2 and compiler.stats()["hits"] == 2
+    assert [first(row) for row in ROWS] != [second(row) for row in ROWS]
+    assert sum(map(by_source, ROWS)) == sum(row[2] > 45 for row in ROWS)
+
+
+def test_keyed_predicates_follow_the_optimized_shape():
+    compiler = PredicateCompiler()
+    kept = compiler.compile(where("SELECT id FROM users WHERE age > 10 AND 1 = 1;"), COLUMNS, key="q")
+    folded = compiler.compile(where("SELECT id FROM users WHERE age > 10 AND 1 = 2;"), COLUMNS, key="q")
+    swapped = compiler.compile(where("SELECT id FROM users WHERE status = 'idle' AND age > 40;"),
+                               COLUMNS, key="q")
+
+    assert sum(map(kept, ROWS)) == sum(row[2] > 10 for row in ROWS)
+    assert not any(map(folded, ROWS))
+    assert [row for row in ROWS if swapped(row)] == \
+        [row for row in ROWS if row[3] == "idle" and row[2] > 40]
+    assert compiler.stats()["misses"] == 3
+
+
+def test_not_equal_is_false_for_null():
+    rows = [(1, "a", 20, None, ""), (2, "b", 30, "idle", ""), (3, "c", 40, "active", "")]
+    condition = where("SELECT id FROM users WHERE status != 'idle' AND age / 0 != 1;")
+    assert filter_rows(rows, condition, COLUMNS) == []
+
+    condition = where("SELECT id FROM users WHERE status != 'idle';")
+    assert [row[0] for row in filter_rows(rows, condition, COLUMNS)] == [3]
@@ -0,0 +1,37 @@
+from app.lexer import tokenize
+from app.parser import parse
+from app.optimizer import optimize, optimize_select
+from app.rules import Rule, RuleEngine
+
+
+def test_rewrites_run_to_fixpoint():
+    # Folding 1 = 1 away leaves a bare IN-subquery, which a later round turns into a semi-join
+    sql = "SELECT name FROM users WHERE id IN (SELECT id FROM users WHERE age > 3) AND 1 = 1;"
+    stmt = optimize(parse(tokenize(sql)))[0]
+
+    assert stmt.where is None
+    assert stmt.joins[0].table == "users"
+    assert "Converted IN-subquery to semi-join" in stmt.optimization_log
+    assert any(line.startswith("Rule in_subquery_to_semi_join: fired 1 time(s)")
+               for line in stmt.optimization_log)
+
+
+def test_engine_stops_at_budget():
+    # A rule that always fires would loop forever without a budget
+    stmt = parse(tokenize("SELECT id FROM users WHERE age > 1;"))[0]
+    spin = Rule("spin", lambda node: True, lambda node, context: node, types=("CONDITION",))
+    engine = RuleEngine([spin], budget=5)
+    engine.run(stmt, None)
+
+    log = []
+    engine.report(log)
+    assert engine.stats["spin"][0] == 5
+    assert log[-1] == "Rewrite budget of 5 rule firings exhausted after 1 round(s)"
+
+
+def test_budget_is_logged_by_optimizer():
+    stmt = parse(tokenize("SELECT id FROM users WHERE 1 = 1 AND 2 = 2 AND age > 1;"))[0]
+    stmt.optimization_log = []
+    stmt = optimize_select(stmt, budget=1)
+
+    assert any("exhausted" in line for line in stmt.optimization_log)
@@ -0,0 +1,53 @@
+import threading
+
+from app.sqlite_backend import SqliteBackend, parameterize
+
+
+def make_backend(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "data.db"), pool_size=2, fetch_size=2)
+    backend.create_schema()
+    backend.insert("users", [(i, f"u{i}", 20 + i, "a" if i % 2 else "b", "") for i in range(10)])
+    backend.insert("orders", [(i, i % 4, float(i), "p") for i in range(8)])
+    return backend
+
+
+def test_parameterize_shares_text_across_literals():
+    key_a, text_a, params_a = parameterize("SELECT id FROM users WHERE age > 25 AND status = 'a';")
+    key_b, text_b, params_b = parameterize("SELECT id FROM users WHERE age > 31 AND status = 'b';")
+
+    assert (key_a, text_a) == (key_b, text_b)
+    assert "?" in text_a and "25" not in text_a
+    assert (params_a, params_b) == ([25, "a"], [31, "b"])
+
+
+def test_optimized_query_streams_rows_and_reuses_statements(tmp_path):
+    backend = make_backend(tmp_path)
+    [batches] = backend.execute(
+        "SELECT id FROM users WHERE age > 21 AND 1 = 1 AND id IN (SELECT user_id FROM orders);")
+    batches = list(batches)
+
+    assert [len(batch) for batch in batches] == [2]
+    assert sorted(row[0] for batch in batches for row in batch) == [2, 3]
+    for age in (22, 23, 22):
+        list(backend.execute(f"SELECT id FROM users WHERE age > {age};")[0])
+    # Only the repeated statement skips parameterizing; all three share SQLite's prepared statement
+    assert backend.pool.stats()["statement_hits"] == 1
+    backend.close()
+
+
+def test_compare_times_original_and_optimized_on_pool(tmp_path):
+    backend = make_backend(tmp_path)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        backend.compare("SELECT name FROM users WHERE age > 20 + 5 AND status = 'a';", repeat=2)))
+        for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4 and len(backend.timings) == 4
+    assert all(t["original_rows"] == t["optimized_rows"] == 2 for t in results)
+    assert "age > 25" in results[0]["optimized_sql"]
+    assert backend.pool.stats()["connections"] <= 2
+    backend.close()
@@ -0,0 +1,65 @@
+import json
+import sqlite3
+import pytest
+from app.catalog import Catalog
+from app.statistics import analyze, analyze_sqlite, collect, save_statistics
+
+
+def test_collect_exact_statistics():
+    rows = [(i, "active" if i % 4 else "banned", None if i % 10 == 0 else i * 2) for i in range(1000)]
+    stats = collect(rows, ["id", "status", "score"])
+
+    assert stats.row_count == 1000
+    assert stats.column("id").distinct == 1000
+    assert (stats.column("id").min, stats.column("id").max) == (0, 999)
+    assert stats.column("status").mcv[0] == ("active", 0.75)
+    assert stats.column("score").null_frac == pytest.approx(0.1)
+    assert len(stats.column("id").histogram) == 21
+
+
+def test_distinct_estimate_beyond_exact_tracking():
+    stats = collect(((i,) for i in range(50000)), ["id"])
+
+    assert stats.column("id").distinct == pytest.approx(50000, rel=0.15)
+
+
+def test_analyze_persists_next_to_schema(tmp_path):
+    schema_path = tmp_path / "schema.json"
+    schema_path.write_text(json.dumps({"users": {"columns": {"id": "int", "age": "int"}}}))
+    data = tmp_path / "users.csv"
+    data.write_text("id,age\n" + "".join(f"{i},{20 + i % 30}\n" for i in range(300)))
+    catalog = Catalog(str(schema_path))
+
+    analyze("users", str(data), catalog)
+
+    assert (tmp_path / "schema.stats.json").exists()
+    assert catalog.table_stats("users").row_count == 300
+    assert catalog.column_stats("users", "age").max == 49
+
+
+def test_analyze_sqlite_table(tmp_path):
+    db = str(tmp_path / "data.sqlite")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE orders (order_id INTEGER, amount REAL)")
+    conn.executemany("INSERT INTO orders VALUES (?, ?)", [(i, i / 2) for i in range(100)])
+    conn.commit()
+    conn.close()
+
+    stats = analyze_sqlite(db, "orders", batch_size=7)
+
+    assert stats.row_count == 100
+    assert stats.column("amount").max == 49.5
+
+
+def test_statistics_attach_to_every_table_of_a_catalog(tmp_path):
+    schema_path = tmp_path / "schema.json"
+    schema_path.write_text(json.dumps({"users": {"columns": {"id": "int"}},
+                                       "orders": {"columns": {"user_id": "int"}}}))
+    stats_path = str(tmp_path / "schema.stats.json")
+    save_statistics(stats_path, "users", collect(((i,) for i in range(10)), ["id"]))
+    save_statistics(stats_path, "orders", collect(((i % 3,) for i in range(30)), ["user_id"]))
+    catalog = Catalog(str(schema_path))
+
+    # Looking up one table loads the whole file; the other must get its stats too
+    assert catalog.table_stats("users").row_count == 10
+    assert catalog.column_stats("orders", "user_id").distinct == 3
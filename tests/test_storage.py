@@ -0,0 +1,123 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.executor import Database, execute, fetch_rows
+from app.lexer import tokenize
+from app.optimizer import optimize
+from app.parser import parse
+from app.storage import ColumnStore, row_group_may_match
+
+
+def stored_database(tmp_path, rows=10000, row_group_size=1000):
+    memory = Database()
+    ids = np.arange(rows)
+    memory.add_table("users", {
+        "id": ids,
+        "name": [f"u{i}" for i in range(rows)],
+        "age": ids // 100,
+        "status": [None if i % 7 == 0 else "active" for i in range(rows)],
+        "email": [""] * rows,
+    })
+    store = ColumnStore(str(tmp_path))
+    memory.save(store, row_group_size)
+    return memory, Database(store=ColumnStore(str(tmp_path)))
+
+
+def test_stored_columns_round_trip(tmp_path):
+    memory, stored = stored_database(tmp_path)
+    table = stored.table("users")
+
+    assert table.rows == 10000 and len(table.row_groups()) == 10
+    assert table.read("age", 4000, 4003).tolist() == [40, 40, 40]
+    assert table.read("name", 9998, 10000).tolist() == ["u9998", "u9999"]
+    assert table.read("status", 0, 2).tolist() == [-1, 0]   # dictionary codes
+    assert table.columns["status"][:2].tolist() == [None, "active"]
+    assert table.row_groups()[0][2]["status"] == ["active", "active", 143]
+
+
+def test_zone_maps_skip_row_groups(tmp_path):
+    memory, stored = stored_database(tmp_path)
+    # users.id has a hash index, which cannot answer ranges: this is a full scan
+    sql = "SELECT id, name FROM users WHERE id >= 4200 AND id < 4500 AND status = 'active';"
+    [expected] = execute(sql, memory)
+    [result] = execute(sql, stored, batch_size=256)
+
+    assert fetch_rows(result) == fetch_rows(expected)
+    assert result.stats()["row_groups_read"] == 1
+    assert result.stats()["row_groups_skipped"] == 9
+
+
+def test_row_group_may_match_is_conservative():
+    zones = {"age": [10, 20, 0], "status": [None, None, 50]}
+
+    def may_match(where):
+        return row_group_may_match(optimize(parse(tokenize(f"SELECT id FROM users WHERE {where};")))[0].where, zones)
+
+    assert not may_match("age > 20")
+    assert may_match("30 > age")
+    assert not may_match("age = 5 OR age > 25")
+    assert not may_match("status = 'a'")
+    assert may_match("age + 1 > 100")
+
+
+def test_dictionary_columns_filter_on_codes(tmp_path):
+    memory = Database()
+    statuses = ["active", "banned", None, "pending"]
+    memory.add_table("users", {
+        "id": np.arange(1000),
+        "name": [f"u{i}" for i in range(1000)],
+        "age": np.zeros(1000, dtype=int),
+        "status": [statuses[i % 4] for i in range(1000)],
+        "email": [""] * 1000,
+    })
+    memory.add_table("orders", {
+        "order_id": [1, 2], "user_id": [1, 2], "amount": [1.0, 2.0], "status": ["banned", "gone"],
+    })
+    table = memory.table("users")
+    assert table.dictionary("status").tolist() == ["active", "banned", "pending"]
+    assert table.columns["status"].dtype == np.int8
+    assert table.dictionary("name") is None
+
+    memory.save(ColumnStore(str(tmp_path)))
+    stored = Database(store=ColumnStore(str(tmp_path)))
+    stored.add_table("orders", {
+        "order_id": [1, 2], "user_id": [1, 2], "amount": [1.0, 2.0], "status": ["banned", "gone"],
+    })
+    cases = {
+        "status = 'pending'": lambda s: s == "pending",
+        "status = 'missing'": lambda s: False,
+        "status != 'active'": lambda s: s is not None and s != "active",
+        "'b' < status": lambda s: s is not None and s > "b",
+        "status <= 'banned'": lambda s: s is not None and s <= "banned",
+        "status IN (SELECT status FROM orders)": lambda s: s == "banned",
+    }
+    for where, keep in cases.items():
+        expected = [(i, statuses[i % 4]) for i in range(1000) if keep(statuses[i % 4])]
+        for db in (memory, stored):
+            [result] = execute(f"SELECT id, status FROM users WHERE {where};", db, batch_size=128)
+            assert fetch_rows(result) == expected, where
+
+
+def test_version_1_tables_are_still_read(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    store.write_table("t", {"id": np.arange(4), "name": np.array(["a", "b", None, "d"], dtype=object)})
+    meta_path = os.path.join(str(tmp_path), "t", "_table.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    assert meta["version"] == 2 and meta["columns"]["name"] == "string"
+
+    del meta["dictionaries"]
+    meta["version"] = 1
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    assert ColumnStore(str(tmp_path)).table("t").columns["name"].tolist() == ["a", "b", None, "d"]
+
+    meta["version"] = 3
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError):
+        ColumnStore(str(tmp_path)).table("t")